@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoflix', '0010_alter_tvepisode_season'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tvepisode',
+            name='img_path',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='tvseason',
+            name='img_path',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='watchablecontent',
+            name='img_path',
+            field=models.CharField(max_length=100),
+        ),
+    ]
@@ -34,7 +34,7 @@ class SharedData(db.models.Model):
 class ContentData(SharedData):
     name = db.models.CharField(max_length=255)
     overview = db.models.CharField(null=True, default=None, max_length=9999)
-    img_path = db.models.CharField(max_length=50)
+    img_path = db.models.CharField(max_length=100)
     # TODO: Add cast/crew info to content
     # {"cast": list[dict]}
     cast = db.models.JSONField(null=True)
@@ -87,6 +87,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # tmdb_worker threads share the file. A deferred transaction that
+        # read before writing can't wait for the write lock, SQLite fails it
+        # at once with "database is locked". IMMEDIATE takes the lock when
+        # the transaction begins, so concurrent writers queue on timeout.
+        'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE'},
+        # On disk, so the tests of concurrent ingests lock like the real one
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -127,6 +134,47 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# File storage. tmdb_artwork holds TMDB artwork and its derivatives, named
+# by static path, and tmdb_json the JSON dumps of TMDB payloads. Both are
+# on local disk unless TMDB_S3_BUCKET points artwork at an S3-compatible
+# object store (needs boto3), which every app node can share.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    "tmdb_artwork": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": BASE_DIR / "tmdb" / "static",
+            "base_url": "/" + STATIC_URL,
+            "allow_overwrite": True,
+        },
+    },
+    "tmdb_json": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": BASE_DIR / "tmdb" / "json",
+            "allow_overwrite": True,
+        },
+    },
+}
+
+if os.getenv("TMDB_S3_BUCKET"):
+    STORAGES["tmdb_artwork"] = {
+        "BACKEND": "tmdb.storage.S3Storage",
+        "OPTIONS": {
+            "bucket": os.getenv("TMDB_S3_BUCKET"),
+            "prefix": os.getenv("TMDB_S3_PREFIX", ""),
+            # e.g. http://localhost:9000 for a local MinIO
+            "endpoint_url": os.getenv("TMDB_S3_ENDPOINT_URL"),
+            "region_name": os.getenv("TMDB_S3_REGION"),
+            "base_url": os.getenv("TMDB_S3_PUBLIC_URL"),
+        },
+    }
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TmdbConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tmdb'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,407 @@
+import contextvars
+import io
+import json
+import os
+import tempfile
+import threading
+import zipfile
+import zlib
+from contextlib import contextmanager
+from typing import Iterator
+
+from . import metrics, payloads, storage
+
+
+# Every dump of a series, i.e. the series itself, its seasons and their
+# episodes, is a member of one archive in the tmdb_json storage,
+# e.g. TV/Show.zip holds Show.json, Season 1.json, Season 1-Episode1.json
+ARCHIVE_DIR = "TV"
+# The member that indexes all others, see SeriesArchive.manifest
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+# Dumps are written once per ingest and read back many times
+COMPRESS_LEVEL = 9
+KINDS = ("series", "season", "episode")
+
+# The archive the current thread is reading and writing, see series
+_open: contextvars.ContextVar["SeriesArchive | None"] = contextvars.ContextVar(
+    "tmdb_series_archive",
+    default=None
+)
+
+
+def normalize(name: str) -> str:
+    # Titles become file names, which can't hold ":" everywhere
+    return name.replace(":", " -")
+
+
+def series_member(series_name: str) -> str:
+    return f"{normalize(series_name)}.json"
+
+
+def season_member(season_name: str) -> str:
+    return f"{normalize(season_name)}.json"
+
+
+def episode_member(season_name: str, episode_number: int) -> str:
+    return f"{normalize(season_name)}-Episode{episode_number}.json"
+
+
+class SeriesArchive:
+    """
+    The dumps of one series, kept in a single compressed archive.
+
+    The archive is read in one storage read, after which what it holds is
+    answered from its manifest without touching storage again. Writes are
+    buffered and saved as a whole new archive by flush, so a reader never
+    sees one half-written. Two processes flushing the same series at once
+    keep the last one's dumps, which the next ingest of the series repairs.
+
+    Series dumped before archives existed are read from their loose
+    TV/<series>/ files, and packed into the archive on its first flush
+    (or by tmdb_migrate_json).
+
+    Attributes
+    ----------
+    series : str
+        the normalized series name
+    name : str
+        the archive's name in the tmdb_json storage
+    manifest : dict[str, dict]
+        member -> its kind, TMDB id, season/episode number and size
+    exists : bool
+        whether the archive was found in storage
+    """
+
+    def __init__(self, series_name: str):
+        self.series = normalize(series_name)
+        self.name = f"{ARCHIVE_DIR}/{self.series}.zip"
+        self.legacy_dir = f"{ARCHIVE_DIR}/{self.series}"
+        self.manifest: dict[str, dict] = {}
+        self.exists = False
+        self._stored: zipfile.ZipFile | None = None
+        self._pending: dict[str, bytes] = {}
+        self._legacy: set[str] | None = None
+        self._loaded = False
+        self._lock = threading.RLock()
+
+
+    def load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with storage.dumps().open(self.name, "rb") as file:
+                    stored = zipfile.ZipFile(io.BytesIO(file.read()))
+                manifest = json.loads(stored.read(MANIFEST))
+            except FileNotFoundError:
+                return
+            except (zipfile.BadZipFile, KeyError, ValueError) as e:
+                # Rebuilt from what is dumped next
+                print(f"\nSkipping invalid archive {self.name}:\n{e}\n")
+                return
+
+            self._stored = stored
+            self.manifest = manifest["members"]
+            self.exists = True
+
+
+    def read(self, member: str, shape: type) -> dict | None:
+        """
+        The member's payload checked against shape, None if there's no
+        valid one.
+        """
+
+        with self._lock:
+            self.load()
+            try:
+                if member in self._pending:
+                    content = self._pending[member]
+                elif self.exists:
+                    if member not in self.manifest:
+                        return None
+                    content = self._stored.read(member)
+                elif member in self._legacy_files():
+                    content = self._read_legacy(member)
+                else:
+                    return None
+            except zipfile.BadZipFile as e:
+                print(f"\nSkipping invalid dump {self.name}:{member}:\n{e}\n")
+                return None
+
+        try:
+            return payloads.decode(content, shape)
+        except payloads.InvalidPayload as e:
+            print(f"\nSkipping invalid dump {self.name}:{member}:\n{e}\n")
+            return None
+
+
+    def write(self, member: str, data: dict) -> None:
+        # Buffered until flush, re-dumping an unchanged payload is a no-op
+        content = payloads.encode(data)
+        with self._lock:
+            self.load()
+            if member not in self._pending and self._same(member, content):
+                metrics.count(dumps_unchanged=1)
+                return
+            self._pending[member] = content
+
+
+    def adopt_legacy(self) -> list[str]:
+        """
+        Buffers the loose TV/<series>/ dumps the archive doesn't hold yet.
+
+        Returns
+        -------
+        list[str]
+            every loose dump found, adopted or not
+        """
+
+        loose = sorted(self._legacy_files())
+        with self._lock:
+            self.load()
+            for member in loose:
+                if member in self.manifest or member in self._pending:
+                    continue
+                content = self._read_legacy(member)
+                if content is not None:
+                    self._pending[member] = content
+
+        return loose
+
+
+    def flush(self) -> bool:
+        """
+        Saves the buffered dumps along with everything already archived.
+
+        Returns
+        -------
+        bool
+            whether a new archive was saved, False if nothing changed
+        """
+
+        with self._lock:
+            self.load()
+            if not self._pending:
+                return False
+            if not self.exists:
+                # Keep what was dumped before archives existed
+                self.adopt_legacy()
+
+            manifest = {}
+            for member, content in list(self._pending.items()):
+                entry = _describe(content)
+                if entry is None:
+                    # An archived member keeps its last valid dump
+                    print(f"\nSkipping invalid dump {self.name}:{member}\n")
+                    del self._pending[member]
+                    continue
+                manifest[member] = entry
+            if not manifest:
+                self._pending.clear()
+                return False
+            members = {
+                member: self.manifest[member]
+                for member in self.manifest if member not in manifest
+            } | manifest
+
+            with metrics.stage("dump"):
+                saved = self._save(members)
+            metrics.count(dumps=len(manifest), dump_bytes=len(saved))
+
+            self._pending.clear()
+            self._stored = zipfile.ZipFile(io.BytesIO(saved))
+            self.manifest = members
+            self.exists = True
+
+        return True
+
+
+    def _save(self, members: dict[str, dict]) -> bytes:
+        dumps = storage.dumps()
+        fd, temp_path = tempfile.mkstemp(dir=storage.temp_dir(dumps), suffix=".part")
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                with zipfile.ZipFile(
+                    file,
+                    "w",
+                    compression=zipfile.ZIP_DEFLATED,
+                    compresslevel=COMPRESS_LEVEL
+                ) as archive:
+                    ordered = sorted(members.items(), key=_member_order)
+                    # First, so the index is found without scanning the rest
+                    archive.writestr(MANIFEST, json.dumps({
+                        "version": MANIFEST_VERSION,
+                        "series": self.series,
+                        "members": dict(ordered),
+                    }))
+                    for member, _ in ordered:
+                        if member in self._pending:
+                            content = self._pending[member]
+                        else:
+                            content = self._stored.read(member)
+                        archive.writestr(member, content)
+                file.flush()
+                os.fsync(file.fileno())
+
+            with open(temp_path, "rb") as file:
+                saved = file.read()
+            storage.save_file(dumps, self.name, temp_path)
+            return saved
+
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+    def _same(self, member: str, content: bytes) -> bool:
+        # The archive's own CRC-32 tells, without decompressing the member
+        if member not in self.manifest:
+            return False
+        info = self._stored.getinfo(member)
+
+        return info.file_size == len(content) and info.CRC == zlib.crc32(content)
+
+
+    def _legacy_files(self) -> set[str]:
+        # Listed once, instead of probing for every member
+        if self._legacy is None:
+            try:
+                _, files = storage.dumps().listdir(self.legacy_dir)
+            except FileNotFoundError:
+                files = []
+            self._legacy = {file for file in files if file.endswith(".json")}
+
+        return self._legacy
+
+
+    def _read_legacy(self, member: str) -> bytes | None:
+        try:
+            with storage.dumps().open(f"{self.legacy_dir}/{member}", "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+
+def _describe(content: bytes) -> dict | None:
+    # The manifest entry of a dump
+    try:
+        data = payloads.decode(content)
+    except payloads.InvalidPayload:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    if "episode_number" in data:
+        entry = {
+            "kind": "episode",
+            "season_number": data.get("season_number"),
+            "episode_number": data["episode_number"],
+        }
+    elif "episodes" in data:
+        entry = {"kind": "season", "season_number": data.get("season_number")}
+    else:
+        entry = {"kind": "series"}
+
+    return {
+        **entry,
+        "id": data.get("id"),
+        "bytes": len(content),
+    }
+
+
+def _member_order(item: tuple[str, dict]) -> tuple:
+    # The series, then each season followed by its episodes
+    member, entry = item
+    return (
+        entry.get("season_number") is not None,
+        entry.get("season_number") or 0,
+        KINDS.index(entry["kind"]),
+        entry.get("episode_number") or 0,
+        member,
+    )
+
+
+@contextmanager
+def series(series_name: str) -> Iterator[SeriesArchive]:
+    """
+    Reads and writes the dumps of a series through one archive for the
+    whole block. The archive is read at most once, and saved once when the
+    block ends if anything changed. A block opened inside one for the same
+    series joins it.
+
+    Usage:
+        with archives.series(django_series.name):
+            for season in seasons:
+                archives.write(django_series.name, archives.season_member(...), data)
+    """
+
+    current = _open.get()
+    if current is not None and current.series == normalize(series_name):
+        yield current
+        return
+
+    archive = SeriesArchive(series_name)
+    token = _open.set(archive)
+    try:
+        yield archive
+    finally:
+        _open.reset(token)
+        # What was fetched before an error is still worth keeping
+        archive.flush()
+
+
+def read(series_name: str, member: str, shape: type) -> dict | None:
+    """
+    A dump of series_name checked against shape, None if there's no valid
+    one. Outside a series block this reads the whole archive.
+    """
+
+    with series(series_name) as archive:
+        return archive.read(member, shape)
+
+
+def write(series_name: str, member: str, data: dict) -> None:
+    """
+    Dumps data as member of series_name's archive. Outside a series block
+    this saves the whole archive, so batch writes in one.
+    """
+
+    with series(series_name) as archive:
+        archive.write(member, data)
+
+
+def manifest(series_name: str) -> dict[str, dict] | None:
+    """
+    What is dumped for series_name: member -> manifest entry, None if it
+    has no archive.
+
+    Only the archive's index and manifest are read where the storage can
+    seek, e.g. on local disk.
+    """
+
+    name = f"{ARCHIVE_DIR}/{normalize(series_name)}.zip"
+    try:
+        with storage.dumps().open(name, "rb") as file, zipfile.ZipFile(file) as archive:
+            return json.loads(archive.read(MANIFEST))["members"]
+    except FileNotFoundError:
+        return None
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        print(f"\nSkipping invalid archive {name}:\n{e}\n")
+        return None
+
+
+def read_series_dump(path: str) -> bytes | None:
+    """
+    The series payload of the archive file at path, e.g. for tmdb_import.
+    """
+
+    with zipfile.ZipFile(path) as archive:
+        members = json.loads(archive.read(MANIFEST))["members"]
+        for member, entry in members.items():
+            if entry["kind"] == "series":
+                return archive.read(member)
+
+    return None
@@ -0,0 +1,367 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+import requests
+from dotenv import load_dotenv
+
+from . import metrics, payloads
+
+load_dotenv()
+
+
+# Cached responses live here. Unlike artwork and dumps (see tmdb.storage)
+# the cache is per node, it only saves this node requests.
+CACHE_DIR = os.getenv(
+    "TMDB_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+)
+CACHE_ENABLED = os.getenv("TMDB_CACHE", "on").lower() not in ("0", "off", "false")
+# Seconds a cached response is served without asking TMDB at all.
+# Once stale it is revalidated with If-None-Match/If-Modified-Since,
+# which costs a request but no body when nothing changed.
+TTLS = {
+    "movie": int(os.getenv("TMDB_CACHE_TTL_MOVIE", 7 * 24 * 3600)),
+    # Airing series pick up new seasons, keep these short
+    "tv": int(os.getenv("TMDB_CACHE_TTL_TV", 24 * 3600)),
+    "season": int(os.getenv("TMDB_CACHE_TTL_SEASON", 3 * 24 * 3600)),
+    "episode": int(os.getenv("TMDB_CACHE_TTL_EPISODE", 7 * 24 * 3600)),
+}
+DEFAULT_TTL = 24 * 3600
+# Each process saves its hit/miss counts to a file of its own in here, at
+# most every STATS_INTERVAL seconds and when it exits. tmdb_cache adds
+# them up.
+STATS_DIR = "stats"
+STATS_INTERVAL = 30
+
+# Most specific first
+RESOURCE_PATTERNS = (
+    ("episode", re.compile(r"^/tv/\d+/season/\d+/episode/\d+$")),
+    ("season", re.compile(r"^/tv/\d+/season/\d+$")),
+    ("tv", re.compile(r"^/tv/\d+$")),
+    ("movie", re.compile(r"^/movie/\d+$")),
+)
+
+Fetch = Callable[[str, dict | None, dict | None], requests.Response | None]
+
+
+class ResponseCache:
+    """
+    Read-through, on-disk cache of decoded TMDB responses.
+
+    Responses are decoded into their typed payload shape (see
+    tmdb.payloads) and stored as compact JSON, so only the keys the
+    models read take up disk. Entries are keyed by endpoint and params. A
+    fresh entry (younger than
+    the TTL for its resource) is returned without any request. A stale one
+    is revalidated with its ETag/Last-Modified, and a 304 just renews it.
+    If TMDB can't be reached a stale entry is served rather than nothing.
+
+    Hits, misses and the like are counted per process (stats), added to
+    the report of the run they happen in as cache_* counters, and saved
+    next to the entries (saved_stats).
+    """
+
+    def __init__(self,
+                 directory: str = CACHE_DIR,
+                 ttls: dict[str, int] = TTLS,
+                 enabled: bool = CACHE_ENABLED
+               ):
+        self.directory = directory
+        self.ttls = ttls
+        self.enabled = enabled
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats_name = f"{os.getpid()}-{time.time_ns()}.json"
+        self._stats_saved_at = time.monotonic()
+
+
+    def fetch_json(self,
+                   url_ext: str,
+                   params: dict | None,
+                   fetch: Fetch,
+                   refresh: bool = False
+                 ) -> dict | None:
+        """
+        Returns the decoded body for url_ext, from the cache when possible.
+
+        Parameters
+        ----------
+        url_ext : str
+            TMDB endpoint, e.g. "/tv/1399"
+        params : dict | None
+            query params, part of the cache key
+        fetch : Fetch
+            does the request, called as fetch(url_ext, params, headers)
+        refresh : bool
+            revalidate even a fresh entry, e.g. when TMDB says it changed
+
+        Returns
+        -------
+        dict | None
+            None if there was no usable response and nothing cached
+        """
+
+        if not self.enabled:
+            return self._decode(url_ext, fetch(url_ext, params, None))
+
+        path = self._path(url_ext, params)
+        entry = self._load(path)
+
+        fresh = entry and time.time() - entry["fetched_at"] < self.ttl_for(url_ext)
+        if fresh and not refresh:
+            self._count("hits")
+            return entry["data"]
+
+        response = fetch(url_ext, params, self._validators(entry))
+
+        if entry and response is not None and response.status_code == 304:
+            self._count("revalidated")
+            entry["fetched_at"] = time.time()
+            self._save(path, entry)
+            return entry["data"]
+
+        data = self._decode(url_ext, response)
+        if data is None:
+            if entry:
+                print(f"\nServing stale cache for {url_ext}\n")
+                self._count("stale")
+                return entry["data"]
+            self._count("errors")
+            return None
+
+        self._count("misses")
+        self._save(path, {
+            "url": url_ext,
+            "params": params,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "data": data,
+        })
+
+        return data
+
+
+    def ttl_for(self, url_ext: str) -> int:
+        resource = self.resource_for(url_ext)
+        if resource is None:
+            return DEFAULT_TTL
+
+        return self.ttls.get(resource, DEFAULT_TTL)
+
+
+    @staticmethod
+    def resource_for(url_ext: str) -> str | None:
+        for resource, pattern in RESOURCE_PATTERNS:
+            if pattern.match(url_ext):
+                return resource
+
+        return None
+
+
+    def stats(self) -> dict:
+        """
+        Returns the counts since the process started, plus the hit rate.
+
+        Revalidated entries count as hits, they cost a request but no body.
+        """
+
+        with self.lock:
+            counts = dict(self.counts)
+
+        return self._with_hit_rate(counts)
+
+
+    def saved_stats(self) -> dict:
+        """
+        Returns the counts every process saved to this cache, plus the hit rate.
+        """
+
+        counts = Counter()
+        directory = os.path.join(self.directory, STATS_DIR)
+        try:
+            filenames = os.listdir(directory)
+        except FileNotFoundError:
+            filenames = []
+
+        for filename in filenames:
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename), "rb") as file:
+                    counts.update(json.loads(file.read()))
+            except (OSError, ValueError) as e:
+                print(f"\nUnreadable cache stats {filename}:\n{e}\n")
+
+        return self._with_hit_rate(dict(counts))
+
+
+    def save_stats(self) -> None:
+        """
+        Saves this process' counts so far, see saved_stats.
+        """
+
+        with self._stats_lock:
+            with self.lock:
+                counts = dict(self.counts)
+                self._stats_saved_at = time.monotonic()
+            if not counts:
+                return
+            try:
+                self._write(
+                    os.path.join(self.directory, STATS_DIR, self._stats_name),
+                    json.dumps(counts).encode()
+                )
+            except OSError as e:
+                print(f"\nCouldn't save cache stats:\n{e}\n")
+
+
+    def clear(self) -> int:
+        # Saved stats go too, they describe the entries removed
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                os.remove(os.path.join(root, filename))
+                if not os.path.basename(root) == STATS_DIR:
+                    removed += 1
+
+        return removed
+
+
+    def entries(self) -> tuple[int, int]:
+        """
+        Returns how many responses are cached and their size in bytes.
+        """
+
+        entries = 0
+        size = 0
+        for root, dirs, files in os.walk(self.directory):
+            if STATS_DIR in dirs:
+                dirs.remove(STATS_DIR)
+            for filename in files:
+                entries += 1
+                size += os.path.getsize(os.path.join(root, filename))
+
+        return entries, size
+
+
+    def _path(self, url_ext: str, params: dict | None) -> str:
+        key = json.dumps([url_ext, params or {}], sort_keys=True)
+        digest = hashlib.sha256(key.encode()).hexdigest()
+
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+
+    def _load(self, path: str) -> dict | None:
+        try:
+            with open(path, "rb") as file:
+                return payloads.decode(file.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"\nUnreadable cache entry {path}:\n{e}\n")
+            return None
+
+
+    def _save(self, path: str, entry: dict) -> None:
+        body = payloads.encode(entry)
+        self._write(path, body)
+        metrics.count(cache_bytes=len(body))
+
+
+    @staticmethod
+    def _write(path: str, body: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(body)
+            # Readers on other threads only ever see whole files
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+    @staticmethod
+    def _validators(entry: dict | None) -> dict | None:
+        if not entry:
+            return None
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers or None
+
+
+    @classmethod
+    def _decode(cls, url_ext: str, response: requests.Response | None) -> dict | None:
+        if response is None:
+            print("Invalid response object")
+            return None
+
+        if not response.status_code == 200:
+            print(f"\nBad Response for {url_ext}:\n{response.status_code}\n")
+            return None
+
+        resource = cls.resource_for(url_ext)
+        try:
+            with metrics.stage("decode"):
+                return payloads.decode(
+                    response.content,
+                    payloads.TYPES.get(resource)
+                )
+        except payloads.InvalidPayload as e:
+            print(f"\nInvalid payload for {url_ext}:\n{e}\n")
+            return None
+
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.counts[name] += 1
+            due = time.monotonic() - self._stats_saved_at >= STATS_INTERVAL
+        metrics.count(**{f"cache_{name}": 1})
+        if due:
+            self.save_stats()
+
+
+    @staticmethod
+    def _with_hit_rate(counts: dict) -> dict:
+        # Revalidated entries count as hits, see stats
+        served = counts.get("hits", 0) + counts.get("revalidated", 0)
+        total = served + counts.get("misses", 0)
+        counts["hit_rate"] = served / total if total else 0.0
+
+        return counts
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """
+    Returns the process-wide ResponseCache, creating it on first use.
+    """
+
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+                atexit.register(_cache.save_stats)
+
+    return _cache
@@ -0,0 +1,204 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+IMG_BASE_URL = os.getenv("TMDB_IMG_BASE_URL", "https://image.tmdb.org/t/p/original")
+HEADER = {
+    "accept": "application/json",
+    "Authorization": os.getenv("TMDB_AUTH")
+}
+# (connect, read) seconds
+TIMEOUT = (
+    float(os.getenv("TMDB_CONNECT_TIMEOUT", 3.05)),
+    float(os.getenv("TMDB_READ_TIMEOUT", 20)),
+)
+MAX_RETRIES = int(os.getenv("TMDB_MAX_RETRIES", 4))
+# TMDB allows roughly 50 requests/second per IP, stay a little under it
+RATE_LIMIT = float(os.getenv("TMDB_RATE_LIMIT", 40))
+POOL_SIZE = int(os.getenv("TMDB_POOL_SIZE", 16))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+            # Sleep outside the lock so other threads can refill/check
+            time.sleep(wait)
+
+
+class TMDBClient:
+    """
+    Shared HTTP client for every TMDB request.
+
+    Keeps a pooled keep-alive session, applies a timeout to every call,
+    retries 429/5xx and connection errors with exponential backoff
+    (honouring Retry-After), and throttles all threads through one
+    token bucket.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+    def __init__(self,
+                 base_url: str = BASE_URL,
+                 img_base_url: str = IMG_BASE_URL,
+                 headers: dict = HEADER,
+                 timeout: tuple[float, float] = TIMEOUT,
+                 max_retries: int = MAX_RETRIES,
+                 backoff: float = 0.5,
+                 rate_limit: float = RATE_LIMIT,
+                 pool_size: int = POOL_SIZE
+               ):
+        self.base_url = base_url
+        self.img_base_url = img_base_url
+        self.headers = headers
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = TokenBucket(rate_limit)
+
+        self.session = requests.Session()
+        # Retries are handled in get() so Retry-After and the bucket apply
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=pool_size,
+            max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+
+    def get(self, url: str, **kwargs) -> requests.Response | None:
+        """
+        GETs url, retrying transient failures.
+
+        Returns the last response (which may be an error status) once retries
+        are exhausted, or None if no response was ever received.
+        """
+
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries:
+                    print(f"\nGET {url} failed after {attempt + 1} attempts:\n{e}\n")
+                    return None
+                time.sleep(self._backoff_delay(attempt))
+                continue
+            except requests.exceptions.RequestException as e:
+                print(f"\nGET {url} failed:\n{e}\n")
+                return None
+
+            if response.status_code not in self.RETRY_STATUSES \
+            or attempt == self.max_retries:
+                return response
+
+            delay = self._retry_after(response)
+            if delay is None:
+                delay = self._backoff_delay(attempt)
+            # Release the connection back to the pool before sleeping
+            response.close()
+            time.sleep(delay)
+
+        return None
+
+
+    def get_data(self,
+                 url_ext: str,
+                 params: dict | None = None,
+                 headers: dict | None = None
+               ) -> requests.Response | None:
+        return self.get(
+            self.base_url + url_ext,
+            params={"language": "en-US", **(params or {})},
+            headers={**self.headers, **(headers or {})}
+        )
+
+
+    def get_image(self,
+                  img_path: str,
+                  stream: bool = False
+                ) -> requests.Response | None:
+        return self.get(self.img_base_url + img_path, stream=stream)
+
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter keeps retrying threads from stampeding together
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+_client: TMDBClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> TMDBClient:
+    """
+    Returns the process-wide TMDBClient, creating it on first use.
+    """
+
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TMDBClient()
+
+    return _client
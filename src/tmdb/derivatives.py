@@ -0,0 +1,117 @@
+import os
+import posixpath
+import tempfile
+
+from . import storage
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, originals are served without it
+    Image = None
+
+
+# name -> (width, height), None keeps the aspect ratio for that side
+# These match the sizes the djangoflix templates render at
+POSTER_SIZES = {
+    "w145": (145, None),  # browse/favorites/search tiles
+    "h500": (None, 500),  # details page
+}
+STILL_SIZES = {
+    "h160": (None, 160),  # episode list on the details page
+}
+WEBP_QUALITY = 80
+
+
+def derivative_path(img_path: str, size: str) -> str:
+    """
+    Maps an original to its derivative, e.g.
+    tmdb/movie/abc.jpg -> tmdb/movie/w145/abc.webp
+    """
+
+    directory, filename = posixpath.split(img_path)
+    stem = posixpath.splitext(filename)[0]
+
+    return posixpath.join(directory, size, f"{stem}.webp")
+
+
+def make_derivatives(img_path: str,
+                     sizes: dict[str, tuple],
+                     force: bool = False,
+                     source: str | None = None
+                   ) -> int:
+    """
+    Writes a WebP derivative of the artwork img_path for each of sizes.
+
+    Derivatives that already exist in the artwork storage are skipped
+    unless force is set. Each one is written to a temp file and saved
+    into place, see storage.save_file.
+
+    Parameters
+    ----------
+    img_path : str
+        the original's name in the artwork storage
+    sizes : dict[str, tuple]
+        POSTER_SIZES or STILL_SIZES
+    force : bool
+        regenerate derivatives that already exist
+    source : str | None
+        a local copy of the original to read instead of the stored one,
+        e.g. a download that isn't stored yet
+
+    Returns
+    -------
+    int
+        how many derivatives were written
+    """
+
+    if Image is None:
+        return 0
+
+    artwork = storage.artwork()
+    targets = {name: derivative_path(img_path, name) for name in sizes}
+    existing = set() if force else storage.exists_many(artwork, targets.values())
+    todo = {
+        name: box for name, box in sizes.items()
+        if targets[name] not in existing
+    }
+    if not todo:
+        return 0
+
+    written = 0
+    temp_dir = storage.temp_dir(artwork)
+    try:
+        with (open(source, "rb") if source else artwork.open(img_path)) as file, \
+             Image.open(file) as original:
+            original.load()
+            for name, box in todo.items():
+                resized = _resize(original, box)
+                fd, temp_path = tempfile.mkstemp(dir=temp_dir, suffix=".part")
+                try:
+                    with os.fdopen(fd, "wb") as outfile:
+                        resized.save(outfile, "WEBP", quality=WEBP_QUALITY, method=6)
+                    storage.save_file(artwork, targets[name], temp_path)
+                    written += 1
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+
+    except (OSError, ValueError) as e:
+        print(f"\nMake derivatives failed for {img_path}:\n{e}\n")
+
+    return written
+
+
+def _resize(image, box: tuple):
+    width, height = box
+    if width is None:
+        width = round(image.width * height / image.height)
+    if height is None:
+        height = round(image.height * width / image.width)
+    # Never upscale, a small original is already small enough
+    if width >= image.width or height >= image.height:
+        width, height = image.width, image.height
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    return image.resize((width, height), Image.Resampling.LANCZOS)
@@ -0,0 +1,87 @@
+import gzip
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.db import models
+
+from .payloads import decode
+
+
+# TMDB names its daily exports e.g. movie_ids_05_15_2024.json.gz,
+# see https://developer.themoviedb.org/docs/daily-id-exports
+EXPORT_KINDS = {
+    "movie_ids": "movie",
+    "tv_series_ids": "series",
+}
+
+
+def export_kind(path: str) -> str | None:
+    for prefix, kind in EXPORT_KINDS.items():
+        if prefix in path:
+            return kind
+
+    return None
+
+
+def iter_export(path: str) -> Iterator[dict]:
+    """
+    Lazily yields every entry of a daily ID export.
+
+    The file is decompressed as it is read, one line at a time, so memory
+    use doesn't grow with the size of the export. Plain (already
+    decompressed) files work too. Lines that aren't valid JSON are
+    reported and skipped.
+    """
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as file:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield decode(line)
+            except ValueError as e:
+                print(f"\nSkipping line {number} of {path}:\n{e}\n")
+
+
+def filter_entries(entries: Iterable[dict],
+                   min_popularity: float = 0.0,
+                   include_adult: bool = False
+                 ) -> Iterator[dict]:
+    for entry in entries:
+        if "id" not in entry:
+            continue
+        if not include_adult and entry.get("adult"):
+            continue
+        if entry.get("popularity", 0) < min_popularity:
+            continue
+        yield entry
+
+
+def skip_existing(entries: Iterable[dict],
+                  model: type[models.Model],
+                  batch_size: int = 1000,
+                  keep: set[int] | None = None
+                ) -> Iterator[dict]:
+    """
+    Drops entries whose id is already a tmdb_id of model.
+
+    Looks ids up batch_size at a time, so it costs one query per batch
+    and never loads the whole table. Ids in keep are never dropped, e.g.
+    series whose last IngestRun didn't finish.
+    """
+
+    keep = keep or set()
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return
+
+        existing = set(model.objects.filter(
+            tmdb_id__in=[entry["id"] for entry in batch]
+        ).values_list("tmdb_id", flat=True))
+
+        for entry in batch:
+            if entry["id"] not in existing or entry["id"] in keep:
+                yield entry
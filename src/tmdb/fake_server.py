@@ -0,0 +1,401 @@
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, a fixed tiny JPEG is served without it
+    Image = None
+
+
+# 1x1 white JPEG
+TINY_JPEG = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000ffdb004300100b0c0e0c0a100e0d0e1211101318"
+    "281a181616183123251d283a333d3c3933383740485c4e404457453738506d51575f626768673e4d"
+    "71797064785c656763ffdb0043011112121815182f1a1a2f63423842636363636363636363636363"
+    "6363636363636363636363636363636363636363636363636363636363636363636363636363ffc0"
+    "0011080001000103012200021101031101ffc4001f00000105010101010101000000000000000001"
+    "02030405060708090a0bffc400b5100002010303020403050504040000017d010203000411051221"
+    "31410613516107227114328191a1082342b1c11552d1f02433627282090a161718191a2526272829"
+    "2a3435363738393a434445464748494a535455565758595a636465666768696a737475767778797a"
+    "838485868788898a92939495969798999aa2a3a4a5a6a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6"
+    "c7c8c9cad2d3d4d5d6d7d8d9dae1e2e3e4e5e6e7e8e9eaf1f2f3f4f5f6f7f8f9faffc4001f010003"
+    "0101010101010101010000000000000102030405060708090a0bffc400b511000201020404030407"
+    "05040400010277000102031104052131061241510761711322328108144291a1b1c109233352f015"
+    "6272d10a162434e125f11718191a262728292a35363738393a434445464748494a53545556575859"
+    "5a636465666768696a737475767778797a82838485868788898a92939495969798999aa2a3a4a5a6"
+    "a7a8a9aab2b3b4b5b6b7b8b9bac2c3c4c5c6c7c8c9cad2d3d4d5d6d7d8d9dae2e3e4e5e6e7e8e9ea"
+    "f2f3f4f5f6f7f8f9faffda000c03010002110311003f00f40a28a2803fffd9"
+)
+
+
+class FakeTMDB:
+    """
+    Local stand-in for the TMDB API and image CDN.
+
+    Serves /3/movie/{id}, /3/tv/{id} (with append_to_response=season/N),
+    /3/tv/{id}/season/{n} and /3/tv/{id}/season/{n}/episode/{e}, plus any
+    image under /img/. The change lists (/3/movie/changes, /3/tv/changes
+    and /3/tv/{id}/changes) report the ids put in changes, every season
+    of a changed series counting as changed. Payloads are read from fixtures_dir when a recorded
+    one exists (e.g. fixtures_dir/tv/1399.json) and made up otherwise.
+
+    latency delays every response, error_rate answers that share of
+    requests with a 500 and throttle_rate with a 429 + Retry-After.
+    Point the app at it with TMDB_BASE_URL/TMDB_IMG_BASE_URL, see urls().
+    """
+
+    def __init__(self,
+                 latency: float = 0.0,
+                 error_rate: float = 0.0,
+                 throttle_rate: float = 0.0,
+                 seasons: int = 3,
+                 episodes: int = 8,
+                 image_size: tuple[int, int] = (500, 750),
+                 fixtures_dir: str | None = None,
+                 seed: int | None = None
+               ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.seasons = seasons
+        self.episodes = episodes
+        self.fixtures_dir = fixtures_dir
+        self.random = random.Random(seed)
+        self.image = self._make_image(image_size)
+        # "movie" or "tv" -> ids the change lists report
+        self.changes: dict[str, set[int]] = {"movie": set(), "tv": set()}
+        # "movie", "tv", "season", "episode", "changes", "image", "500", "429"
+        self.hits = Counter()
+        self.lock = threading.Lock()
+        self.server: ThreadingHTTPServer | None = None
+
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "FakeTMDB":
+        """
+        Serves from a daemon thread, port 0 picks a free port.
+        """
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        return self
+
+
+    def stop(self) -> None:
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+    def urls(self) -> tuple[str, str]:
+        """
+        Returns (TMDB_BASE_URL, TMDB_IMG_BASE_URL) for the running server.
+        """
+
+        host, port = self.server.server_address[:2]
+
+        return (f"http://{host}:{port}/3", f"http://{host}:{port}/img")
+
+
+    def _handle(self, request: BaseHTTPRequestHandler) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self.lock:
+            roll = self.random.random()
+        if roll < self.throttle_rate:
+            self._count("429")
+            return self._send(request, 429, b"", {"Retry-After": "1"})
+        if roll < self.throttle_rate + self.error_rate:
+            self._count("500")
+            return self._send(request, 500, b"")
+
+        url = urlparse(request.path)
+        if url.path.startswith("/img/"):
+            self._count("image")
+            return self._send(request, 200, self.image, {"Content-Type": "image/jpeg"})
+
+        kind, data = self._payload(url.path, parse_qs(url.query))
+        if data is None:
+            return self._send(request, 404, b"")
+
+        self._count(kind)
+        body = json.dumps(data).encode()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if request.headers.get("If-None-Match") == etag:
+            return self._send(request, 304, b"", {"ETag": etag})
+
+        self._send(request, 200, body, {
+            "Content-Type": "application/json",
+            "ETag": etag,
+        })
+
+
+    def _payload(self, path: str, query: dict) -> tuple[str, dict | None]:
+        if match := re.fullmatch(r"/3/(movie|tv)/changes", path):
+            return ("changes", self.change_list(match[1]))
+
+        if match := re.fullmatch(r"/3/tv/(\d+)/changes", path):
+            return ("changes", self.series_changes(int(match[1])))
+
+        if match := re.fullmatch(r"/3/movie/(\d+)", path):
+            return ("movie", self._load("movie", match[1]) or self.movie(int(match[1])))
+
+        if match := re.fullmatch(r"/3/tv/(\d+)", path):
+            id = int(match[1])
+            data = self._load("tv", match[1]) or self.series(id)
+            for extra in query.get("append_to_response", [""])[0].split(","):
+                if season := re.fullmatch(r"season/(\d+)", extra):
+                    data[extra] = self._season_payload(id, int(season[1]))
+            return ("tv", data)
+
+        if match := re.fullmatch(r"/3/tv/(\d+)/season/(\d+)", path):
+            return ("season", self._season_payload(int(match[1]), int(match[2])))
+
+        if match := re.fullmatch(r"/3/tv/(\d+)/season/(\d+)/episode/(\d+)", path):
+            id, number, episode = map(int, match.groups())
+            return ("episode", self._load("tv", f"{id}/season/{number}/episode/{episode}")
+                    or self.episode(id, number, episode))
+
+        return ("", None)
+
+
+    def _season_payload(self, id: int, number: int) -> dict:
+        return self._load("tv", f"{id}/season/{number}") or self.season(id, number)
+
+
+    def _load(self, kind: str, key: str) -> dict | None:
+        if not self.fixtures_dir:
+            return None
+
+        path = os.path.join(self.fixtures_dir, kind, f"{key}.json")
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler,
+              status: int,
+              body: bytes,
+              headers: dict | None = None
+            ) -> None:
+        request.send_response(status)
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+
+    def _count(self, name: str) -> None:
+        with self.lock:
+            self.hits[name] += 1
+
+
+    @staticmethod
+    def _make_image(size: tuple[int, int]) -> bytes:
+        if Image is None:
+            return TINY_JPEG
+
+        buffer = io.BytesIO()
+        Image.new("RGB", size, (120, 30, 30)).save(buffer, "JPEG", quality=85)
+
+        return buffer.getvalue()
+
+
+    def change_list(self, kind: str) -> dict:
+        ids = sorted(self.changes[kind])
+
+        return {
+            "results": [{"id": id, "adult": False} for id in ids],
+            "page": 1,
+            "total_pages": 1,
+            "total_results": len(ids),
+        }
+
+
+    def series_changes(self, id: int) -> dict:
+        if id not in self.changes["tv"]:
+            return {"changes": []}
+
+        return {"changes": [{
+            "key": "season",
+            "items": [
+                {
+                    "id": f"{id:012x}{number:012x}",
+                    "action": "updated",
+                    "time": "2024-05-15 10:00:00 UTC",
+                    "value": {"season_id": id * 1000 + number, "season_number": number},
+                }
+                for number in range(1, self.seasons + 1)
+            ],
+        }]}
+
+
+    ### Synthetic payloads, shaped like the TMDB responses the models read.
+    ### They carry the usual fields the models don't read too, so decoding
+    ### and caching costs what it would against TMDB
+    @staticmethod
+    def movie(id: int) -> dict:
+        return {
+            **FakeTMDB._extras(id, f"Movie {id}"),
+            "original_title": f"Movie {id}",
+            "budget": 1000000,
+            "revenue": 5000000,
+            "imdb_id": f"tt{id:07d}",
+            "video": False,
+            "id": id,
+            "title": f"Movie {id}",
+            "overview": f"Overview of movie {id}",
+            "poster_path": f"/movie{id}.jpg",
+            "release_date": "2001-01-01",
+            "runtime": 90 + id % 60,
+            "genres": [{"id": 18, "name": "Drama"}, {"id": 35, "name": "Comedy"}],
+        }
+
+
+    def series(self, id: int) -> dict:
+        return {
+            **self._extras(id, f"Series {id}"),
+            "original_name": f"Series {id}",
+            "created_by": [self._person(id, 1, "Creator")],
+            "episode_run_time": [45],
+            "in_production": False,
+            "languages": ["en"],
+            "networks": [self._company(id, "Network")],
+            "origin_country": ["US"],
+            "type": "Scripted",
+            "id": id,
+            "name": f"Series {id}",
+            "overview": f"Overview of series {id}",
+            "poster_path": f"/series{id}.jpg",
+            "number_of_seasons": self.seasons,
+            "number_of_episodes": self.seasons * self.episodes,
+            "first_air_date": "2001-01-01",
+            "last_air_date": "2005-01-01",
+            "genres": [{"id": 18, "name": "Drama"}, {"id": 10765, "name": "Sci-Fi & Fantasy"}],
+            "seasons": [
+                {
+                    "id": id * 1000 + number,
+                    "name": f"Season {number}",
+                    "overview": f"Season {number} of series {id}",
+                    "poster_path": f"/season{id}_{number}.jpg",
+                    "air_date": f"{2000 + number}-01-01",
+                    "season_number": number,
+                    "episode_count": self.episodes,
+                    "vote_average": 7.5,
+                }
+                for number in range(1, self.seasons + 1)
+            ],
+        }
+
+
+    def season(self, id: int, number: int) -> dict:
+        return {
+            "_id": f"{id:012x}{number:012x}",
+            "id": id * 1000 + number,
+            "vote_average": 7.5,
+            "name": f"Season {number}",
+            "overview": f"Season {number} of series {id}",
+            "poster_path": f"/season{id}_{number}.jpg",
+            "season_number": number,
+            "air_date": f"{2000 + number}-01-01",
+            "episodes": [
+                self.episode(id, number, episode)
+                for episode in range(1, self.episodes + 1)
+            ],
+        }
+
+
+    @staticmethod
+    def episode(id: int, number: int, episode: int) -> dict:
+        return {
+            "id": (id * 1000 + number) * 1000 + episode,
+            "name": f"Episode {episode}",
+            "overview": f"Episode {episode} of season {number}",
+            "still_path": f"/still{id}_{number}_{episode}.jpg",
+            "episode_number": episode,
+            "season_number": number,
+            "air_date": f"{2000 + number}-01-{episode % 28 + 1:02d}",
+            "runtime": 45,
+            "episode_type": "standard",
+            "production_code": "",
+            "show_id": id,
+            "vote_average": 7.5,
+            "vote_count": 100,
+            "guest_stars": [
+                FakeTMDB._person(episode, credit, "Acting") for credit in range(1, 4)
+            ],
+            "crew": [
+                FakeTMDB._person(episode, credit, "Directing") for credit in range(4, 6)
+            ],
+        }
+
+
+    @staticmethod
+    def _extras(id: int, name: str) -> dict:
+        return {
+            "adult": False,
+            "backdrop_path": f"/backdrop{id}.jpg",
+            "homepage": f"https://example.com/{id}",
+            "original_language": "en",
+            "popularity": 12.5,
+            "production_companies": [
+                FakeTMDB._company(id, "Studio"),
+                FakeTMDB._company(id + 1, "Studio"),
+            ],
+            "production_countries": [{"iso_3166_1": "US", "name": "United States of America"}],
+            "spoken_languages": [{"english_name": "English", "iso_639_1": "en", "name": "English"}],
+            "status": "Ended",
+            "tagline": f"The tagline of {name}",
+            "vote_average": 7.5,
+            "vote_count": 1000,
+        }
+
+
+    @staticmethod
+    def _company(id: int, kind: str) -> dict:
+        return {
+            "id": id,
+            "logo_path": f"/logo{id}.png",
+            "name": f"{kind} {id}",
+            "origin_country": "US",
+        }
+
+
+    @staticmethod
+    def _person(id: int, credit: int, department: str) -> dict:
+        return {
+            "adult": False,
+            "credit_id": f"{id:012x}{credit:012x}",
+            "department": department,
+            "gender": credit % 3,
+            "id": id * 10 + credit,
+            "known_for_department": department,
+            "name": f"Person {id * 10 + credit}",
+            "original_name": f"Person {id * 10 + credit}",
+            "popularity": 3.2,
+            "profile_path": f"/person{id * 10 + credit}.jpg",
+        }
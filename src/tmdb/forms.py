@@ -19,4 +19,10 @@ class FetchForm(forms.Form):
 
 class UploadForm(forms.Form):
     type = forms.ChoiceField(choices=TYPE, initial="series")
-    file = forms.FileField()
\ No newline at end of file
+    file = forms.FileField(
+        help_text="One object, a JSON array or JSONL"
+    )
+    series = forms.IntegerField(
+        required=False,
+        help_text="TMDB id of the series, only for \"TV Season\" uploads"
+    )
\ No newline at end of file
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import tempfile
+
+import requests
+
+from . import storage
+from .derivatives import make_derivatives
+
+
+# Content-addressed artwork lives under STORE_DIR in the artwork storage
+STORE_DIR = "tmdb/store"
+# Images are streamed to disk this many bytes at a time
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+
+def store_path(sha256: str, ext: str) -> str:
+    """
+    Static path for stored content, sharded on the first two hash bytes, e.g.
+    tmdb/store/ab/cd/abcd...ef.jpg
+
+    Two levels of 256 directories keep every directory small even with
+    millions of images.
+    """
+
+    return f"{STORE_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext.lower()}"
+
+
+def store_response(response: requests.Response,
+                   ext: str,
+                   sizes: dict[str, tuple] | None = None
+                 ) -> dict | None:
+    """
+    Streams an image response into the store.
+
+    The body is written in IMAGE_CHUNK_SIZE chunks to a temp file, checked
+    against Content-Length, and saved under its hash-derived path. If the
+    store already holds identical bytes the temp file is simply dropped.
+    Nothing is ever left half-written at a store path.
+
+    Parameters
+    ----------
+    response : requests.Response
+        a 200 response, ideally fetched with stream=True
+    ext : str
+        file extension to store under, e.g. ".jpg"
+    sizes : dict[str, tuple] | None
+        derivatives to make from the download, see make_derivatives
+
+    Returns
+    -------
+    dict | None
+        sha256, size and static path of the stored file, None if it failed
+    """
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(
+        dir=storage.temp_dir(storage.artwork()),
+        suffix=".part"
+    )
+
+    try:
+        with os.fdopen(fd, "wb") as image:
+            for chunk in response.iter_content(chunk_size=IMAGE_CHUNK_SIZE):
+                image.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            image.flush()
+            os.fsync(image.fileno())
+
+        expected = response.headers.get("Content-Length")
+        # iter_content decodes gzip etc, so only compare identity bodies
+        if "Content-Encoding" not in response.headers \
+        and expected is not None and int(expected) != size:
+            raise IOError(f"expected {expected} bytes, got {size}")
+        if size == 0:
+            raise IOError("empty body")
+
+        return _commit(temp_path, digest.hexdigest(), size, ext, sizes)
+
+    except (IOError, requests.exceptions.RequestException) as e:
+        print(f"\nStore Image failed for {response.url}:\n{e}\n")
+        return None
+
+    finally:
+        response.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def store_file(img_path: str, sizes: dict[str, tuple] | None = None) -> dict:
+    """
+    Copies artwork that is already in the artwork storage, e.g. at a legacy
+    path, into the store.
+
+    Returns the same dict as store_response.
+    """
+
+    artwork = storage.artwork()
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=storage.temp_dir(artwork), suffix=".part")
+
+    try:
+        with os.fdopen(fd, "wb") as image, artwork.open(img_path) as original:
+            for chunk in original.chunks(IMAGE_CHUNK_SIZE):
+                image.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+
+        return _commit(
+            temp_path,
+            digest.hexdigest(),
+            size,
+            os.path.splitext(img_path)[1],
+            sizes
+        )
+
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _commit(temp_path: str,
+            sha256: str,
+            size: int,
+            ext: str,
+            sizes: dict[str, tuple] | None
+          ) -> dict:
+    static_path = store_path(sha256, ext)
+    artwork = storage.artwork()
+
+    # Derivatives go first, so stored artwork always has them
+    if sizes:
+        make_derivatives(static_path, sizes, source=temp_path)
+    # Identical artwork is only ever stored once
+    if not artwork.exists(static_path):
+        storage.save_file(artwork, static_path, temp_path)
+
+    return {"sha256": sha256, "size": size, "path": static_path}
@@ -0,0 +1,225 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from djangoflix.models import TVEpisode
+from tmdb import client as tmdb_client
+from tmdb import metrics, storage
+from tmdb.cache import get_cache
+from tmdb.client import RATE_LIMIT, TMDBClient
+from tmdb.fake_server import FakeTMDB
+from tmdb.models import MAX_WORKERS, Genre, TMDBTVSeries
+from tmdb.transactions import COMMIT_BATCH_SIZE
+
+
+# mode -> (max_workers, bundled), None means --workers
+MODES = {
+    "serial": (1, False),
+    "concurrent": (None, False),
+    "bundled": (None, True),
+}
+# Far above any real TMDB id, so the fake titles never meet real ones
+FIRST_ID = 900_000_000
+
+
+class Command(BaseCommand):
+    help = "Benchmarks fetch_one_series_by_tmdb_id against a local fake TMDB."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, default=5, help="Series per mode")
+        parser.add_argument("--seasons", type=int, default=5, help="Seasons per series")
+        parser.add_argument("--episodes", type=int, default=10, help="Episodes per season")
+        parser.add_argument(
+            "--modes",
+            default=",".join(MODES),
+            help=f"Comma separated, any of {', '.join(MODES)}",
+        )
+        parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+        parser.add_argument(
+            "--commit-batch",
+            default=str(COMMIT_BATCH_SIZE),
+            help="Seasons per commit, comma separated to compare several "
+                 "(0 commits every write on its own, as before batching)",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.02,
+            help="Seconds the fake server adds to every response",
+        )
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument("--throttle-rate", type=float, default=0.0)
+        parser.add_argument(
+            "--no-throttle",
+            action="store_true",
+            help="Turn the client's rate limiter off",
+        )
+        parser.add_argument(
+            "--output",
+            help="Append each result as a JSON line to this file",
+        )
+
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options["modes"].split(",") if mode.strip()]
+        commit_batches = [
+            int(size) for size in options["commit_batch"].split(",") if size.strip()
+        ]
+        fake = FakeTMDB(
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            throttle_rate=options["throttle_rate"],
+            seasons=options["seasons"],
+            episodes=options["episodes"],
+        ).start()
+        base_url, img_base_url = fake.urls()
+
+        previous_client = tmdb_client._client
+        tmdb_client._client = TMDBClient(
+            base_url=base_url,
+            img_base_url=img_base_url,
+            rate_limit=0 if options["no_throttle"] else RATE_LIMIT
+        )
+        cache = get_cache()
+        cache_enabled = cache.enabled
+        # Every run should pay for its requests
+        cache.enabled = False
+
+        try:
+            for mode in modes:
+                for commit_batch in commit_batches:
+                    with self._scratch_storages():
+                        result = self._run(mode, commit_batch, fake, options)
+                    self._report(result)
+                    if options["output"]:
+                        with open(options["output"], "a") as file:
+                            file.write(json.dumps(result) + "\n")
+        finally:
+            cache.enabled = cache_enabled
+            tmdb_client._client = previous_client
+            fake.stop()
+
+
+    @staticmethod
+    @contextmanager
+    def _scratch_storages() -> Iterator[None]:
+        # Keeps the JSON dumps and images out of the real storages. Every
+        # run gets empty ones, or it would find the images and dumps of the
+        # runs before it and skip writing them
+        with tempfile.TemporaryDirectory(prefix="tmdb-benchmark-") as workdir, \
+             override_settings(STORAGES={
+                 **settings.STORAGES,
+                 **{
+                     alias: {
+                         "BACKEND": "django.core.files.storage.FileSystemStorage",
+                         "OPTIONS": {
+                             "location": os.path.join(workdir, alias),
+                             "allow_overwrite": True,
+                         },
+                     }
+                     for alias in (storage.ARTWORK, storage.DUMPS)
+                 },
+             }):
+            yield
+
+
+    def _run(self, mode: str, commit_batch: int, fake: FakeTMDB, options: dict) -> dict:
+        max_workers, bundled = MODES[mode]
+        max_workers = max_workers or options["workers"]
+        ids = range(FIRST_ID, FIRST_ID + options["series"])
+        expected_episodes = options["series"] * options["seasons"] * options["episodes"]
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        fake.hits.clear()
+        # Genres created by an earlier, rolled back run must not be reused
+        Genre.invalidate_registry()
+
+        # Rolled back at the end, so every mode starts from the same state
+        # and the benchmark leaves nothing behind. Commits are still counted
+        # as if it weren't there, see metrics.RunMetrics
+        with transaction.atomic():
+            # Pool threads only do network/disk work, every query runs here
+            with connection.execute_wrapper(count_query), \
+                 metrics.collect() as run_metrics:
+                started = time.monotonic()
+                for id in ids:
+                    TMDBTVSeries.fetch_one_series_by_tmdb_id(
+                        id,
+                        max_workers=max_workers,
+                        bundled=bundled,
+                        commit_batch=commit_batch
+                    )
+                elapsed = time.monotonic() - started
+            episodes = TVEpisode.objects.filter(
+                season__series__tmdb_id__in=ids
+            ).count()
+            transaction.set_rollback(True)
+        Genre.invalidate_registry()
+
+        hits = dict(fake.hits)
+        report = run_metrics.report()
+        return {
+            "mode": mode,
+            "series": options["series"],
+            "seasons": options["seasons"],
+            "episodes": options["episodes"],
+            "workers": max_workers,
+            "commit_batch": commit_batch,
+            "latency": options["latency"],
+            "seconds": round(elapsed, 3),
+            "series_per_sec": round(options["series"] / elapsed, 2),
+            "episodes_per_sec": round(episodes / elapsed, 1),
+            "api_requests": sum(
+                count for name, count in hits.items() if not name == "image"
+            ),
+            "image_requests": hits.get("image", 0),
+            "injected_errors": hits.get("500", 0) + hits.get("429", 0),
+            "queries": queries,
+            "queries_per_episode": round(queries / episodes, 2) if episodes else None,
+            "episodes_written": episodes,
+            "commits": report["counters"].get("commits", 0),
+            "commits_per_series": round(
+                report["counters"].get("commits", 0) / options["series"], 1
+            ),
+            "complete": episodes == expected_episodes,
+            "api_bytes": report["counters"].get("api_bytes", 0),
+            "dump_bytes": report["counters"].get("dump_bytes", 0),
+            # Seconds are summed over the pool threads
+            "stages": report["stages"],
+        }
+
+
+    def _report(self, result: dict) -> None:
+        style = self.style.SUCCESS if result["complete"] else self.style.WARNING
+        self.stdout.write(style(
+            "{mode:>10}: {seconds:7.2f}s  {series_per_sec:6.2f} series/s  "
+            "{episodes_per_sec:7.1f} episodes/s  {api_requests:4} API + "
+            "{image_requests:4} image requests ({injected_errors} injected errors)  "
+            "{queries:5} queries ({queries_per_episode} per episode)  "
+            "{commits:4} commits ({commits_per_series} per series, "
+            "{commit_batch} seasons per commit)  "
+            "{episodes_written} episodes written".format(**result)
+        ))
+        self.stdout.write("{:>10}  {}  {:.1f} KiB downloaded, {:.1f} KiB dumped".format(
+            "",
+            "  ".join(
+                f"{name} {stage['seconds']:.3f}s/{stage['queries']}q"
+                for name, stage in result["stages"].items()
+            ),
+            result["api_bytes"] / 1024,
+            result["dump_bytes"] / 1024
+        ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from tmdb.cache import get_cache
+
+
+class Command(BaseCommand):
+    help = "Shows (with its hit rate) or clears the on-disk TMDB response cache."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every cached response",
+        )
+
+
+    def handle(self, *args, **options):
+        cache = get_cache()
+
+        if options["clear"]:
+            removed = cache.clear()
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} cached responses"))
+            return
+
+        entries, size = cache.entries()
+        state = "on" if cache.enabled else "off"
+        self.stdout.write(
+            f"TMDB cache is {state}: {entries} responses, "
+            f"{size / 1024 / 1024:.1f} MB in {cache.directory}"
+        )
+
+        stats = cache.saved_stats()
+        self.stdout.write(
+            "{0} hits, {1} revalidated, {2} misses, {3} stale, "
+            "{4} errors ({5:.0%} hit rate)".format(
+                stats.get("hits", 0),
+                stats.get("revalidated", 0),
+                stats.get("misses", 0),
+                stats.get("stale", 0),
+                stats.get("errors", 0),
+                stats["hit_rate"]
+            )
+        )
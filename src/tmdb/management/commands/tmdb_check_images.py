@@ -0,0 +1,347 @@
+import hashlib
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tmdb import derivatives as derivative_images, images, storage
+from tmdb.derivatives import derivative_path, make_derivatives
+from tmdb.management.commands.tmdb_derivatives import CATALOG, IMAGE_DIRS
+from tmdb.models import ImageObject, IngestJob
+
+
+# Artwork directories of the artwork storage, everything else in it is left alone
+SCAN_DIRS = (images.STORE_DIR, *IMAGE_DIRS)
+# Rows per queued artwork job
+JOB_SIZE = 500
+
+
+def check_image(name: str, head: bytes, tail: bytes, size: int) -> str | None:
+    """
+    What is wrong with an image, judging by its first and last bytes and
+    its size, None if nothing is.
+
+    Catches files that were cut short or aren't the image their name says.
+    """
+
+    if size == 0:
+        return "empty"
+
+    ext = posixpath.splitext(name)[1].lower()
+    if ext in (".jpg", ".jpeg"):
+        if not head.startswith(b"\xff\xd8\xff"):
+            return "not a JPEG"
+        if b"\xff\xd9" not in tail:
+            return "JPEG is cut short"
+    elif ext == ".png":
+        if not head.startswith(b"\x89PNG\r\n\x1a\n"):
+            return "not a PNG"
+        if not tail.endswith(b"IEND\xaeB`\x82"):
+            return "PNG is cut short"
+    elif ext == ".webp":
+        if not (head[:4] == b"RIFF" and head[8:12] == b"WEBP"):
+            return "not a WebP"
+        # The RIFF header has the size of the rest of the file
+        if not int.from_bytes(head[4:8], "little") + 8 == size:
+            return "WebP is cut short"
+    elif ext == ".gif":
+        if not head.startswith(b"GIF8"):
+            return "not a GIF"
+        if not tail.endswith(b";"):
+            return "GIF is cut short"
+
+    return None
+
+
+class Command(BaseCommand):
+    help = "Cross-checks the catalog's artwork against the artwork storage: missing, broken and orphaned files."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=16,
+            help="Concurrent listings and file checks",
+        )
+        parser.add_argument(
+            "--deep",
+            action="store_true",
+            help="Also hash every stored original against the hash in its name",
+        )
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Delete broken files and queue artwork jobs to fetch them and the missing ones again",
+        )
+        parser.add_argument(
+            "--delete-orphans",
+            action="store_true",
+            help="Delete files no catalog row uses",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=float,
+            default=3600,
+            help="Seconds a file must be old to count as an orphan, so ingests in flight are left alone",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=20,
+            help="Examples listed per problem",
+        )
+
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        self.options = options
+        started = time.monotonic()
+        artwork = storage.artwork()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            files = {}
+            for listing in pool.map(
+                lambda directory: storage.list_files(artwork, directory, options["workers"]),
+                SCAN_DIRS
+            ):
+                files.update(
+                    (name, stat) for name, stat in listing.items()
+                    if not posixpath.basename(name).startswith(".")
+                )
+            self.stdout.write(f"Listed {len(files)} files in {time.monotonic() - started:.1f}s")
+
+            originals, derivatives = self._referenced()
+            missing = sorted(name for name in originals if name not in files)
+            # Only those of originals that are there can be made
+            missing_derivatives = [
+                name for name, (img_path, _) in derivatives.items()
+                if name not in files and img_path in files
+            ]
+            orphans = self._orphans(files, originals, derivatives)
+            broken = self._broken(
+                [name for name in originals if name in files]
+                + [name for name in derivatives if name in files],
+                files,
+                originals,
+                pool
+            )
+
+            self._show("Missing", missing)
+            self._show("Broken", [f"{name}: {problem}" for name, problem in broken.items()])
+            self._show("Orphaned", orphans)
+            self._show("Missing derivatives", missing_derivatives)
+
+            if options["repair"]:
+                self._repair(missing, broken, missing_derivatives, originals, derivatives, files, pool)
+            if options["delete_orphans"]:
+                self._delete(orphans, pool)
+                for start in range(0, len(orphans), JOB_SIZE):
+                    # Stored artwork that is gone can't be linked to anymore
+                    ImageObject.objects.filter(
+                        path__in=orphans[start:start + JOB_SIZE]
+                    ).delete()
+                self.stdout.write(f"Deleted {len(orphans)} orphaned files")
+
+        style = self.style.WARNING if missing or broken or orphans else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Checked {len(originals)} originals and {len(derivatives)} derivatives "
+            f"against {len(files)} files in {time.monotonic() - started:.1f}s: "
+            f"{len(missing)} missing, {len(broken)} broken, {len(orphans)} orphaned"
+        ))
+
+
+    @staticmethod
+    def _referenced() -> tuple[dict[str, dict], dict[str, tuple[str, str]]]:
+        """
+        Every original the catalog uses, with the sizes of its derivatives,
+        and every derivative that should exist for them.
+
+        Returns
+        -------
+        tuple[dict[str, dict], dict[str, tuple[str, str]]]
+            original -> its sizes, and derivative -> (original, size)
+        """
+
+        originals = {}
+        for model, sizes in CATALOG:
+            paths = model.objects.values_list("img_path", flat=True).iterator(chunk_size=5000)
+            for img_path in paths:
+                # Placeholders for titles without artwork aren't files
+                if img_path.startswith(SCAN_DIRS) and not img_path.endswith("/missing.png"):
+                    # Identical artwork is stored once, whatever its kind
+                    originals.setdefault(img_path, {}).update(sizes)
+
+        derivatives = {
+            derivative_path(img_path, size): (img_path, size)
+            for img_path, sizes in originals.items()
+            for size in sizes
+        }
+
+        return originals, derivatives
+
+
+    def _orphans(self,
+                 files: dict[str, tuple[int, float]],
+                 originals: dict[str, dict],
+                 derivatives: dict[str, tuple[str, str]]
+               ) -> list[str]:
+        cutoff = time.time() - self.options["min_age"]
+
+        return sorted(
+            name for name, (_, modified) in files.items()
+            if name not in originals and name not in derivatives and modified < cutoff
+        )
+
+
+    def _broken(self,
+                names: list[str],
+                files: dict[str, tuple[int, float]],
+                originals: dict[str, dict],
+                pool: ThreadPoolExecutor
+              ) -> dict[str, str]:
+        # The size each stored original was recorded with when it was stored
+        recorded = dict(ImageObject.objects.values_list("path", "size").iterator(chunk_size=5000))
+
+        def check(name: str) -> str | None:
+            size = files[name][0]
+            if name in recorded and not recorded[name] == size:
+                return f"{size} bytes instead of {recorded[name]}"
+            try:
+                problem = check_image(name, *storage.read_ends(storage.artwork(), name), size)
+                if problem or not self.options["deep"] \
+                or not (name in originals and name.startswith(images.STORE_DIR + "/")):
+                    return problem
+                return self._check_hash(name)
+            except FileNotFoundError:
+                # Deleted since it was listed
+                return None
+
+        return {
+            name: problem
+            for name, problem in zip(names, pool.map(check, names))
+            if problem
+        }
+
+
+    @staticmethod
+    def _check_hash(name: str) -> str | None:
+        # Stored originals are named by the sha256 of their bytes
+        digest = hashlib.sha256()
+        with storage.artwork().open(name, "rb") as file:
+            for chunk in file.chunks(images.IMAGE_CHUNK_SIZE):
+                digest.update(chunk)
+
+        expected = posixpath.splitext(posixpath.basename(name))[0]
+        return None if digest.hexdigest() == expected else "content doesn't match its hash"
+
+
+    def _repair(self,
+                missing: list[str],
+                broken: dict[str, str],
+                missing_derivatives: list[str],
+                originals: dict[str, dict],
+                derivatives: dict[str, tuple[str, str]],
+                files: dict[str, tuple[int, float]],
+                pool: ThreadPoolExecutor
+              ) -> None:
+        # A broken original is fetched again, which makes its derivatives
+        # too. Other broken or missing derivatives are made from theirs.
+        broken_originals = {name for name in broken if name in originals}
+        doomed = set(broken)
+        for name in broken_originals:
+            doomed.update(
+                derivative_path(name, size) for size in originals[name]
+                if derivative_path(name, size) in files
+            )
+        self._delete(sorted(doomed), pool)
+        self.stdout.write(f"Deleted {len(doomed)} broken files")
+
+        queued, unknown = self._queue_refetch(set(missing) | broken_originals)
+        self.stdout.write(f"Queued {queued} artwork jobs, run tmdb_worker to fetch them")
+        if unknown:
+            self.stderr.write(f"{unknown} rows have no TMDB row to fetch their artwork with")
+
+        # original -> the sizes it needs made
+        remake: dict[str, dict] = {}
+        for name in [*missing_derivatives, *(name for name in broken if name in derivatives)]:
+            img_path, size = derivatives[name]
+            if img_path not in broken_originals:
+                remake.setdefault(img_path, {})[size] = originals[img_path][size]
+        if not remake:
+            return
+        if derivative_images.Image is None:
+            self.stderr.write(f"Pillow is required to make {len(remake)} images' derivatives")
+            return
+
+        written = sum(pool.map(lambda item: make_derivatives(*item), remake.items()))
+        self.stdout.write(f"Made {written} derivatives")
+
+
+    @staticmethod
+    def _queue_refetch(img_paths: set[str]) -> tuple[int, int]:
+        """
+        Queues artwork jobs for every row whose artwork is one of img_paths.
+
+        Rows already waiting in a queued or running job aren't queued again.
+
+        Returns
+        -------
+        tuple[int, int]
+            jobs queued, and rows that can't be fetched as they aren't
+            from TMDB
+        """
+
+        waiting = {
+            (job.params["type"], id)
+            for job in IngestJob.objects.filter(
+                kind="artwork",
+                status__in=("queued", "running")
+            )
+            for id in job.params["ids"]
+        }
+        paths = sorted(img_paths)
+        chunks = [paths[i:i + JOB_SIZE] for i in range(0, len(paths), JOB_SIZE)]
+
+        queued = 0
+        fetchable = 0
+        for type, model in IngestJob.ARTWORK_MODELS.items():
+            ids = [
+                id for chunk in chunks
+                for id in model.objects.filter(
+                    content__img_path__in=chunk
+                ).values_list("tmdb_id", flat=True)
+            ]
+            fetchable += len(ids)
+            ids = [id for id in ids if (type, id) not in waiting]
+            for start in range(0, len(ids), JOB_SIZE):
+                IngestJob.enqueue("artwork", type=type, ids=ids[start:start + JOB_SIZE])
+                queued += 1
+
+        rows = sum(
+            model.objects.filter(img_path__in=chunk).count()
+            for model, _ in CATALOG
+            for chunk in chunks
+        )
+
+        return (queued, rows - fetchable)
+
+
+    @staticmethod
+    def _delete(names: list[str], pool: ThreadPoolExecutor) -> None:
+        artwork = storage.artwork()
+        list(pool.map(artwork.delete, names))
+
+
+    def _show(self, problem: str, names: list[str]) -> None:
+        if not names:
+            return
+
+        self.stdout.write(f"{problem}: {len(names)}")
+        for name in names[:self.options["show"]]:
+            self.stdout.write(f"  {name}")
+        if len(names) > self.options["show"]:
+            self.stdout.write(f"  ... and {len(names) - self.options['show']} more")
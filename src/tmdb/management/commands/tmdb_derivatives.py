@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from djangoflix.models import TVEpisode, TVSeason, WatchableContent
+from tmdb import derivatives, images, storage
+from tmdb.derivatives import POSTER_SIZES, STILL_SIZES, make_derivatives
+
+
+# Legacy original image directories in the artwork storage and the sizes
+# each one needs
+IMAGE_DIRS = {
+    "tmdb/movie": POSTER_SIZES,
+    "tmdb/tv/series": POSTER_SIZES,
+    "tmdb/tv/season": POSTER_SIZES,
+    "tmdb/tv/episode": STILL_SIZES,
+}
+# Catalog tables and the derivative sizes of their artwork
+CATALOG = (
+    (WatchableContent, POSTER_SIZES),
+    (TVSeason, POSTER_SIZES),
+    (TVEpisode, STILL_SIZES),
+)
+
+
+def list_images(directory: str) -> list[str]:
+    """
+    Names of the originals in an IMAGE_DIRS directory of the artwork storage.
+    """
+
+    try:
+        _, files = storage.artwork().listdir(directory)
+    except FileNotFoundError:
+        return []
+
+    # Derivatives are in subdirectories, skip temp files
+    return [
+        f"{directory}/{filename}" for filename in files
+        if not filename.startswith(".")
+    ]
+
+
+def list_store_images() -> dict[str, dict]:
+    """
+    Originals in the content-addressed store that the catalog uses, with
+    the sizes they need.
+
+    Stored artwork is shared by every kind of title, so unlike IMAGE_DIRS
+    its sizes come from the rows using it. The store's shard directories
+    are walked with storage.list_files.
+    """
+
+    files = storage.list_files(storage.artwork(), images.STORE_DIR)
+    originals = {}
+    for model, sizes in CATALOG:
+        img_paths = model.objects.filter(
+            img_path__startswith=images.STORE_DIR + "/"
+        ).values_list("img_path", flat=True).distinct()
+        for img_path in img_paths.iterator(chunk_size=5000):
+            if img_path in files:
+                originals.setdefault(img_path, {}).update(sizes)
+
+    return originals
+
+
+class Command(BaseCommand):
+    help = "Generates missing WebP derivatives for already downloaded TMDB images."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of images to process at once",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate derivatives that already exist",
+        )
+
+
+    def handle(self, *args, **options):
+        if derivatives.Image is None:
+            raise CommandError("Pillow is required: pip install pillow")
+
+        jobs = [
+            (img_path, sizes)
+            for directory, sizes in IMAGE_DIRS.items()
+            for img_path in list_images(directory)
+        ]
+        jobs.extend(list_store_images().items())
+
+        self.stdout.write(f"Checking {len(jobs)} images")
+        written = 0
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            results = pool.map(
+                lambda job: make_derivatives(job[0], job[1], options["force"]),
+                jobs
+            )
+            for count, result in enumerate(results, start=1):
+                written += result
+                if count % 500 == 0:
+                    self.stdout.write(f"{count}/{len(jobs)} images checked")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} derivatives for {len(jobs)} images"
+        ))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tmdb.fake_server import FakeTMDB
+
+
+class Command(BaseCommand):
+    help = "Runs a local stand-in for the TMDB API and image CDN."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="Seconds added to every response",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Share of requests answered with a 500 (0-1)",
+        )
+        parser.add_argument(
+            "--throttle-rate",
+            type=float,
+            default=0.0,
+            help="Share of requests answered with a 429 (0-1)",
+        )
+        parser.add_argument("--seasons", type=int, default=3, help="Seasons per series")
+        parser.add_argument("--episodes", type=int, default=8, help="Episodes per season")
+        parser.add_argument(
+            "--fixtures",
+            help="Directory of recorded payloads, e.g. <dir>/tv/1399.json",
+        )
+
+
+    def handle(self, *args, **options):
+        fake = FakeTMDB(
+            latency=options["latency"],
+            error_rate=options["error_rate"],
+            throttle_rate=options["throttle_rate"],
+            seasons=options["seasons"],
+            episodes=options["episodes"],
+            fixtures_dir=options["fixtures"],
+        ).start(options["host"], options["port"])
+        base_url, img_base_url = fake.urls()
+
+        self.stdout.write("Fake TMDB is running, point the app at it with:")
+        self.stdout.write(f"  TMDB_BASE_URL={base_url}")
+        self.stdout.write(f"  TMDB_IMG_BASE_URL={img_base_url}")
+
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            fake.stop()
+            self.stdout.write(f"Stopped after {dict(fake.hits)}")
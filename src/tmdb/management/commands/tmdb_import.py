@@ -0,0 +1,340 @@
+import json
+import os
+import tempfile
+import time
+import zipfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tmdb import archives
+from tmdb.models import MAX_WORKERS, TMDBMovie, TMDBTVSeries
+from tmdb.payloads import InvalidPayload, Movie, Series, convert, decode
+
+
+MODELS = {"movie": TMDBMovie, "series": TMDBTVSeries}
+SHAPES = {"movie": Movie, "series": Series}
+
+
+def _parse_chunk(chunk: list[tuple[str, bytes | None]]) -> list[tuple[str, str, dict | str]]:
+    """
+    Runs in a worker process: decodes and classifies a chunk of records.
+
+    Each record is (source, text), where text is a JSONL line or, for a
+    directory, None to read the file at source. A series archive (see
+    tmdb.archives) stands for its series dump. Payloads are validated
+    against their tmdb.payloads shape, which also keeps pickling cheap.
+
+    Returns (source, kind, payload) per decoded object, where kind is
+    "movie", "series", "skipped" or "failed" (payload is then the reason).
+    """
+
+    parsed = []
+    for source, text in chunk:
+        try:
+            if text is None and source.endswith(".zip"):
+                text = archives.read_series_dump(source)
+                if text is None:
+                    parsed.append((source, "skipped", "archive without a series"))
+                    continue
+            elif text is None:
+                with open(source, "rb") as file:
+                    text = file.read()
+            elif not text.strip():
+                continue
+            data = decode(text)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            parsed.append((source, "failed", str(e)))
+            continue
+
+        for payload in data if isinstance(data, list) else [data]:
+            if not isinstance(payload, dict):
+                parsed.append((source, "failed", "not an object"))
+            elif "title" in payload:
+                parsed.append(_pick(source, "movie", payload))
+            elif "first_air_date" in payload:
+                parsed.append(_pick(source, "series", payload))
+            else:
+                # Season/episode dumps and anything else
+                parsed.append((source, "skipped", "not a movie or series"))
+
+    return parsed
+
+
+def _pick(source: str, kind: str, payload: dict) -> tuple:
+    try:
+        payload = convert(payload, SHAPES[kind])
+    except InvalidPayload as e:
+        return (source, "failed", str(e))
+    # Seasons aren't imported, so they aren't sent back either
+    payload.pop("seasons", None)
+
+    return (source, kind, payload)
+
+
+class Command(BaseCommand):
+    help = "Bulk imports TMDB movie/series JSON from a directory or a JSONL file."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="Directory of .json files and series archives (searched recursively) or a .jsonl file",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes that decode JSON",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Titles written per transaction",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=200,
+            help="Records sent to a decoding process at a time",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Resume file (default: <path>.checkpoint)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and import from the start",
+        )
+        parser.add_argument(
+            "--no-images",
+            action="store_true",
+            help="Don't download posters, ones already stored are still used",
+        )
+
+
+    def handle(self, *args, **options):
+        path = options["path"].rstrip(os.sep)
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist")
+
+        checkpoint = options["checkpoint"] or f"{path}.checkpoint"
+        resume = None if options["restart"] else self._read_checkpoint(checkpoint, path)
+        if resume:
+            at = resume["file"] if resume["line"] is None else f"line {resume['line']}"
+            self.stdout.write(f"Resuming after {at}")
+
+        self.counts = {"movie": 0, "series": 0, "skipped": 0, "failed": 0}
+        # inserted/updated/unchanged titles, see ContentData._bulk_write
+        self.changes = Counter()
+        self.queries = 0
+        self.pending = {"movie": {}, "series": {}}
+        self.pending_records = 0
+        self.records = 0
+        # Where the last written record ends, see _records
+        self.pending_position = self.position = resume
+        self.checkpoint = checkpoint
+        self.path = path
+        self.options = options
+
+        self.image_pool = None if options["no_images"] else ThreadPoolExecutor(MAX_WORKERS)
+        self.started = time.monotonic()
+        workers = max(1, options["processes"])
+
+        with connection.execute_wrapper(self._count_query), \
+             ProcessPoolExecutor(max_workers=workers) as processes:
+            for records, position, parsed in self._decode(
+                self._records(path, resume),
+                processes,
+                options["chunk_size"],
+                workers * 2
+            ):
+                for source, kind, payload in parsed:
+                    if kind in self.pending:
+                        # Later payloads for the same title win
+                        self.pending[kind][payload["id"]] = payload
+                    else:
+                        self.counts[kind] += 1
+                        if kind == "failed":
+                            self.stderr.write(f"{source}: {payload}")
+                self.pending_records += records
+                self.pending_position = position
+                if sum(map(len, self.pending.values())) >= options["batch_size"]:
+                    self._flush()
+
+            self._flush()
+
+        if self.image_pool:
+            self.image_pool.shutdown()
+
+        elapsed = time.monotonic() - self.started
+        titles = self.counts["movie"] + self.counts["series"]
+        self.stdout.write(self.style.SUCCESS(
+            "Imported {0} movies and {1} series in {2:.1f}s "
+            "({3:.0f} titles/sec, {4:.2f} queries/title), "
+            "{5} skipped, {6} failed. {7} inserted, {8} updated, "
+            "{9} unchanged".format(
+                self.counts["movie"],
+                self.counts["series"],
+                elapsed,
+                titles / elapsed if elapsed else 0,
+                self.queries / titles if titles else 0,
+                self.counts["skipped"],
+                self.counts["failed"],
+                self.changes["inserted"],
+                self.changes["updated"],
+                self.changes["unchanged"],
+            )
+        ))
+
+
+    @staticmethod
+    def _records(path: str, resume: dict | None) -> Iterator[tuple[str, bytes | None, dict]]:
+        """
+        Lazily yields (source, text, position) for every record after resume.
+
+        A position is where its record ends: the file, relative to a
+        directory, with the byte offset and line number in a JSONL file.
+        Files added to a directory between runs don't shift it, and a JSONL
+        file is resumed with a seek rather than by reading it again.
+        """
+
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.relpath(os.path.join(root, filename), path)
+                for root, _, filenames in os.walk(path)
+                for filename in filenames
+                if filename.endswith((".json", ".zip"))
+            )
+            # Files are read by the decoding processes
+            yield from (
+                (os.path.join(path, file), None, {"file": file, "offset": None, "line": None})
+                for file in files
+                if resume is None or file > resume["file"]
+            )
+            return
+
+        name = os.path.basename(path)
+        offset, number = (resume["offset"], resume["line"]) if resume else (0, 0)
+        with open(path, "rb") as file:
+            file.seek(offset)
+            for line in file:
+                offset += len(line)
+                number += 1
+                yield (
+                    f"{path}:{number}",
+                    line,
+                    {"file": name, "offset": offset, "line": number}
+                )
+
+
+    @staticmethod
+    def _decode(records: Iterator[tuple[str, bytes | None, dict]],
+                processes: ProcessPoolExecutor,
+                chunk_size: int,
+                limit: int
+              ) -> Iterator[tuple[int, dict, list]]:
+        """
+        Decodes records on processes, yielding (record count, position of
+        the last record, parsed) in order.
+
+        Only limit chunks are in flight at once, so memory stays flat
+        however large the input is.
+        """
+
+        in_flight = deque()
+
+        while True:
+            while len(in_flight) < limit:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                in_flight.append((
+                    len(chunk),
+                    chunk[-1][2],
+                    processes.submit(_parse_chunk, [record[:2] for record in chunk])
+                ))
+            if not in_flight:
+                return
+            count, position, future = in_flight.popleft()
+            yield (count, position, future.result())
+
+
+    def _flush(self) -> None:
+        for kind, payloads in self.pending.items():
+            if payloads:
+                self._write(kind, list(payloads.values()))
+            payloads.clear()
+
+        # Only records that are safely written count towards the checkpoint
+        self.records += self.pending_records
+        self.pending_records = 0
+        self.position = self.pending_position
+        if self.position:
+            self._write_checkpoint()
+
+        elapsed = time.monotonic() - self.started
+        titles = self.counts["movie"] + self.counts["series"]
+        self.stdout.write(
+            f"{self.records} records, {titles} titles "
+            f"({titles / elapsed if elapsed else 0:.0f}/sec)"
+        )
+
+
+    def _write(self, kind: str, payloads: list[dict]) -> None:
+        model = MODELS[kind]
+        download = not self.options["no_images"]
+
+        try:
+            pairs = model.bulk_add_from_json(payloads, self.image_pool, download)
+            self.counts[kind] += len(payloads)
+            self.changes.update(row.change for row, _ in pairs)
+            return
+        except Exception as e:
+            self.stderr.write(f"Batch of {len(payloads)} {kind} failed, retrying one by one: {e}")
+
+        # Find the bad payloads without losing the rest of the batch
+        for payload in payloads:
+            try:
+                [(row, _)] = model.bulk_add_from_json([payload], self.image_pool, download)
+                self.counts[kind] += 1
+                self.changes[row.change] += 1
+            except Exception as e:
+                self.counts["failed"] += 1
+                self.stderr.write(f"{kind} {payload['id']}: {e}")
+
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+    @staticmethod
+    def _read_checkpoint(checkpoint: str, path: str) -> dict | None:
+        try:
+            with open(checkpoint, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return None
+
+        if not data.get("path") == os.path.abspath(path):
+            raise CommandError(f"{checkpoint} belongs to {data.get('path')}, use --restart")
+        if "file" not in data:
+            # Written before positions were, as a record count
+            raise CommandError(f"{checkpoint} is from an older version, use --restart")
+
+        return {"file": data["file"], "offset": data["offset"], "line": data["line"]}
+
+
+    def _write_checkpoint(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.checkpoint))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump({"path": os.path.abspath(self.path), **self.position}, file)
+        os.replace(temp_path, self.checkpoint)
@@ -0,0 +1,161 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from tmdb import exports
+from tmdb.models import IngestRun, TMDBMovie, TMDBTVSeries
+
+
+MODELS = {"movie": TMDBMovie, "series": TMDBTVSeries}
+# Put on the queue once per worker when the export runs out
+STOP = None
+
+
+class Command(BaseCommand):
+    help = "Fetches every new title listed in a TMDB daily ID export (.json.gz)."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Daily ID export, gzipped or plain")
+        parser.add_argument(
+            "--kind",
+            choices=sorted(MODELS),
+            help="What the export lists (default: guessed from the file name)",
+        )
+        parser.add_argument(
+            "--min-popularity",
+            type=float,
+            default=0.0,
+            help="Skip titles less popular than this",
+        )
+        parser.add_argument(
+            "--include-adult",
+            action="store_true",
+            help="Also fetch titles flagged adult",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=int(os.getenv("TMDB_WORKER_CONCURRENCY", 4)),
+            help="Number of titles fetched at once",
+        )
+        parser.add_argument(
+            "--queue-size",
+            type=int,
+            default=100,
+            help="Most ids read ahead of the workers",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Stop after this many ids have been queued",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the ids that would be fetched",
+        )
+
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"{path} does not exist")
+
+        kind = options["kind"] or exports.export_kind(os.path.basename(path))
+        if not kind:
+            raise CommandError("Can't tell movies from series by the file name, pass --kind")
+
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        started = time.monotonic()
+
+        ids = (
+            entry["id"] for entry in exports.skip_existing(
+                exports.filter_entries(
+                    self._count("read", exports.iter_export(path)),
+                    options["min_popularity"],
+                    options["include_adult"]
+                ),
+                MODELS[kind],
+                # Series stopped halfway are fetched again to resume them
+                keep=IngestRun.unfinished_ids(kind) if kind == "series" else None
+            )
+        )
+
+        if options["dry_run"]:
+            new = sum(1 for _ in ids)
+            self.stdout.write(f"{self.counts['read']} ids read, {new} would be fetched")
+            return
+
+        # The reader blocks once queue-size ids are waiting, so only that many
+        # are ever held in memory however long the export is
+        id_queue = queue.Queue(maxsize=max(1, options["queue_size"]))
+        workers = [
+            threading.Thread(target=self._work, args=(kind, id_queue), daemon=True)
+            for _ in range(max(1, options["workers"]))
+        ]
+        for worker in workers:
+            worker.start()
+
+        queued = 0
+        try:
+            for id in ids:
+                if options["limit"] is not None and queued >= options["limit"]:
+                    break
+                id_queue.put(id)
+                queued += 1
+        finally:
+            for _ in workers:
+                id_queue.put(STOP)
+            for worker in workers:
+                worker.join()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            "{0} ids read, {1} queued, {2} fetched, {3} failed in {4:.1f}s".format(
+                self.counts["read"],
+                queued,
+                self.counts["fetched"],
+                self.counts["failed"],
+                elapsed
+            )
+        ))
+
+
+    def _work(self, kind: str, id_queue: queue.Queue) -> None:
+        try:
+            while True:
+                id = id_queue.get()
+                if id is STOP:
+                    return
+
+                close_old_connections()
+                try:
+                    if kind == "movie":
+                        ok = TMDBMovie.fetch_one_movie_by_id(str(id))
+                    else:
+                        ok = TMDBTVSeries.fetch_one_series_by_tmdb_id(id)
+                except Exception as e:
+                    print(f"\nFetching {kind} {id} failed:\n{e}\n")
+                    ok = False
+
+                with self.lock:
+                    self.counts["fetched" if ok else "failed"] += 1
+                    done = self.counts["fetched"] + self.counts["failed"]
+                if done % 100 == 0:
+                    self.stdout.write(f"{done} titles done")
+        finally:
+            # Each thread has its own connection, close it on the way out
+            connection.close()
+
+
+    def _count(self, name: str, items):
+        for item in items:
+            self.counts[name] += 1
+            yield item
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from djangoflix.models import TVEpisode, TVSeason, WatchableContent
+from tmdb import images, storage
+from tmdb.derivatives import derivative_path
+from tmdb.management.commands.tmdb_derivatives import IMAGE_DIRS, list_images
+from tmdb.models import ImageObject
+
+
+class Command(BaseCommand):
+    help = "Moves images from the old per-type folders into the content-addressed store."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Images moved per transaction",
+        )
+
+
+    def handle(self, *args, **options):
+        artwork = storage.artwork()
+        stored = 0
+        updated = 0
+        for directory, sizes in IMAGE_DIRS.items():
+            img_paths = list_images(directory)
+            for start in range(0, len(img_paths), options["batch_size"]):
+                batch = img_paths[start:start + options["batch_size"]]
+                # old static path -> its copy in the store
+                moved = {img_path: images.store_file(img_path, sizes) for img_path in batch}
+
+                # The rows point at the copies before the old files are
+                # deleted, so stopping at any point loses nothing. A rerun
+                # moves what is left.
+                with transaction.atomic():
+                    ImageObject.record([
+                        {"tmdb_path": img_path[len(directory):], **result}
+                        for img_path, result in moved.items()
+                    ])
+                    updated += self._repoint({
+                        img_path: result["path"] for img_path, result in moved.items()
+                    })
+
+                # The old derivatives were regenerated next to the stored original
+                old = [
+                    name for img_path in batch
+                    for name in [img_path, *(derivative_path(img_path, size) for size in sizes)]
+                ]
+                for name in storage.exists_many(artwork, old):
+                    artwork.delete(name)
+                stored += len(batch)
+
+            self.stdout.write(f"{directory}: {len(img_paths)} images moved")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stored} images, pointed {updated} rows at the store"
+        ))
+
+
+    @staticmethod
+    def _repoint(moved: dict[str, str]) -> int:
+        updated = 0
+        for model in (WatchableContent, TVSeason, TVEpisode):
+            rows = []
+            for row in model.objects.filter(img_path__in=moved.keys()).only("img_path"):
+                row.img_path = moved[row.img_path]
+                rows.append(row)
+            model.objects.bulk_update(rows, ["img_path"])
+            updated += len(rows)
+
+        return updated
@@ -0,0 +1,86 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from tmdb import archives, storage
+
+
+class Command(BaseCommand):
+    help = "Packs the loose per-season and per-episode JSON dumps of each series into its archive."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Leave the loose files in place once they are archived",
+        )
+
+
+    def handle(self, *args, **options):
+        dumps = storage.dumps()
+        try:
+            series_dirs, _ = dumps.listdir(archives.ARCHIVE_DIR)
+        except FileNotFoundError:
+            series_dirs = []
+
+        before = {"files": 0, "bytes": 0, "disk": 0}
+        after = {"files": 0, "bytes": 0, "disk": 0}
+        converted = 0
+        for series in sorted(series_dirs):
+            archive = archives.SeriesArchive(series)
+            loose = [f"{archive.legacy_dir}/{member}" for member in archive.adopt_legacy()]
+            if not loose:
+                continue
+            archive.flush()
+
+            # Only drop what the saved archive is known to hold
+            manifest = archives.manifest(series) or {}
+            archived = [
+                name for name in loose
+                if os.path.basename(name) in manifest
+            ]
+            if len(archived) < len(loose):
+                self.stderr.write(
+                    f"{series}: {len(loose) - len(archived)} invalid dumps left in place"
+                )
+
+            self._add_usage(before, dumps, loose)
+            self._add_usage(after, dumps, [archive.name])
+            if not options["keep"]:
+                for name in archived:
+                    dumps.delete(name)
+                self._remove_dir(dumps, archive.legacy_dir)
+            converted += 1
+            self.stdout.write(f"{series}: {len(archived)} dumps archived")
+
+        disk = (
+            f", {before['disk'] / 1024:.1f} KiB -> {after['disk'] / 1024:.1f} KiB on disk"
+            if before["disk"] else ""
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {converted} series: {before['files']} files -> "
+            f"{after['files']}, {before['bytes'] / 1024:.1f} KiB -> "
+            f"{after['bytes'] / 1024:.1f} KiB{disk}"
+        ))
+
+
+    @staticmethod
+    def _add_usage(usage: dict, dumps, names: list[str]) -> None:
+        for name in names:
+            usage["files"] += 1
+            usage["bytes"] += dumps.size(name)
+            try:
+                # What the files really take up on a local disk, in blocks
+                usage["disk"] += os.stat(dumps.path(name)).st_blocks * 512
+            except (NotImplementedError, AttributeError):
+                pass
+
+
+    @staticmethod
+    def _remove_dir(dumps, directory: str) -> None:
+        # Object stores have no directories to remove
+        try:
+            os.rmdir(dumps.path(directory))
+        except (NotImplementedError, OSError):
+            pass
@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tmdb import storage
+from tmdb.client import POOL_SIZE
+from tmdb.models import ContentData, IngestJob
+
+
+# Scanned in this order, each by primary key so a run can resume
+MODELS = IngestJob.ARTWORK_MODELS
+CHECKPOINT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "prefetch.checkpoint"
+)
+
+
+class Command(BaseCommand):
+    help = "Downloads the artwork of every title whose img_path has no stored file, e.g. after failed or --no-images ingests."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=POOL_SIZE,
+            help="Concurrent downloads, all sharing the client's rate limit",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows checked, downloaded for and updated at a time",
+        )
+        parser.add_argument(
+            "--retries",
+            type=int,
+            default=2,
+            help="Extra attempts for an image that still failed after the client's retries",
+        )
+        parser.add_argument(
+            "--kind",
+            action="append",
+            choices=MODELS.keys(),
+            help="Only prefetch this kind of title, may be repeated",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=CHECKPOINT,
+            help="Resume file, removed once a run finishes",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and scan from the start",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the missing artwork",
+        )
+
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--workers and --batch-size must be at least 1")
+
+        self.options = options
+        self.checkpoint = options["checkpoint"]
+        # kind -> primary key every row up to has been handled
+        self.cursors = {} if options["restart"] else self._read_checkpoint(self.checkpoint)
+        if self.cursors:
+            self.stdout.write(f"Resuming after {self.cursors}")
+
+        self.counts = {"checked": 0, "missing": 0, "linked": 0, "downloaded": 0, "failed": 0}
+        self.bytes = 0
+        self.failed: list[str] = []
+        self.started = time.monotonic()
+
+        pool = ThreadPoolExecutor(max_workers=options["workers"])
+        try:
+            for kind in options["kind"] or MODELS:
+                self._prefetch(kind, MODELS[kind], pool)
+        finally:
+            # Ctrl-C shouldn't wait for every queued download
+            pool.shutdown(cancel_futures=True)
+
+        if not options["dry_run"] and os.path.exists(self.checkpoint):
+            # Finished, the next run checks everything again
+            os.remove(self.checkpoint)
+
+        elapsed = time.monotonic() - self.started
+        style = self.style.WARNING if self.counts["failed"] else self.style.SUCCESS
+        self.stdout.write(style(
+            "Checked {checked} titles in {0:.1f}s: {missing} without artwork, "
+            "{linked} linked to stored artwork, {downloaded} downloaded "
+            "({1:.1f} MiB, {2:.1f} MiB/s), {failed} failed".format(
+                elapsed,
+                self.bytes / 2**20,
+                self.bytes / 2**20 / elapsed if elapsed else 0,
+                **self.counts
+            )
+        ))
+        for tmdb_path in self.failed[:20]:
+            self.stderr.write(f"Failed: {tmdb_path}")
+
+
+    def _prefetch(self, kind: str, model: type[ContentData], pool: ThreadPoolExecutor) -> None:
+        rows = model.objects.select_related("content").exclude(
+            img_path__in=("", "/missing.png")
+        ).only("pk", "img_path", "content__img_path").order_by("pk")
+        total = rows.count()
+
+        while True:
+            batch = list(rows.filter(pk__gt=self.cursors.get(kind, 0))[:self.options["batch_size"]])
+            if not batch:
+                return
+
+            self._prefetch_batch(model, batch, pool)
+            self.cursors[kind] = batch[-1].pk
+            if not self.options["dry_run"]:
+                self._write_checkpoint()
+
+            elapsed = time.monotonic() - self.started
+            self.stdout.write(
+                f"{kind}: {rows.filter(pk__lte=batch[-1].pk).count()}/{total} checked, "
+                f"{self.counts['downloaded']} downloaded "
+                f"({self.bytes / 2**20 / elapsed if elapsed else 0:.1f} MiB/s), "
+                f"{self.counts['failed']} failed"
+            )
+
+
+    def _prefetch_batch(self,
+                        model: type[ContentData],
+                        batch: list[ContentData],
+                        pool: ThreadPoolExecutor
+                      ) -> None:
+        self.counts["checked"] += len(batch)
+        existing = storage.exists_many(
+            storage.artwork(),
+            [row.content.img_path for row in batch]
+        )
+        missing = [row for row in batch if row.content.img_path not in existing]
+        self.counts["missing"] += len(missing)
+        if not missing or self.options["dry_run"]:
+            return
+
+        restored = model.restore_images(missing, pool, self.options["retries"])
+        self.counts["linked"] += restored["linked"]
+        self.counts["downloaded"] += restored["downloaded"]
+        self.counts["failed"] += len(restored["failed"])
+        self.bytes += restored["bytes"]
+        self.failed.extend(restored["failed"])
+
+
+    @staticmethod
+    def _read_checkpoint(checkpoint: str) -> dict[str, int]:
+        try:
+            with open(checkpoint, "r", encoding="utf-8") as file:
+                return json.load(file)["cursors"]
+        except FileNotFoundError:
+            return {}
+
+
+    def _write_checkpoint(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.checkpoint))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump({"cursors": self.cursors}, file)
+        os.replace(temp_path, self.checkpoint)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from tmdb.models import MAX_WORKERS, IngestRun, TMDBTVSeries
+
+
+class Command(BaseCommand):
+    help = "Resumes every series ingest run that didn't finish, e.g. after a crash or deploy."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="Only list the unfinished runs and their progress",
+        )
+        parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+
+
+    def handle(self, *args, **options):
+        runs = list(IngestRun.objects.exclude(status="done").order_by("id"))
+        if not runs:
+            self.stdout.write("No unfinished runs")
+            return
+
+        for run in runs:
+            steps = run.steps.all()
+            self.stdout.write(
+                f"{run}: {sum(step.done for step in steps)} of {len(steps)} steps done"
+            )
+            if options["list"]:
+                continue
+
+            # fetch_one_series_by_tmdb_id picks the run up where it stopped
+            TMDBTVSeries.fetch_one_series_by_tmdb_id(
+                run.tmdb_id,
+                max_workers=options["workers"]
+            )
+            run.refresh_from_db()
+            style = self.style.SUCCESS if run.status == "done" else self.style.ERROR
+            self.stdout.write(style(f"{run}"))
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tmdb import metrics
+from tmdb.cache import get_cache
+from tmdb.models import (
+    CHANGE_WINDOW_DAYS,
+    MAX_WORKERS,
+    ContentData,
+    SyncWatermark,
+    TMDBMovie,
+    TMDBTVSeries,
+)
+
+
+class Command(BaseCommand):
+    help = "Applies TMDB changes since the last sync to the titles we already have."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=["movie", "tv", "all"],
+            default="all",
+            help="Which change feed to sync (default: all)",
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help="Sync changes from this day (YYYY-MM-DD) instead of the watermark",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=MAX_WORKERS,
+            help="Number of TMDB requests made at once",
+        )
+
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        kinds = ["movie", "tv"] if options["kind"] == "all" else [options["kind"]]
+        cache = get_cache()
+        before = cache.stats()
+
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            for kind in kinds:
+                start = options["since"] or self._start(kind, today)
+                if start > today:
+                    self.stdout.write(f"{kind} is already synced through {today}")
+                    continue
+                self._sync(kind, start, today, pool)
+
+        after = cache.stats()
+        requests = sum(
+            after.get(name, 0) - before.get(name, 0)
+            for name in ("misses", "revalidated", "stale", "errors")
+        )
+        self.stdout.write(f"{requests} TMDB API requests made")
+
+
+    @staticmethod
+    def _start(kind: str, today: date) -> date:
+        synced_through = SyncWatermark.get_synced_through(kind)
+        if synced_through is None:
+            # First run, only pick up the last day of changes
+            return today - timedelta(days=1)
+
+        # Re-read the last synced day, changes made later that day were missed
+        return synced_through
+
+
+    def _sync(self, kind: str, start: date, end: date, pool: ThreadPoolExecutor) -> None:
+        window = timedelta(days=CHANGE_WINDOW_DAYS - 1)
+
+        while start <= end:
+            window_end = min(start + window, end)
+            ids = ContentData._fetch_changed_ids(f"/{kind}/changes", start, window_end)
+            if ids is None:
+                raise CommandError(
+                    f"Couldn't fetch the {kind} changes from {start}, "
+                    "the watermark was left where it was"
+                )
+
+            with metrics.collect() as window_metrics:
+                if kind == "movie":
+                    synced = TMDBMovie.sync_changed(ids, pool)
+                else:
+                    synced = TMDBTVSeries.sync_changed(ids, start, window_end, pool)
+            rows = window_metrics.counters
+
+            # Only move the watermark once the whole window is applied
+            SyncWatermark.advance(kind, window_end)
+            self.stdout.write(
+                f"{kind} {start} to {window_end}: {len(ids)} changed on TMDB, "
+                f"{synced} of ours re-fetched ({rows['rows_updated']} rows updated, "
+                f"{rows['rows_unchanged']} unchanged, {rows['rows_inserted']} inserted)"
+            )
+            start = window_end + timedelta(days=1)
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from tmdb.cache import get_cache
+from tmdb.models import IngestJob
+
+
+class Command(BaseCommand):
+    help = "Runs queued TMDB ingest jobs until stopped."
+
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=int(os.getenv("TMDB_WORKER_CONCURRENCY", 1)),
+            help="Number of jobs to run at once (default: 1)",
+        )
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between checks of an empty queue",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling",
+        )
+
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"TMDB worker started with concurrency {options['concurrency']}"
+        )
+        threads = [
+            threading.Thread(
+                target=self._work,
+                args=(options["poll"], options["once"]),
+                daemon=True
+            )
+            for _ in range(max(1, options["concurrency"]))
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                # join with a timeout so Ctrl+C still reaches the main thread
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            self.stdout.write("TMDB worker stopped")
+
+
+    def _work(self, poll: float, once: bool) -> None:
+        try:
+            while True:
+                close_old_connections()
+                job = IngestJob.claim_next()
+                if not job:
+                    if once:
+                        return
+                    time.sleep(poll)
+                    continue
+
+                self.stdout.write(f"Running {job}")
+                if job.run():
+                    self.stdout.write(self.style.SUCCESS(f"Finished {job}"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"Failed {job}"))
+                self._write_cache_stats()
+        finally:
+            # Each thread has its own connection, close it on the way out
+            connection.close()
+
+
+    def _write_cache_stats(self) -> None:
+        cache = get_cache()
+        # So tmdb_cache is up to date between jobs
+        cache.save_stats()
+        stats = cache.stats()
+        self.stdout.write(
+            "TMDB cache: {0} hits, {1} revalidated, {2} misses, "
+            "{3} stale ({4:.0%} hit rate)".format(
+                stats.get("hits", 0),
+                stats.get("revalidated", 0),
+                stats.get("misses", 0),
+                stats.get("stale", 0),
+                stats["hit_rate"]
+            )
+        )
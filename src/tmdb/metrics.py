@@ -0,0 +1,256 @@
+import contextvars
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from django.db import connection
+
+
+# Stages of the pipeline, in the order a title goes through them.
+# Queries run outside every stage (run bookkeeping, image lookups, genres)
+# are counted under "other".
+STAGES = (
+    "fetch",    # TMDB API requests, cache hits included
+    "decode",   # validating response bodies into tmdb.payloads shapes
+    "images",   # artwork downloads and derivatives
+    "process",  # building djangoflix fields from payloads
+    "dump",     # JSON dumps of the payloads
+    "add",      # writing to djangoflix and the TMDB side tables
+)
+# Statements that make a transaction need a commit
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+# Collectors of the runs the current thread works for. Pool threads don't
+# inherit it, see bind.
+_collectors: contextvars.ContextVar[tuple["RunMetrics", ...]] = contextvars.ContextVar(
+    "tmdb_metrics_collectors",
+    default=()
+)
+# [name, seconds spent in nested stages] of the innermost open stage
+_stage: contextvars.ContextVar[list | None] = contextvars.ContextVar(
+    "tmdb_metrics_stage",
+    default=None
+)
+
+
+class RunMetrics:
+    """
+    Thread-safe timers and counters of one ingest run.
+
+    Stage seconds are self time (a stage nested in another only counts
+    once) and are summed across threads, so with a pool they can add up to
+    more than wall_seconds. Queries are counted on the thread that called
+    collect, which is the only one that queries.
+
+    The commits counter is how many transactions wrote something: each
+    write in autocommit, plus each outermost atomic block that wrote.
+    Blocks that were open when collect was called don't count as
+    outermost, so a run inside one (e.g. a benchmark that rolls back)
+    still counts the commits it would make on its own.
+    """
+
+    def __init__(self):
+        self.wall_seconds = 0.0
+        self.stages: dict[str, Counter] = {}
+        self.counters = Counter()
+        self.lock = threading.Lock()
+        # Atomic blocks open when collecting started, and the outermost
+        # block opened since that already counted as a commit
+        self._depth = 0
+        self._transaction = None
+
+
+    def add_stage(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self.lock:
+            stage = self.stages.setdefault(name, Counter())
+            stage["calls"] += calls
+            stage["seconds"] += seconds
+
+
+    def count(self, **counts: int) -> None:
+        with self.lock:
+            self.counters.update(counts)
+
+
+    def report(self) -> dict:
+        """
+        Returns the run as a JSON-serializable dict.
+
+        Returns
+        -------
+        dict
+            wall_seconds, stages (calls, seconds and queries of each) and
+            counters (api_calls, api_bytes, cache_served, commits, ...)
+        """
+
+        with self.lock:
+            stages = {
+                name: {
+                    "calls": stage["calls"],
+                    "seconds": round(stage["seconds"], 4),
+                    "queries": stage["queries"],
+                }
+                for name, stage in sorted(
+                    self.stages.items(),
+                    key=lambda item: _stage_order(item[0])
+                )
+            }
+            counters = dict(self.counters)
+
+        # Fetches the cache answered without a request
+        fetches = stages.get("fetch", {}).get("calls", 0)
+        counters["cache_served"] = max(0, fetches - counters.get("api_calls", 0))
+        counters["queries"] = sum(stage["queries"] for stage in stages.values())
+        counters["query_seconds"] = round(counters.get("query_seconds", 0), 4)
+
+        return {
+            "wall_seconds": round(self.wall_seconds, 4),
+            "stages": stages,
+            "counters": dict(sorted(counters.items())),
+        }
+
+
+    def _count_query(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper by collect
+        frame = _stage.get()
+        commits = self._count_commit(sql)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.stages.setdefault(
+                    frame[0] if frame else "other",
+                    Counter()
+                )["queries"] += 1
+                self.counters["query_seconds"] += elapsed
+                self.counters["commits"] += commits
+
+
+    def _count_commit(self, sql: str) -> int:
+        # 1 if sql is the first write of a transaction, see the class docstring
+        if not sql.lstrip()[:6].upper() in WRITES:
+            return 0
+        blocks = connection.atomic_blocks
+        if len(blocks) <= self._depth:
+            return 1
+        if blocks[self._depth] is self._transaction:
+            return 0
+        self._transaction = blocks[self._depth]
+
+        return 1
+
+
+@contextmanager
+def collect(metrics: RunMetrics | None = None) -> Iterator[RunMetrics]:
+    """
+    Collects the metrics of everything run inside the block.
+
+    Blocks can be nested, e.g. a job around a series run, and each
+    collector gets everything recorded while it is open.
+
+    Usage:
+        with metrics.collect() as run_metrics:
+            ...
+        report = run_metrics.report()
+    """
+
+    metrics = metrics or RunMetrics()
+    metrics._depth = len(connection.atomic_blocks)
+    token = _collectors.set(_collectors.get() + (metrics,))
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(metrics._count_query):
+            yield metrics
+    finally:
+        metrics.wall_seconds += time.perf_counter() - started
+        _collectors.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times the block as name, for every collector of the current thread.
+    """
+
+    collectors = _collectors.get()
+    if not collectors:
+        yield
+        return
+
+    parent = _stage.get()
+    frame = [name, 0.0]
+    token = _stage.set(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _stage.reset(token)
+        if parent:
+            parent[1] += elapsed
+        for metrics in collectors:
+            metrics.add_stage(name, elapsed - frame[1])
+
+
+def count(**counts: int) -> None:
+    """
+    Adds counts, e.g. count(api_calls=1), to every collector of the current thread.
+    """
+
+    for metrics in _collectors.get():
+        metrics.count(**counts)
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    Wraps fn so it records to the calling thread's collectors.
+
+    Pass work for a pool through this, e.g. pool.map(bind(fetch), ids),
+    as pool threads don't share the caller's context.
+    """
+
+    collectors = _collectors.get()
+    if not collectors:
+        return fn
+
+    def bound(*args, **kwargs):
+        token = _collectors.set(collectors)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _collectors.reset(token)
+
+    return bound
+
+
+def merge_reports(previous: dict | None, report: dict) -> dict:
+    """
+    Adds report to the one a run saved before, e.g. when it is resumed.
+    """
+
+    if not previous:
+        return report
+
+    merged = _add(previous, report)
+    merged["attempts"] = previous.get("attempts", 1) + report.get("attempts", 1)
+
+    return merged
+
+
+def _add(previous: dict, report: dict) -> dict:
+    merged = dict(previous)
+    for key, value in report.items():
+        if isinstance(value, dict):
+            merged[key] = _add(previous.get(key) or {}, value)
+        elif isinstance(value, (int, float)):
+            merged[key] = round(previous.get(key, 0) + value, 4)
+
+    return merged
+
+
+def _stage_order(name: str) -> int:
+    return STAGES.index(name) if name in STAGES else len(STAGES)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0005_alter_tmdbtvepisode_season_alter_tmdbtvseason_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('movie', 'Movie'), ('series', 'TV Series'), ('season', 'TV Season'), ('upload', 'JSON Upload')], max_length=15)),
+                ('params', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('error', models.TextField(default=None, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(default=None, null=True)),
+                ('finished_at', models.DateTimeField(default=None, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
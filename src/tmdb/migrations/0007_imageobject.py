@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0006_ingestjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageObject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmdb_path', models.CharField(max_length=50, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('path', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0007_imageobject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('movie', 'Movie'), ('tv', 'TV')], max_length=10, unique=True)),
+                ('synced_through', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
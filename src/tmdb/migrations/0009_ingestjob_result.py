@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0008_syncwatermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='result',
+            field=models.JSONField(default=None, null=True),
+        ),
+    ]
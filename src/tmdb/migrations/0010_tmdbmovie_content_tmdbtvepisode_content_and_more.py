@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoflix', '0011_alter_tvepisode_img_path_alter_tvseason_img_path_and_more'),
+        ('tmdb', '0009_ingestjob_result'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tmdbmovie',
+            name='content',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tmdb_movie', to='djangoflix.watchablecontent'),
+        ),
+        migrations.AddField(
+            model_name='tmdbtvepisode',
+            name='content',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tmdb', to='djangoflix.tvepisode'),
+        ),
+        migrations.AddField(
+            model_name='tmdbtvseason',
+            name='content',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tmdb', to='djangoflix.tvseason'),
+        ),
+        migrations.AddField(
+            model_name='tmdbtvseries',
+            name='content',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tmdb_series', to='djangoflix.watchablecontent'),
+        ),
+    ]
@@ -0,0 +1,150 @@
+from datetime import date
+
+from django.db import migrations
+
+
+# TMDB model -> (djangoflix model, extra fields to match on, legacy artwork
+# folder). Parents come before their children, so a season's series is
+# linked by the time the season is
+LINKS = {
+    "TMDBMovie": ("WatchableContent", {"content_type": "Movie"}, "tmdb/movie"),
+    "TMDBTVSeries": ("WatchableContent", {"content_type": "TV"}, "tmdb/tv/series"),
+    "TMDBTVSeason": ("TVSeason", {}, "tmdb/tv/season"),
+    "TMDBTVEpisode": ("TVEpisode", {}, "tmdb/tv/episode"),
+}
+
+
+def _parse_date(value: str) -> date | None:
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _content_fields(tmdb_name: str, row, linked: dict) -> dict | None:
+    # The canonical fields of row, like the _to_dict each TMDB model had
+    # before 0012. None when row can't be a canonical row
+    match tmdb_name:
+        case "TMDBMovie":
+            release_date = _parse_date(row.release_date)
+            if release_date is None:
+                return None
+            return {
+                "content_type": "Movie",
+                "release_date": release_date,
+                "duration": row.runtime,
+            }
+        case "TMDBTVSeries":
+            release_date = _parse_date(row.first_air_date)
+            if release_date is None:
+                return None
+            return {
+                "content_type": "TV",
+                "release_date": release_date,
+                "duration": row.total_seasons,
+            }
+        case "TMDBTVSeason":
+            series = linked["TMDBTVSeries"].get(row.series_id)
+            if series is None:
+                return None
+            return {
+                "series_id": series,
+                "season_number": row.season_number,
+                "air_date": row.air_date,
+            }
+        case "TMDBTVEpisode":
+            season = linked["TMDBTVSeason"].get(row.season_id)
+            if season is None:
+                return None
+            return {
+                "season_id": season,
+                "episode_number": row.episode_number,
+                "air_date": row.air_date,
+                "runtime": row.runtime,
+            }
+
+
+def link_tmdb_rows(apps, schema_editor):
+    """
+    Points every TMDB row at the djangoflix row it was mirrored to.
+
+    Rows are matched on tmdb_id like _bulk_add_to_djangoflix, oldest wins
+    on duplicates. A TMDB row without a djangoflix row (the mirror failed)
+    still has every field 0012 drops, so its djangoflix row is created from
+    them, genres included. Only rows that can't be one (no valid release
+    date, or a parent that isn't linked) are dropped, and the next fetch of
+    that title writes both again.
+    """
+
+    ImageObject = apps.get_model("tmdb", "ImageObject")
+    stored = dict(ImageObject.objects.values_list("tmdb_path", "path"))
+    # TMDB model -> TMDB row id -> the id of its djangoflix row
+    linked = {}
+
+    for tmdb_name, (content_name, match, legacy_dir) in LINKS.items():
+        tmdb_model = apps.get_model("tmdb", tmdb_name)
+        content_model = apps.get_model("djangoflix", content_name)
+
+        contents = {}
+        for id, tmdb_id in content_model.objects.filter(
+            tmdb_id__isnull=False,
+            **match
+        ).order_by("id").values_list("id", "tmdb_id"):
+            contents.setdefault(tmdb_id, id)
+
+        rows = list(tmdb_model.objects.all())
+        unmirrored = []
+        new_contents = []
+        for row in rows:
+            row.content_id = contents.get(row.tmdb_id)
+            if row.content_id is not None:
+                continue
+            fields = _content_fields(tmdb_name, row, linked)
+            if fields is None:
+                continue
+            unmirrored.append(row)
+            new_contents.append(content_model(
+                name=row.name,
+                overview=row.overview,
+                img_path=stored.get(row.img_path, legacy_dir + row.img_path),
+                cast=row.cast,
+                crew=row.crew,
+                tmdb_id=row.tmdb_id,
+                **fields
+            ))
+        content_model.objects.bulk_create(new_contents, batch_size=500)
+
+        links = []
+        for row, content in zip(unmirrored, new_contents):
+            row.content_id = content.id
+            if content_name == "WatchableContent":
+                links.extend(
+                    content_model.genres.through(
+                        watchablecontent_id=content.id,
+                        genre_id=genre_id
+                    )
+                    for genre_id in row.genres.values_list("id", flat=True)
+                )
+        if links:
+            content_model.genres.through.objects.bulk_create(links, batch_size=500)
+        tmdb_model.objects.bulk_update(rows, ["content"], batch_size=500)
+        linked[tmdb_name] = {
+            row.id: row.content_id for row in rows if row.content_id is not None
+        }
+        if new_contents:
+            print(f"\nCreated {len(new_contents)} {content_name} rows for {tmdb_name} rows without one\n")
+
+        dropped, _ = tmdb_model.objects.filter(content__isnull=True).delete()
+        if dropped:
+            print(f"\nDropped {dropped} {tmdb_name} rows that can't be a djangoflix row\n")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0010_tmdbmovie_content_tmdbtvepisode_content_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_tmdb_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,151 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangoflix', '0011_alter_tvepisode_img_path_alter_tvseason_img_path_and_more'),
+        ('tmdb', '0011_link_tmdb_rows_to_content'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='tmdbmovie',
+            name='cast',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbmovie',
+            name='crew',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbmovie',
+            name='genres',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbmovie',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbmovie',
+            name='overview',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbmovie',
+            name='release_date',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbmovie',
+            name='runtime',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvepisode',
+            name='air_date',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvepisode',
+            name='cast',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvepisode',
+            name='crew',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvepisode',
+            name='episode_number',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvepisode',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvepisode',
+            name='overview',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvepisode',
+            name='runtime',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvepisode',
+            name='season',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseason',
+            name='air_date',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseason',
+            name='cast',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseason',
+            name='crew',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseason',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseason',
+            name='overview',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseason',
+            name='season_number',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseason',
+            name='series',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseries',
+            name='cast',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseries',
+            name='crew',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseries',
+            name='first_air_date',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseries',
+            name='genres',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseries',
+            name='name',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseries',
+            name='overview',
+        ),
+        migrations.RemoveField(
+            model_name='tmdbtvseries',
+            name='total_seasons',
+        ),
+        migrations.AlterField(
+            model_name='tmdbmovie',
+            name='content',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tmdb_movie', to='djangoflix.watchablecontent'),
+        ),
+        migrations.AlterField(
+            model_name='tmdbtvepisode',
+            name='content',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tmdb', to='djangoflix.tvepisode'),
+        ),
+        migrations.AlterField(
+            model_name='tmdbtvseason',
+            name='content',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tmdb', to='djangoflix.tvseason'),
+        ),
+        migrations.AlterField(
+            model_name='tmdbtvseries',
+            name='content',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tmdb_series', to='djangoflix.watchablecontent'),
+        ),
+    ]
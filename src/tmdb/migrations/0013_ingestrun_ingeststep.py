@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0012_slim_tmdb_side_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('series', 'TV Series')], max_length=10)),
+                ('tmdb_id', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='running', max_length=10)),
+                ('error', models.TextField(default=None, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(default=None, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['kind', 'tmdb_id'], name='tmdb_ingest_kind_82e953_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='IngestStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('series', 'Series'), ('season', 'Season'), ('episode', 'Episode')], max_length=10)),
+                ('tmdb_id', models.PositiveBigIntegerField()),
+                ('image_stored', models.BooleanField(default=False)),
+                ('written', models.BooleanField(default=False)),
+                ('done', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='steps', to='tmdb.ingestrun')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('run', 'level', 'tmdb_id'), name='unique_ingest_step')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0013_ingestrun_ingeststep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='report',
+            field=models.JSONField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='ingestrun',
+            name='report',
+            field=models.JSONField(default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0014_run_reports'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingestjob',
+            name='kind',
+            field=models.CharField(choices=[('movie', 'Movie'), ('series', 'TV Series'), ('season', 'TV Season'), ('upload', 'JSON Upload'), ('artwork', 'Artwork')], max_length=15),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0015_ingest_job_artwork'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ingestjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tmdb', '0016_ingest_job_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='ingest_run',
+            field=models.ForeignKey(default=None, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='tmdb.ingestrun'),
+        ),
+    ]
@@ -1,907 +1,2540 @@
-import json
 import requests
+import contextvars
 import os
-from django.db import models
+import random
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, connection, models, transaction
+from django.utils import timezone
 from dotenv import load_dotenv
 
 from djangoflix.models import WatchableContent, TVSeason, TVEpisode
+from .cache import get_cache
+from .client import get_client
+from . import archives, images, metrics, payloads, storage, transactions
+from .derivatives import POSTER_SIZES, STILL_SIZES
 
 load_dotenv()
 
 
-BASE_URL = "https://api.themoviedb.org/3"
-IMG_BASE_URL = "https://image.tmdb.org/t/p/original"
-HEADER = {
-    "accept": "application/json",
-    "Authorization": os.getenv("TMDB_AUTH")
-}
+# Caps the thread pool used to fan out season/episode/image requests
+MAX_WORKERS = int(os.getenv("TMDB_MAX_WORKERS", 8))
+# TMDB caps append_to_response at 20 sub-requests per call
+SEASONS_PER_REQUEST = 20
+# A running job whose worker hasn't checked in for this long is taken to be
+# dead (killed, crashed) and queued again, see IngestJob.requeue_expired
+JOB_LEASE = timedelta(seconds=int(os.getenv("TMDB_JOB_LEASE", 300)))
+# Times a job is started before it is given up on
+MAX_JOB_ATTEMPTS = 3
+# Longest window the TMDB change lists accept
+CHANGE_WINDOW_DAYS = 14
+# What a write did to a title, most significant first
+CHANGES = ("inserted", "updated", "unchanged")
+# Episodes in a season payload missing any of these are fetched one by one
+EPISODE_FIELDS = (
+    "id",
+    "name",
+    "overview",
+    "still_path",
+    "episode_number",
+    "air_date",
+    "runtime",
+    "guest_stars",
+    "crew",
+)
 
 
 class ContentData(models.Model):
-    name = models.CharField(max_length=255)
-    overview = models.CharField(null=True, default=None, max_length=9999)
+    """
+    Slim TMDB side table of a canonical djangoflix row.
+
+    The title itself (name, overview, cast, crew, dates, genres and the
+    stored artwork) only lives on `content`. This table maps the TMDB id to
+    that row and keeps what only TMDB needs. Every ingest writes both
+    through _bulk_write.
+    """
+
     tmdb_id = models.PositiveBigIntegerField(unique=True)
-    # The string used to both fetch image from TMDB and load static
+    # The string used to fetch the image from TMDB, the stored copy is
+    # content.img_path
     img_path = models.CharField(max_length=50)
-    # Storing these as 'raw' JSON for now to limit API usage
-    # TODO: Add cast/crew info to content
-    # {"cast": list[dict]}
-    cast = models.JSONField(null=True)
-    # {"crew": list[dict]}
-    crew = models.JSONField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(null=True, auto_now=True)
 
+    # Set by each subclass: the canonical model `content` points at, the
+    # sizes its artwork is made in and the folder artwork used to live in
+    CONTENT_MODEL: type[models.Model]
+    IMAGE_SIZES: dict[str, tuple]
+    LEGACY_IMG_DIR: str
+    # Fields that identify an existing canonical row
+    MATCH_FIELDS: tuple[str, ...] = ("tmdb_id",)
+    # IngestStep.level of rows written as part of an IngestRun
+    STEP_LEVEL: str
+
 
     class Meta:
         abstract = True
 
-    
-    def _to_dict(self) -> dict:
-        content_dict = {
-            field.name: getattr(self, field.name)\
-            for field in self._meta.fields
-        }
-        
-        del content_dict["id"]
-        del content_dict["created_at"]
-        del content_dict["updated_at"]
 
-        return content_dict
-    
-    
-    def _add_to_djangoflix(self, genre_data: dict) -> WatchableContent | None:
-        # get_or_create isn't working as expected
-        try:
-            new_content = WatchableContent.objects.get(
-                tmdb_id=self.tmdb_id,
-                name=self.name
-            )
-            if new_content.content_type == "Movie":
-                new_content.img_path = "tmdb/movie" + self.img_path
-            else:
-                new_content.img_path = "tmdb/tv/series" + self.img_path
-            if genre_data:
-                Genre.process_all_genres(genre_data["genres"], new_content)
-                
-            new_content.save()
-            return new_content
-            
-        except WatchableContent.MultipleObjectsReturned:
-            print(f"\nMultiple objects were found for {self.name}.\n")
-            return None
-        
-        except WatchableContent.DoesNotExist:
-            content_data = self._to_dict()
-            new_content = WatchableContent.objects.create(**content_data)
-            new_content.save()
-
-            if genre_data:
-                Genre.process_all_genres(genre_data["genres"], new_content)
-                new_content.save()
-        
-            return new_content
+    @classmethod
+    def _bulk_write(cls,
+                    payloads: list[dict],
+                    pool: ThreadPoolExecutor | None = None,
+                    download_images: bool = True,
+                    run: "IngestRun | None" = None,
+                    **parent
+                  ) -> list[tuple["ContentData", models.Model]]:
+        """
+        The single write path for TMDB payloads of any kind.
 
+        Artwork is stored first, outside the transaction. Then each title is
+        written once, to its canonical djangoflix row, and linked from a
+        slim TMDB row, with a constant number of queries. Genres are only
+        linked to the canonical row.
 
-    @staticmethod
-    def _fetch_data(url_ext: str) -> requests.Response | None:
-        try:
-            response = requests.get(
-                BASE_URL + url_ext + "?language=en-US",
-                headers=HEADER
-            )
-            return response
-        except requests.exceptions.RequestException as e:
-            print(f"\nFetch Data failed:\n{e}\n")
-            return None
-        
+        Incoming fields are compared to the stored rows, and only the
+        fields that differ are updated, so re-ingesting an unchanged title
+        writes nothing. Each returned TMDB row gets a `change`, one of
+        CHANGES.
 
-    @staticmethod
-    def _fetch_image(img_path: str) -> requests.Response | None:
-        print(f"Fetching from {IMG_BASE_URL}{img_path}")
-        try:
-            response = requests.get(IMG_BASE_URL + img_path, headers=HEADER)
-            return response
-        except requests.exceptions.RequestException as e:
-            print(f"\nFetch Image failed:\n{e}\n")
-            return None
+        With a run, rows it already wrote (artwork included) are loaded
+        instead of written again, and the rest are checkpointed in the same
+        transaction as their rows.
 
-    
-    @staticmethod
-    def _write_to_json(data: dict, path: str) -> None:
-        with open(
-            f"src/tmdb/json/{path}.json",
-            "w",
-            encoding="utf-8"
-        ) as outfile:
-            jsondata = json.dumps(
-                data, 
-                indent=2,
-                sort_keys=True,
-                separators=(",", ":"),
-                ensure_ascii=False
+        Parameters
+        ----------
+        payloads : list[dict]
+            TMDB details of cls' kind, at most one per tmdb_id
+        pool : ThreadPoolExecutor | None
+            shared pool to download artwork on
+        download_images : bool
+            False skips downloads, artwork already stored is still used
+        run : IngestRun | None
+            the resumable run these payloads belong to, see STEP_LEVEL
+        **parent
+            the canonical row every payload belongs to, e.g.
+            series=django_series for seasons
+
+        Returns
+        -------
+        list[tuple[ContentData, models.Model]]
+            the saved TMDB row and its canonical row for each payload, in
+            the same order
+        """
+
+        if not payloads:
+            return []
+
+        written = run.written(cls.STEP_LEVEL) if run else set()
+        # tmdb_id -> (TMDB row, canonical row)
+        pairs = cls._load_pairs(
+            [data["id"] for data in payloads if data["id"] in written]
+        )
+        pending = [data for data in payloads if data["id"] not in pairs]
+
+        rows = [cls(**cls._tmdb_fields_from_data(data)) for data in pending]
+        ContentData._store_images(rows, cls.IMAGE_SIZES, pool, download_images)
+
+        content_rows = []
+        with metrics.stage("process"):
+            for row, data in zip(rows, pending):
+                fields = cls._fields_from_data(data)
+                fields["img_path"] = row._static_img_path(cls.LEGACY_IMG_DIR)
+                content_rows.append(fields)
+
+        with metrics.stage("add"), transactions.atomic():
+            contents = ContentData._bulk_add_to_djangoflix(
+                cls.CONTENT_MODEL,
+                content_rows,
+                cls.MATCH_FIELDS,
+                **parent
             )
-            outfile.write(jsondata)
-    
-    
-    @staticmethod
-    def _write_image(response: requests.Response, path: str) -> None:
-        with open(path, "wb") as image:
-            image.write(response.content)
+            for row, content in zip(rows, contents):
+                row.content = content
+            saved = cls._bulk_upsert(rows) if rows else []
+            for row, content in zip(saved, contents):
+                # A title changed if either of its rows did
+                row.change = min(row.change, content.change, key=CHANGES.index)
+            if cls.CONTENT_MODEL is WatchableContent:
+                Genre.link_all_genres([
+                    (content, data.get("genres", []))
+                    for content, data in zip(contents, pending)
+                ])
+            if run and rows:
+                run.record(
+                    cls.STEP_LEVEL,
+                    {
+                        row.tmdb_id: bool(row.stored_img_path)
+                        or row.img_path == "/missing.png"
+                        for row in rows
+                    },
+                    done=cls.STEP_LEVEL == IngestStep.LEAF_LEVEL
+                )
+        changes = Counter(row.change for row in saved)
+        metrics.count(
+            rows_inserted=changes["inserted"],
+            rows_updated=changes["updated"],
+            rows_unchanged=changes["unchanged"],
+            rows_resumed=len(pairs)
+        )
 
+        pairs.update(
+            (row.tmdb_id, (row, content)) for row, content in zip(saved, contents)
+        )
+        for row, content in pairs.values():
+            # Callers (and pool threads) read these without another query
+            row.content = content
+            for name, value in parent.items():
+                setattr(content, name, value)
 
-class Genre(models.Model):
-    name = models.CharField(max_length=255)
-    tmdb_id = models.PositiveBigIntegerField(unique=True)
+        return [pairs[data["id"]] for data in payloads]
 
-    def __str__(self) -> str:
-        return self.name
+
+    @classmethod
+    def _load_pairs(cls, tmdb_ids: list[int]) -> dict[int, tuple["ContentData", models.Model]]:
+        if not tmdb_ids:
+            return {}
+
+        return {
+            row.tmdb_id: (row, row.content)
+            for row in cls.objects.select_related("content").filter(
+                tmdb_id__in=tmdb_ids
+            )
+        }
 
 
-    @staticmethod
-    def process_all_genres(genres: list[dict], object: object) -> None:
+    @classmethod
+    def _bulk_upsert(cls, rows: list["ContentData"]) -> list["ContentData"]:
         """
-        Calls _process_genre with object for each genre in the genres list.
+        Writes rows in a constant number of queries, matched on tmdb_id.
 
-        This method is intended for use in conjunction with other TMDB methods,
-        and therefore does not save the instance to avoid redundancy.
+        Existing rows are loaded in one query. New rows go through a single
+        bulk_create that also updates on a tmdb_id conflict, and rows whose
+        fields differ go through one bulk_update per set of changed fields,
+        which only writes those fields. Sets `change` on every saved row.
 
         Parameters
         ----------
-        genres : list[dict]
-            id: int
-                the genre.tmdb_id
-            name: str
-                the genre.name
-        object : object
-            the instance arg for each process_genre call
-        
+        rows : list[ContentData]
+            unsaved instances of cls built from TMDB data
+
         Returns
         -------
-        None
+        list[ContentData]
+            the saved instance for each row, in the same order
         """
 
-        # TODO: Update to handle logging new genre creations when logging is added
-        for genre in genres:
-            Genre._process_genre(genre["id"], genre["name"], object)
-
+        fields = [
+            field.name for field in cls._meta.concrete_fields
+            if field.name not in ("id", "tmdb_id", "created_at", "updated_at")
+        ]
+        existing = cls.objects.in_bulk(
+            [row.tmdb_id for row in rows],
+            field_name="tmdb_id"
+        )
+        now = timezone.now()
+        new_rows = []
+        # changed fields -> rows where exactly those differ
+        changed_rows: dict[tuple[str, ...], list[ContentData]] = {}
+        saved_rows = []
+
+        for row in rows:
+            current = existing.get(row.tmdb_id)
+            if current is None:
+                row.change = "inserted"
+                new_rows.append(row)
+                saved_rows.append(row)
+                continue
+            changed = ContentData._copy_changed_fields(row, current, fields)
+            current.change = "updated" if changed else "unchanged"
+            if changed:
+                current.updated_at = now
+                changed_rows.setdefault(tuple(changed), []).append(current)
+            saved_rows.append(current)
+
+        if new_rows:
+            cls.objects.bulk_create(
+                new_rows,
+                update_conflicts=True,
+                unique_fields=["tmdb_id"],
+                update_fields=fields
+            )
+        for changed, objs in changed_rows.items():
+            cls.objects.bulk_update(objs, [*changed, "updated_at"])
 
-    @staticmethod
-    def _process_genre(id: int, name: str, object: object) -> tuple[object, bool] | bool:
-        try:
-            # get_or_create returns (object, created), but I only need the object
-            this_genre, created = Genre.objects.get_or_create(tmdb_id=id, name=name)
-            object.genres.add(this_genre)
-            return (this_genre, created)
-        # This except allows processing to continue 
-        # so we can investigate the issue later
-        # though, this should probably never actually happen
-        except Genre.MultipleObjectsReturned:
-            print(f"\nMultiple objects were found for {id}+{name}.\n")
-            return False
-    
+        return saved_rows
 
-class TMDBMovie(ContentData):
-    genres = models.ManyToManyField(Genre)
-    release_date = models.CharField(max_length=10) # "YYYY-MM-DD"
-    runtime = models.PositiveIntegerField()
-    
 
-    def __str__(self):
-        return f"{self.name}"
-    
-    
-    def _to_dict(self) -> dict:
-        movie_dict = super()._to_dict()
-        movie_dict["content_type"] = "Movie"
-        movie_dict["img_path"] = "tmdb/movie" + self.img_path
-        movie_dict["duration"] = self.runtime
+    @staticmethod
+    def _bulk_add_to_djangoflix(model: type[WatchableContent] | type[TVSeason] | type[TVEpisode],
+                                rows: list[dict],
+                                match_fields: tuple[str, ...] = ("tmdb_id",),
+                                **parent
+                              ) -> list[WatchableContent] | list[TVSeason] | list[TVEpisode]:
+        """
+        Writes rows to the canonical djangoflix model in a constant number of queries.
 
-        del movie_dict["runtime"]
+        The djangoflix tables don't enforce a unique tmdb_id, so existing
+        rows are loaded in one query (oldest wins on duplicates). New rows
+        go through one bulk_create, and rows that differ through one
+        bulk_update per set of changed fields. Unchanged rows aren't
+        written at all. Sets `change` on every saved row.
 
-        return movie_dict
-            
-    
-    def _fetch_movie_image(self):
-        if not hasattr(self, "img_path"):
-            print(f"\n{self} is missing the img_path attr.\n")
-            return
-        
-        if self.img_path == "/missing.png":
-            print(f"\n{self} doesn't have an image, fetch cancelled.\n")
-            return
-        
-        try:
-            response = ContentData._fetch_image(self.img_path)
+        Parameters
+        ----------
+        model : type[WatchableContent] | type[TVSeason] | type[TVEpisode]
+            the djangoflix model to write
+        rows : list[dict]
+            canonical field data from each payload's _fields_from_data
+        match_fields : tuple[str, ...]
+            fields that identify an existing row, movies and series share
+            WatchableContent so they also match on content_type
+        **parent
+            the FK every row belongs to, e.g. series=django_series
 
-            if not response:
-                print("Invalid response object")
-                return
+        Returns
+        -------
+        list[WatchableContent] | list[TVSeason] | list[TVEpisode]
+            the saved instance for each row, in the same order
+        """
 
-            if response.status_code == 200:
-                path = f"src/tmdb/static/tmdb/movie{self.img_path}"
-                ContentData._write_image(response, path)
-                
-                return
+        if not rows:
+            return []
 
-            print(f"\nFetch Image Bad Response:\n{response.status_code}\n")
+        existing = {}
+        for obj in model.objects.filter(
+            tmdb_id__in=[row["tmdb_id"] for row in rows]
+        ).order_by("id"):
+            existing.setdefault(
+                tuple(getattr(obj, name) for name in match_fields),
+                obj
+            )
 
-        except Exception as e:
-            print(f"\nAn exception occurred:\n{e}\n")
+        fields = [name for name in rows[0] if name != "tmdb_id"] + list(parent)
+        now = timezone.now()
+        new_objs = []
+        # changed fields -> rows where exactly those differ
+        changed_objs: dict[tuple[str, ...], list[models.Model]] = {}
+        saved_objs = []
+
+        for row in rows:
+            incoming = model(**row, **parent)
+            current = existing.get(tuple(row[name] for name in match_fields))
+            if current is None:
+                incoming.change = "inserted"
+                new_objs.append(incoming)
+                saved_objs.append(incoming)
+                continue
+            changed = ContentData._copy_changed_fields(incoming, current, fields)
+            current.change = "updated" if changed else "unchanged"
+            if changed:
+                current.updated_at = now
+                changed_objs.setdefault(tuple(changed), []).append(current)
+            saved_objs.append(current)
+
+        if new_objs:
+            model.objects.bulk_create(new_objs)
+        for changed, objs in changed_objs.items():
+            model.objects.bulk_update(objs, [*changed, "updated_at"])
+
+        return saved_objs
 
 
     @classmethod
-    def add_movie_from_json(cls, data: dict) -> bool:
+    def bulk_add_from_json(cls,
+                           payloads: list[dict],
+                           pool: ThreadPoolExecutor | None = None,
+                           download_images: bool = True
+                         ) -> list[tuple["ContentData", WatchableContent]]:
         """
-        Adds TMDBMovie if not exist and adds WatchableContent if not exist.
+        Bulk version of add_movie_from_json/add_series_from_json.
+
+        Call on TMDBMovie or TMDBTVSeries. Goes through _bulk_write, so the
+        whole batch costs a constant number of queries. Seasons of series
+        are not added.
 
         Parameters
         ----------
-        data : dict
-            field data for adding the content
+        payloads : list[dict]
+            TMDB movie or series details, at most one per tmdb_id
+        pool : ThreadPoolExecutor | None
+            shared pool to download posters on
+        download_images : bool
+            False skips downloads, posters already stored are still used
 
         Returns
         -------
-        bool
+        list[tuple[ContentData, WatchableContent]]
+            the saved TMDB row and its WatchableContent for each payload, in
+            the same order
         """
 
-        if not type(data) == dict:
-            return False
-        
-        new_movie = TMDBMovie._process_movie(data)
-        # img should already be downloaded
-        path = f"src/tmdb/static/tmdb/movie{new_movie.img_path}"
-        if not os.path.isfile(path):
-            new_movie._fetch_movie_image()
-        
-        added = new_movie._add_to_djangoflix({"genres": data["genres"]})
+        return cls._bulk_write(payloads, pool, download_images)
 
-        return added
 
-    
     @classmethod
-    def fetch_one_movie_by_id(cls, id: str):
-        try:
-            response = ContentData._fetch_data("/movie/%s" % id)
+    def _tmdb_fields_from_data(cls, data: dict) -> dict:
+        # Reading the canonical fields as well means a payload missing any
+        # key fails here, before anything is written
+        fields = cls._fields_from_data(data)
 
-            if not response:
-                print("Invalid response object")
-                return
-            
-            if response.status_code == 200:
-                responsejson = response.json()
-                this_movie = TMDBMovie._process_movie(responsejson)
-                this_movie._fetch_movie_image() 
-                this_movie._add_to_djangoflix(
-                    {"genres": responsejson["genres"]}
-                )
-                # (optional) Write to JSON to reduce API usage
-                normalized_name = this_movie.name.replace(":", " -")
-                ContentData._write_to_json(responsejson, f"Movies/{normalized_name}")
-                return
-            
-            print(f"\nBad Response:\n{response.status_code}\n")
-        
-        except json.JSONDecodeError:
-            print("JSON decode failed!")
+        return {"tmdb_id": fields["tmdb_id"], "img_path": fields["img_path"]}
 
 
-    @classmethod
-    def _process_movie(cls, movie_data: dict):
-        this_movie = TMDBMovie.objects.filter(
-            tmdb_id=movie_data["id"]
-        ).first()
-        # TODO: fetch movie.credits to get cast & crew
-        if not this_movie:
-            this_movie = TMDBMovie(
-                name=movie_data["title"] or "missing",
-                overview=movie_data["overview"] or "missing",
-                tmdb_id=movie_data["id"],
-                img_path=movie_data["poster_path"] or "/missing.png",
-                release_date=movie_data["release_date"] or "missing",
-                runtime=movie_data["runtime"] or 999,
-                cast=None,
-                crew=None
+    @staticmethod
+    def _copy_changed_fields(source: models.Model,
+                             target: models.Model,
+                             fields: list[str]
+                           ) -> list[str]:
+        # Returns the names of the fields that differed. Compare FKs by
+        # attname so unloaded relations don't cost a query
+        changed = []
+        for name in fields:
+            field = target._meta.get_field(name)
+            attname = field.attname
+            value = getattr(source, attname)
+            try:
+                # e.g. "2000-01-01" from TMDB against a loaded date
+                value = field.to_python(value)
+            except ValidationError:
+                pass
+            if getattr(target, attname) != value:
+                setattr(target, attname, value)
+                changed.append(name)
+
+        return changed
+
+
+    @staticmethod
+    def _fetch_data(url_ext: str,
+                    params: dict | None = None,
+                    headers: dict | None = None
+                  ) -> requests.Response | None:
+        # The client handles pooling, timeouts, retries and rate limiting
+        response = get_client().get_data(url_ext, params, headers)
+        metrics.count(
+            api_calls=1,
+            api_bytes=len(response.content) if response is not None else 0
+        )
+
+        return response
+    
+
+    @staticmethod
+    def _fetch_json(url_ext: str,
+                    params: dict | None = None,
+                    refresh: bool = False
+                  ) -> dict | None:
+        """
+        Fetches url_ext and returns the decoded body, or None on any failure.
+
+        Reads through the response cache, so unchanged resources cost at
+        most a 304. refresh skips the TTL and always revalidates. Only
+        touches the network and the cache dir, so it is safe to call from
+        worker threads.
+        """
+
+        with metrics.stage("fetch"):
+            return get_cache().fetch_json(
+                url_ext,
+                params,
+                ContentData._fetch_data,
+                refresh
             )
-        # save to db to get id
-        this_movie.save()
-        # 2. Process genres
-        Genre.process_all_genres(movie_data["genres"], this_movie)
-        # 3. Save changes 
-        this_movie.save()
-
-        return this_movie
         
 
-class TMDBTVSeries(ContentData):
-    genres = models.ManyToManyField(Genre)
-    total_seasons = models.PositiveIntegerField()
-    total_episodes = models.PositiveIntegerField()
-    first_air_date = models.CharField(max_length=10) # "YYYY-MM-DD"
-    last_air_date = models.CharField(max_length=10) # "YYYY-MM-DD"
+    @staticmethod
+    def _fetch_changed_ids(endpoint: str, start: date, end: date) -> list[int] | None:
+        """
+        Pages through a TMDB change list, e.g. /movie/changes.
 
+        TMDB only accepts windows of up to CHANGE_WINDOW_DAYS. Returns None
+        if any page couldn't be fetched, so a partial list is never synced.
+        """
 
-    def __str__(self) -> str:
-        if hasattr(self, "name") and hasattr(self, "total_seasons"):
-            return f"Series: {self.name} has {self.total_seasons} season(s)."
-        
-        return "Invalid Series object."
+        ids = []
+        page = 1
+        while True:
+            data = ContentData._fetch_json(
+                endpoint,
+                {
+                    "start_date": start.isoformat(),
+                    "end_date": end.isoformat(),
+                    "page": page,
+                },
+                refresh=True
+            )
+            if not data:
+                return None
+            ids.extend(
+                result["id"] for result in data.get("results", [])
+                if "id" in result
+            )
+            if page >= data.get("total_pages", 1):
+                break
+            page += 1
 
+        return ids
 
-    def _to_dict(self) -> dict:
-        series_dict = super()._to_dict()
-        series_dict["content_type"] = "TV"
-        # Update img_path for view convenience
-        series_dict["img_path"] = "tmdb/tv/series" + self.img_path
-        series_dict["duration"] = self.total_seasons
-        series_dict["release_date"] = self.first_air_date
 
-        del series_dict["total_seasons"]
-        del series_dict["total_episodes"]
-        del series_dict["first_air_date"]
-        del series_dict["last_air_date"]
+    @staticmethod
+    def _fetch_image(img_path: str) -> requests.Response | None:
+        client = get_client()
+        print(f"Fetching from {client.img_base_url}{img_path}")
+        # Streamed so the image store never holds a whole image in memory
+        return client.get_image(img_path, stream=True)
 
-        return series_dict
-    
     
-    def _fetch_series_image(self):
-        if not hasattr(self, "img_path"):
-            print(f"\n{self} is missing the img_path attr.\n")
-            return
-        
-        if self.img_path == "/missing.png":
-            print(f"\n{self} doesn't have an image, fetch cancelled.\n")
-            return
-        
+    @staticmethod
+    def _write_to_json(data: dict, path: str) -> None:
+        # Dumps live in the tmdb_json storage, see storage.DUMPS. Series are
+        # dumped to one archive each instead, see tmdb.archives
+        with metrics.stage("dump"):
+            dumps = storage.dumps()
+            # Compact, it's read back by the importers rather than people
+            jsondata = payloads.encode(data)
+            name = f"{path}.json"
+            if storage.same_content(dumps, name, jsondata):
+                # Re-ingesting an unchanged title leaves its dump alone
+                metrics.count(dumps_unchanged=1)
+                return
+            dumps.save(name, ContentFile(jsondata))
+            metrics.count(dumps=1, dump_bytes=len(jsondata))
+
+
+    @staticmethod
+    def _download_image(img_path: str, sizes: dict[str, tuple]) -> dict | None:
+        """
+        Downloads img_path into the image store and makes its derivatives.
+
+        Only touches the network and disk, so it is safe to call from
+        worker threads. Record the result with ImageObject.record.
+
+        Returns
+        -------
+        dict | None
+            tmdb_path, sha256, size and static path, None if it failed
+        """
+
+        with metrics.stage("images"):
+            stored = ContentData._store_image(img_path, sizes)
+        if stored:
+            metrics.count(images_downloaded=1, image_bytes=stored["size"])
+        else:
+            metrics.count(image_failures=1)
+
+        return stored
+
+
+    @staticmethod
+    def _store_image(img_path: str, sizes: dict[str, tuple]) -> dict | None:
         try:
-            response = ContentData._fetch_image(self.img_path)
+            response = ContentData._fetch_image(img_path)
 
-            if not response:
+            if response is None:
                 print("Invalid response object")
-                return
+                return None
 
-            if response.status_code == 200:
-                path = f"src/tmdb/static/tmdb/tv/series{self.img_path}"
-                ContentData._write_image(response, path)
-                
-                return
+            if not response.status_code == 200:
+                print(f"\nFetch Image Bad Response:\n{response.status_code}\n")
+                response.close()
+                return None
+
+            stored = images.store_response(
+                response,
+                os.path.splitext(img_path)[1],
+                sizes
+            )
+            if not stored:
+                return None
 
-            print(f"\nFetch Image Bad Response:\n{response.status_code}\n")
+            return {"tmdb_path": img_path, **stored}
 
         except Exception as e:
             print(f"\nAn exception occurred:\n{e}\n")
-    
-    
-    @classmethod
-    def add_series_from_json(cls, data: dict) -> bool:
+            return None
+
+
+    @staticmethod
+    def _store_images(rows: list["ContentData"],
+                      sizes: dict[str, tuple],
+                      pool: ThreadPoolExecutor | None = None,
+                      download: bool = True
+                    ) -> None:
         """
-        Adds TMDBTVSeries if not exist and adds WatchableContent if not exist.
+        Makes sure each row's artwork is in the image store.
+
+        Artwork that is already stored is looked up in one query instead of
+        being downloaded again. The rest is downloaded on pool (or inline
+        without one) and recorded in one more query, from the calling
+        thread. Sets stored_img_path on every row for _static_img_path.
 
         Parameters
         ----------
-        data : dict
-            field data for adding the content
+        rows : list[ContentData]
+            instances whose img_path is a TMDB image path
+        sizes : dict[str, tuple]
+            POSTER_SIZES or STILL_SIZES
+        pool : ThreadPoolExecutor | None
+            shared pool to download on
+        download : bool
+            False only looks up artwork that is already stored
 
         Returns
         -------
-        bool
+        None
         """
 
-        if not type(data) == dict:
-            return False
-        
-        new_series = TMDBTVSeries._process_series(data)
-        # img should already be downloaded
-        path = f"src/tmdb/static/tmdb/tv/series/{new_series.img_path}"
-        if not os.path.isfile(path):
-            new_series._fetch_series_image()
-        
-        added: WatchableContent | None = new_series._add_to_djangoflix(
-                                                    {"genres": data["genres"]}
-                                                )
-        if added:
-            TMDBTVSeason.add_all_seasons_from_json(new_series, added)
-            return True
+        tmdb_paths = {
+            row.img_path for row in rows
+            if row.img_path and not row.img_path == "/missing.png"
+        }
+        stored = ImageObject.resolve(tmdb_paths)
+
+        missing = [
+            path for path in tmdb_paths if download and path not in stored
+        ]
+        if missing:
+            # Commits what the batch wrote so far instead of holding the
+            # write lock for the downloads
+            transactions.release()
+        # Downloads are timed as the run's, whichever thread they run on
+        download = metrics.bind(lambda path: ContentData._download_image(path, sizes))
+        downloaded = pool.map(download, missing) if pool else map(download, missing)
+        stored.update(ImageObject.record(
+            [result for result in downloaded if result]
+        ))
+
+        for row in rows:
+            row.stored_img_path = stored.get(row.img_path)
+
 
-        return False
-    
-    
     @classmethod
-    def get_one_series_by_tmdb_id(cls, id: int):
-        try:
-            this_series = TMDBTVSeries.objects.get(tmdb_id__exact=id)
-            return this_series
-        except cls.DoesNotExist:
-            print(f"\nNo TV Series found with TMDB ID: {id}.\n")
-            return None
+    def prefetch_images(cls,
+                        payloads: list[dict],
+                        pool: ThreadPoolExecutor | None = None,
+                        run: "IngestRun | None" = None
+                      ) -> None:
+        """
+        Stores the artwork of payloads of cls' kind ahead of writing them.
 
+        _bulk_write then finds it stored, so no download happens while a
+        transaction (or a savepoint of a batch) holds the write lock. Rows
+        run already wrote and payloads _bulk_write would reject are skipped.
+        """
 
-    @classmethod
-    def fetch_one_series_by_tmdb_id(cls, id: str) -> None:
-        try:
-            response = ContentData._fetch_data("/tv/%s" % id)
+        written = run.written(cls.STEP_LEVEL) if run else set()
+        rows = []
+        for data in payloads:
+            try:
+                if data["id"] in written:
+                    continue
+                rows.append(cls(**cls._tmdb_fields_from_data(data)))
+            except (KeyError, TypeError):
+                continue
+        ContentData._store_images(rows, cls.IMAGE_SIZES, pool)
+
+
+    def _static_img_path(self, legacy_dir: str) -> str:
+        # Artwork that never made it into the store keeps the old layout
+        stored = getattr(self, "stored_img_path", None)
+        if stored:
+            return stored
+        
+        return legacy_dir + self.img_path
 
-            if not response:
-                print("Invalid response object")
-                return
 
-            if not response.status_code == 200:
-                print(f"\nBad Response:\n{response.status_code}\n")
-                return
+    @classmethod
+    def restore_images(cls,
+                       rows: list["ContentData"],
+                       pool: ThreadPoolExecutor,
+                       retries: int = 0
+                     ) -> dict:
+        """
+        Stores the artwork of rows again and points their content at it.
 
-            responsejson = response.json()
-            this_series = TMDBTVSeries._process_series(responsejson)
-            this_series._fetch_series_image()
-            added: WatchableContent | None = this_series._add_to_djangoflix(
-                {"genres": responsejson["genres"]}
-            )
-            # (optional) Write to JSON to reduce API usage
-            normalized_name = this_series.name.replace(":", " -")
-            path = f"TV/{normalized_name}/{normalized_name}"
-            ContentData._write_to_json(responsejson, path)
+        For artwork that went missing or was never stored. Artwork another
+        title already stored is linked without a download, the rest is
+        downloaded on pool, each image up to 1 + retries times.
 
-            # Now fetch the season data, which will fetch the episode data
-            if added:
-                TMDBTVSeason.fetch_all_seasons_for_series(this_series, added)
-            
-        except json.JSONDecodeError:
-            print("JSON decode failed!")
-
-
-    @classmethod
-    def _process_series(cls, series_data: dict):
-        this_series = TMDBTVSeries.objects.filter(
-            tmdb_id = series_data["id"],
-        ).first()
-        if not this_series:
-            this_series = TMDBTVSeries(
-                name=series_data["name"] or "missing",
-                overview=series_data["overview"] or "missing",
-                tmdb_id=series_data["id"],
-                img_path=series_data["poster_path"] or "/missing.png",
-                cast=None,
-                crew=None,
-                total_seasons=series_data["number_of_seasons"] or 999,
-                total_episodes=series_data["number_of_episodes"] or 999,
-                first_air_date=series_data["first_air_date"] or "missing",
-                last_air_date=series_data["last_air_date"] or "missing",
-            )
-        # This seasons list has all the data we need to go fetch
-        # all of the season details for this series
-        this_series.season_data = series_data["seasons"]
-        this_series.save()
-        
-        try:
-            Genre.process_all_genres(series_data["genres"], this_series)
-            this_series.save()
-        except KeyError:
-            print(f"Series \"{series_data["name"]}\" missing Genres data.")
+        Parameters
+        ----------
+        rows : list[ContentData]
+            rows of cls with their content loaded
+        pool : ThreadPoolExecutor
+            shared pool to download on
+        retries : int
+            extra attempts for an image the client still failed to get,
+            e.g. because of a truncated body
 
-        return this_series
+        Returns
+        -------
+        dict
+            linked and downloaded row counts, downloaded bytes, and the
+            TMDB paths that failed
+        """
 
+        tmdb_paths = {
+            row.img_path for row in rows
+            if row.img_path and not row.img_path == "/missing.png"
+        }
+        stored = ImageObject.resolve(tmdb_paths)
+        linked = sum(row.img_path in stored for row in rows)
+
+        def download(path: str) -> dict | None:
+            # The client already retried 429/5xx and dropped connections
+            for attempt in range(retries + 1):
+                result = ContentData._download_image(path, cls.IMAGE_SIZES)
+                if result or attempt == retries:
+                    return result
+                time.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+
+        to_download = sorted(tmdb_paths - stored.keys())
+        downloaded = [
+            result for result in pool.map(metrics.bind(download), to_download)
+            if result
+        ]
+        stored.update(ImageObject.record(downloaded))
+
+        contents = []
+        for row in rows:
+            if row.img_path in stored:
+                row.content.img_path = stored[row.img_path]
+                contents.append(row.content)
+        cls.CONTENT_MODEL.objects.bulk_update(contents, ["img_path"])
+
+        return {
+            "linked": linked,
+            "downloaded": len(contents) - linked,
+            "bytes": sum(result["size"] for result in downloaded),
+            "failed": [path for path in to_download if path not in stored],
+        }
 
-class TMDBTVSeason(ContentData):
-    series = models.ForeignKey(
-        TMDBTVSeries,
-        on_delete=models.CASCADE,
-        related_name="seasons",
-        null=True
-    )
-    season_number = models.PositiveIntegerField()
-    air_date = models.CharField(max_length=10) # "YYYY-MM-DD"
 
+class Genre(models.Model):
+    name = models.CharField(max_length=255)
+    tmdb_id = models.PositiveBigIntegerField(unique=True)
+
+    # tmdb_id -> Genre for the whole process, see get_registry
+    _registry: dict[int, "Genre"] | None = None
+    _registry_lock = threading.Lock()
 
     def __str__(self) -> str:
-        if hasattr(self, "name") and hasattr(self, "series"):
-            return f"This is {self.name} of {self.series.name}"
-        
-        return "Invalid Season."
+        return self.name
 
-    
-    def _to_dict(self) -> dict:
-        season_dict = super()._to_dict()
-        # Update img_path for view convenience
-        season_dict["img_path"] = "tmdb/tv/season" + self.img_path
 
-        del season_dict["series"]
+    @classmethod
+    def get_registry(cls) -> dict[int, "Genre"]:
+        """
+        Returns every Genre keyed by tmdb_id, loading them on first use.
 
-        return season_dict
-    
-    
-    def _add_to_djangoflix(self,
-                           django_series: WatchableContent
-                        ) -> TVSeason | None:
-        try:
-            new_season = TVSeason.objects.get(
-                tmdb_id=self.tmdb_id
-            )
-            # Update img_path for view convenience
-            new_season.img_path = "tmdb/tv/season" + self.img_path
-            new_season.save()
-            return new_season
-        
-        except TVSeason.MultipleObjectsReturned:
-            print(f"\nMultiple objects were found for {self.name}.\n")
-            return None
-        
-        except TVSeason.DoesNotExist:
-            data = self._to_dict()
-            new_season = TVSeason(**data)
-            new_season.save()
-            new_season.add_series(django_series)
-            new_season.save()
-
-            return new_season
-        
+        TMDB only has a few dozen genres, so they are loaded with one query
+        and reused by every import in the process. Saving or deleting a
+        Genre clears the registry (see tmdb.signals).
 
-    def _fetch_season_image(self):
-        if not hasattr(self, "img_path"):
-            print(f"\n{self} is missing the img_path attr.\n")
-            return
-        
-        if self.img_path == "/missing.png":
-            print(f"\n{self} doesn't have an image, fetch cancelled.\n")
-            return
-        
-        try:
-            response = ContentData._fetch_image(self.img_path)
+        Only committed genres are ever registered, a transaction that is
+        rolled back can't leave pks behind that no longer exist. Loaded
+        inside a transaction, the genres are registered once it commits.
+        """
+
+        registry = cls._registry
+        if registry is None:
+            registry = {genre.tmdb_id: genre for genre in cls.objects.all()}
+            transaction.on_commit(lambda: cls._register(registry, loaded=True))
+
+        return registry
+
+
+    @classmethod
+    def invalidate_registry(cls) -> None:
+        with cls._registry_lock:
+            cls._registry = None
+
+
+    @classmethod
+    def _register(cls, genres: dict[int, "Genre"], loaded: bool = False) -> None:
+        # Runs on commit, see get_registry. Genres created while the
+        # registry was cleared are in the next load instead
+        with cls._registry_lock:
+            if cls._registry is None:
+                if loaded:
+                    cls._registry = genres
+            else:
+                cls._registry.update(genres)
+
+
+    @classmethod
+    def resolve_genres(cls, genres: list[dict]) -> dict[int, "Genre"]:
+        """
+        Makes sure every genre in genres exists and returns them along with
+        every registered one.
+
+        Genres that aren't registered yet are created with one bulk insert
+        and read back with one query. They are only registered once the
+        caller's transaction commits.
+        """
+
+        registry = cls.get_registry()
+        missing = {
+            genre["id"]: genre["name"] for genre in genres
+            if genre["id"] not in registry
+        }
+        if not missing:
+            return registry
+
+        # TODO: Update to handle logging new genre creations when logging is added
+        cls.objects.bulk_create(
+            [Genre(tmdb_id=id, name=name) for id, name in missing.items()],
+            ignore_conflicts=True
+        )
+        # ignore_conflicts doesn't set pks, so read the rows back
+        created = {
+            genre.tmdb_id: genre
+            for genre in cls.objects.filter(tmdb_id__in=missing)
+        }
+        transaction.on_commit(lambda: cls._register(created))
+
+        return {**registry, **created}
+
+
+    @staticmethod
+    def process_all_genres(genres: list[dict], object: object) -> None:
+        """
+        Links object to each genre in the genres list.
+
+        This method is intended for use in conjunction with other TMDB methods,
+        and therefore does not save the instance to avoid redundancy.
+
+        Parameters
+        ----------
+        genres : list[dict]
+            id: int
+                the genre.tmdb_id
+            name: str
+                the genre.name
+        object : object
+            a saved instance with a genres M2M to Genre
+        
+        Returns
+        -------
+        None
+        """
+
+        Genre.link_all_genres([(object, genres)])
+
+
+    @staticmethod
+    def link_all_genres(objects_genres: list[tuple[object, list[dict]]]) -> None:
+        """
+        Links a batch of objects to their genres with one insert per M2M table.
+
+        Existing links are read first (one query per table) and left alone,
+        so re-linking unchanged titles doesn't write anything.
+
+        Parameters
+        ----------
+        objects_genres : list[tuple[object, list[dict]]]
+            each saved instance paired with its TMDB genres list
+        
+        Returns
+        -------
+        None
+        """
+
+        registry = Genre.resolve_genres(
+            [genre for _, genres in objects_genres for genre in genres]
+        )
+
+        # through model -> {(object pk, genre pk)}, and its two FK columns
+        links: dict[type[models.Model], set[tuple[int, int]]] = {}
+        columns: dict[type[models.Model], tuple[str, str]] = {}
+        for object, genres in objects_genres:
+            field = object._meta.get_field("genres")
+            through = field.remote_field.through
+            columns[through] = (
+                f"{field.m2m_field_name()}_id",
+                f"{field.m2m_reverse_field_name()}_id",
+            )
+            links.setdefault(through, set()).update(
+                (object.pk, registry[genre["id"]].pk) for genre in genres
+            )
+
+        for through, pairs in links.items():
+            source, target = columns[through]
+            existing = set(through.objects.filter(**{
+                f"{source}__in": {object_pk for object_pk, _ in pairs}
+            }).values_list(source, target))
+            missing = pairs - existing
+            if missing:
+                through.objects.bulk_create(
+                    [
+                        through(**{source: object_pk, target: genre_pk})
+                        for object_pk, genre_pk in missing
+                    ],
+                    ignore_conflicts=True
+                )
+    
+
+class TMDBMovie(ContentData):
+    content = models.OneToOneField(
+        WatchableContent,
+        on_delete=models.CASCADE,
+        related_name="tmdb_movie"
+    )
+
+    CONTENT_MODEL = WatchableContent
+    IMAGE_SIZES = POSTER_SIZES
+    LEGACY_IMG_DIR = "tmdb/movie"
+    # Movies and series share WatchableContent
+    MATCH_FIELDS = ("tmdb_id", "content_type")
+
+
+    def __str__(self):
+        return f"{self.content.name}"
+
+
+    @classmethod
+    def add_movie_from_json(cls, data: dict) -> bool:
+        """
+        Adds or updates the WatchableContent for data and links its TMDBMovie.
+
+        Parameters
+        ----------
+        data : dict
+            field data for adding the content
+
+        Returns
+        -------
+        bool
+        """
+
+        if not type(data) == dict:
+            return False
+
+        # Only downloads the img if it isn't already stored
+        return bool(cls.bulk_add_from_json([data]))
+
+
+    @classmethod
+    def fetch_one_movie_by_id(cls, id: str) -> bool:
+        responsejson = ContentData._fetch_json("/movie/%s" % id)
+        if not responsejson:
+            return False
+
+        [(_, added)] = cls.bulk_add_from_json([responsejson])
+        # (optional) Write to JSON to reduce API usage
+        normalized_name = added.name.replace(":", " -")
+        ContentData._write_to_json(responsejson, f"Movies/{normalized_name}")
+        return True
+
+
+    @classmethod
+    def sync_changed(cls,
+                     ids: list[int],
+                     pool: ThreadPoolExecutor,
+                     batch_size: int = 500
+                   ) -> int:
+        """
+        Re-fetches the changed movies we already have and updates them.
+
+        Payloads are fetched on pool, bypassing the cache TTL, and written
+        batch_size at a time with bulk_add_from_json, which only updates
+        the fields that differ.
+
+        Returns
+        -------
+        int
+            how many movies were updated
+        """
+
+        existing = list(cls.objects.filter(
+            tmdb_id__in=ids
+        ).values_list("tmdb_id", flat=True))
+
+        payloads = pool.map(
+            metrics.bind(
+                lambda id: ContentData._fetch_json("/movie/%s" % id, refresh=True)
+            ),
+            existing
+        )
+
+        synced = 0
+        batch = []
+        for payload in payloads:
+            if payload:
+                batch.append(payload)
+            if len(batch) >= batch_size:
+                synced += len(cls.bulk_add_from_json(batch, pool))
+                batch = []
+        synced += len(cls.bulk_add_from_json(batch, pool))
+
+        return synced
+
+
+    @staticmethod
+    def _fields_from_data(movie_data: dict) -> dict:
+        # TODO: fetch movie.credits to get cast & crew
+        return {
+            "name": movie_data["title"] or "missing",
+            "overview": movie_data["overview"] or "missing",
+            "tmdb_id": movie_data["id"],
+            "img_path": movie_data["poster_path"] or "/missing.png",
+            "cast": None,
+            "crew": None,
+            "content_type": "Movie",
+            "release_date": movie_data["release_date"] or "missing",
+            "duration": movie_data["runtime"] or 999,
+        }
+
+
+class TMDBTVSeries(ContentData):
+    content = models.OneToOneField(
+        WatchableContent,
+        on_delete=models.CASCADE,
+        related_name="tmdb_series"
+    )
+    # WatchableContent has the season count (duration) and first_air_date
+    # (release_date), but not these
+    total_episodes = models.PositiveIntegerField()
+    last_air_date = models.CharField(max_length=10) # "YYYY-MM-DD"
+
+    CONTENT_MODEL = WatchableContent
+    IMAGE_SIZES = POSTER_SIZES
+    LEGACY_IMG_DIR = "tmdb/tv/series"
+    MATCH_FIELDS = ("tmdb_id", "content_type")
+    STEP_LEVEL = "series"
+
+
+    def __str__(self) -> str:
+        return f"Series: {self.content.name} has {self.content.duration} season(s)."
+
+
+    @classmethod
+    def add_series_from_json(cls, data: dict) -> bool:
+        """
+        Adds or updates the WatchableContent for data and links its
+        TMDBTVSeries, then adds any seasons already dumped to JSON.
+
+        Parameters
+        ----------
+        data : dict
+            field data for adding the content
+
+        Returns
+        -------
+        bool
+        """
+
+        if not type(data) == dict:
+            return False
+
+        # Only downloads the img if it isn't already stored
+        [(new_series, added)] = cls.bulk_add_from_json([data])
+        new_series.season_data = data.get("seasons", [])
+        TMDBTVSeason.add_all_seasons_from_json(new_series, added)
+
+        return True
+
+
+    @classmethod
+    def get_one_series_by_tmdb_id(cls, id: int):
+        try:
+            this_series = TMDBTVSeries.objects.select_related(
+                "content"
+            ).get(tmdb_id__exact=id)
+            return this_series
+        except cls.DoesNotExist:
+            print(f"\nNo TV Series found with TMDB ID: {id}.\n")
+            return None
+
+
+    @classmethod
+    def fetch_one_series_by_tmdb_id(cls,
+                                    id: str,
+                                    max_workers: int = MAX_WORKERS,
+                                    bundled: bool = True,
+                                    resume: bool = True,
+                                    commit_batch: int = transactions.COMMIT_BATCH_SIZE
+                                  ) -> bool:
+        """
+        Fetches a series, then all of its seasons and episodes.
+
+        Parameters
+        ----------
+        id : str
+            the series tmdb_id
+        max_workers : int
+            cap on concurrent TMDB requests, 1 fetches everything serially
+        bundled : bool
+            fetch seasons SEASONS_PER_REQUEST at a time through
+            append_to_response and build episodes from the season payloads,
+            instead of one request per season and per episode
+        resume : bool
+            checkpoint the fetch as an IngestRun, picking up the last
+            unfinished run of this series where it stopped
+        commit_batch : int
+            seasons written per transaction, a season that fails is rolled
+            back on its own. 0 commits every write on its own
+
+        Returns
+        -------
+        bool
+            False if the series itself couldn't be fetched
+        """
+
+        with metrics.collect() as run_metrics:
+            responsejson = ContentData._fetch_json("/tv/%s" % id)
+            if not responsejson:
+                return False
+
+            run = IngestRun.start("series", responsejson["id"]) if resume else None
+            try:
+                with transactions.batch(commit_batch):
+                    cls._ingest_series(responsejson, max_workers, bundled, run)
+            except BaseException:
+                # KeyboardInterrupt too, so the run shows why it stopped
+                if run:
+                    run.finish(traceback.format_exc(), run_metrics.report())
+                raise
+
+        if run:
+            run.finish(report=run_metrics.report())
+        return True
+
+
+    @classmethod
+    def _ingest_series(cls,
+                       series_data: dict,
+                       max_workers: int,
+                       bundled: bool,
+                       run: "IngestRun | None"
+                     ) -> None:
+        [(this_series, added)] = cls._bulk_write([series_data], run=run)
+        # This seasons list has all the data we need to go fetch
+        # all of the season details for this series
+        this_series.season_data = series_data.get("seasons", [])
+        this_series.run = run
+        # Every dump of the series is saved at once, when it is all fetched
+        with archives.series(added.name):
+            # (optional) Write to JSON to reduce API usage
+            archives.write(added.name, archives.series_member(added.name), series_data)
+
+            if max_workers <= 1 and not bundled:
+                # Now fetch the season data, which will fetch the episode data
+                TMDBTVSeason.fetch_all_seasons_for_series(this_series, added)
+            else:
+                with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+                    if bundled:
+                        TMDBTVSeason.fetch_all_seasons_for_series_bundled(
+                            this_series,
+                            added,
+                            pool
+                        )
+                    else:
+                        TMDBTVSeason.fetch_all_seasons_for_series_concurrently(
+                            this_series,
+                            added,
+                            pool
+                        )
+
+        if run:
+            # Done once every season is, seasons left behind are resumed
+            run.complete("series", this_series.tmdb_id, [
+                ("season", season["id"]) for season in this_series.season_data
+                if "id" in season
+            ])
+
+
+    @staticmethod
+    def plan_season_requests(season_numbers: list[int],
+                             batch_size: int = SEASONS_PER_REQUEST
+                           ) -> list[list[int]]:
+        """
+        Splits season_numbers into the fewest append_to_response batches.
+
+        Each batch is one /tv/{id} request carrying up to batch_size
+        season payloads, each of which already includes its episode list.
+        """
+
+        return [
+            season_numbers[i:i + batch_size]
+            for i in range(0, len(season_numbers), batch_size)
+        ]
+
+
+    @classmethod
+    def sync_changed(cls,
+                     ids: list[int],
+                     start: date,
+                     end: date,
+                     pool: ThreadPoolExecutor
+                   ) -> int:
+        """
+        Re-fetches the changed series we already have and updates them.
+
+        Each series' own change list says which seasons changed, episode
+        changes roll up into their season. Only those seasons are requested,
+        bundled onto the series request, so an unchanged season costs
+        nothing. Series, seasons and episodes are updated field by field
+        through the bulk paths.
+
+        Returns
+        -------
+        int
+            how many series were updated
+        """
+
+        existing = list(cls.objects.filter(
+            tmdb_id__in=ids
+        ).values_list("tmdb_id", flat=True))
+
+        change_lists = pool.map(
+            metrics.bind(lambda id: ContentData._fetch_json(
+                "/tv/%s/changes" % id,
+                {"start_date": start.isoformat(), "end_date": end.isoformat()},
+                refresh=True
+            )),
+            existing
+        )
+        requests_to_make = []
+        for id, change_list in zip(existing, change_lists):
+            batches = cls.plan_season_requests(
+                cls._changed_season_numbers(change_list)
+            ) or [[]]
+            requests_to_make.extend((id, batch) for batch in batches)
+
+        bundles = pool.map(
+            metrics.bind(lambda request: ContentData._fetch_json(
+                "/tv/%s" % request[0],
+                {"append_to_response": ",".join(
+                    f"season/{number}" for number in request[1]
+                )} if request[1] else None,
+                refresh=True
+            )),
+            requests_to_make
+        )
+
+        # tmdb_id -> (series payload, changed season payloads)
+        changed: dict[int, tuple[dict, list[dict]]] = {}
+        for (id, batch), bundle in zip(requests_to_make, bundles):
+            if not bundle:
+                continue
+            _, seasons_data = changed.setdefault(id, (bundle, []))
+            seasons_data.extend(
+                bundle[f"season/{number}"] for number in batch
+                if bundle.get(f"season/{number}")
+            )
+
+        if not changed:
+            return 0
+
+        with transactions.batch():
+            pairs = cls.bulk_add_from_json(
+                [payload for payload, _ in changed.values()],
+                pool
+            )
+            for (_, django_series), (_, seasons_data) in zip(pairs, changed.values()):
+                with archives.series(django_series.name):
+                    TMDBTVSeason._ingest_seasons_with_episodes(
+                        seasons_data,
+                        django_series,
+                        pool
+                    )
+
+        return len(pairs)
+
+
+    @staticmethod
+    def _changed_season_numbers(change_list: dict | None) -> list[int]:
+        numbers = set()
+        for change in (change_list or {}).get("changes", []):
+            if not change.get("key") == "season":
+                continue
+            for item in change.get("items", []):
+                value = item.get("value")
+                if isinstance(value, dict) and "season_number" in value:
+                    numbers.add(value["season_number"])
+
+        return sorted(numbers)
+
+
+    @staticmethod
+    def _fields_from_data(series_data: dict) -> dict:
+        return {
+            "name": series_data["name"] or "missing",
+            "overview": series_data["overview"] or "missing",
+            "tmdb_id": series_data["id"],
+            "img_path": series_data["poster_path"] or "/missing.png",
+            "cast": None,
+            "crew": None,
+            "content_type": "TV",
+            "release_date": series_data["first_air_date"] or "missing",
+            "duration": series_data["number_of_seasons"] or 999,
+        }
+
+
+    @classmethod
+    def _tmdb_fields_from_data(cls, series_data: dict) -> dict:
+        return {
+            **super()._tmdb_fields_from_data(series_data),
+            "total_episodes": series_data["number_of_episodes"] or 999,
+            "last_air_date": series_data["last_air_date"] or "missing",
+        }
+
+
+class TMDBTVSeason(ContentData):
+    content = models.OneToOneField(
+        TVSeason,
+        on_delete=models.CASCADE,
+        related_name="tmdb"
+    )
+
+    CONTENT_MODEL = TVSeason
+    IMAGE_SIZES = POSTER_SIZES
+    LEGACY_IMG_DIR = "tmdb/tv/season"
+    STEP_LEVEL = "season"
+
+
+    def __str__(self) -> str:
+        return f"This is {self.content.name} of {self.content.series}"
+
+
+    @classmethod
+    def add_all_seasons_from_json(cls,
+                                  series: TMDBTVSeries,
+                                  django_series: WatchableContent
+                                ) -> None:
+        # The series' archive is read once for all of them
+        with archives.series(django_series.name):
+            for season in series.season_data:
+                cls._add_season_from_json(season, series, django_series)
+
+
+    @classmethod
+    def _add_season_from_json(cls,
+                              data: dict,
+                              series: TMDBTVSeries,
+                              django_series: WatchableContent
+                            ) -> bool:
+        existing_data = archives.read(
+            django_series.name,
+            archives.season_member(data["name"]),
+            payloads.Season
+        )
+        if not existing_data:
+            return False
+
+        # Only downloads the img if it isn't already stored
+        [(new_season, added)] = cls._bulk_write(
+            [existing_data],
+            series=django_series
+        )
+        new_season.episode_data = existing_data["episodes"]
+        TMDBTVEpisode.add_all_episodes_from_json(new_season, added)
+
+        return True
+
+
+    # Called when adding entire TV Series
+    @classmethod
+    def fetch_all_seasons_for_series(cls, series: TMDBTVSeries, django_series: WatchableContent):
+        if not hasattr(series, "season_data"):
+            print(f"\nThis series is missing season data:\n{series}\n")
+            return
+
+        for number in cls._season_numbers(series):
+            cls._fetch_one_season_for_series_with_season_number(
+                series,
+                django_series,
+                number
+            )
+
+
+    # Called when TV Season chosen from TMDB FetchForm
+    @classmethod
+    def fetch_one_season_by_series_id(cls,
+                                      series_id: str,
+                                      season_number: str
+                                    ) -> bool:
+        # Just get the series and call existing methods
+        series = TMDBTVSeries.get_one_series_by_tmdb_id(int(series_id))
+        if not series:
+            print("Can't fetch season with not found series")
+            return False
+
+        with transactions.batch(), archives.series(series.content.name):
+            return cls._fetch_one_season_for_series_with_season_number(
+                series,
+                series.content,
+                int(season_number)
+            )
+
+
+    @classmethod
+    def _fetch_one_season_for_series_with_season_number(
+                                                          cls,
+                                                          series: TMDBTVSeries,
+                                                          django_series: WatchableContent,
+                                                          season_number: int
+                                                       ) -> bool:
+        # The requests below don't hold the write lock for the rows
+        # written before them
+        transactions.release()
+        responsejson = ContentData._fetch_json(
+            "/tv/{}/season/{}".format(series.tmdb_id, season_number)
+        )
+        if not responsejson:
+            return False
+
+        run = getattr(series, "run", None)
+        # Now grab all the episode data for this season. Every request and
+        # download is done before the season's savepoint, which only writes
+        episodes_data = TMDBTVEpisode.fetch_episodes_for_season_data(
+            series.tmdb_id,
+            responsejson,
+            run
+        )
+        TMDBTVSeason.prefetch_images([responsejson], run=run)
+        TMDBTVEpisode.prefetch_images(episodes_data, run=run)
+
+        with transactions.season(f"season {season_number} of {django_series.name}", run):
+            this_season, added = TMDBTVSeason._ingest_season(
+                responsejson,
+                django_series,
+                run=run
+            )
+            TMDBTVEpisode._bulk_ingest_episodes(episodes_data, added, run=run)
+            this_season._checkpoint()
+
+        return True
+
+
+    # Called when adding entire TV Series with max_workers > 1
+    @classmethod
+    def fetch_all_seasons_for_series_concurrently(
+                                                  cls,
+                                                  series: TMDBTVSeries,
+                                                  django_series: WatchableContent,
+                                                  pool: ThreadPoolExecutor
+                                                 ) -> None:
+        """
+        Fetches every season of series, then every episode of every season.
+
+        Requests and image downloads run on pool, but rows are written from
+        the calling thread in season/episode order, so DB writes never race.
+
+        Parameters
+        ----------
+        series : TMDBTVSeries
+            must have season_data from fetch_one_series_by_tmdb_id
+        django_series : WatchableContent
+            the series the new seasons belong to
+        pool : ThreadPoolExecutor
+            shared pool that caps concurrent TMDB requests
+
+        Returns
+        -------
+        None
+        """
+
+        if not hasattr(series, "season_data"):
+            print(f"\nThis series is missing season data:\n{series}\n")
+            return
+
+        season_numbers = cls._season_numbers(series)
+
+        # map yields results in submission order
+        season_jsons = pool.map(
+            metrics.bind(lambda number: ContentData._fetch_json(
+                "/tv/{}/season/{}".format(series.tmdb_id, number)
+            )),
+            season_numbers
+        )
+
+        run = getattr(series, "run", None)
+        # Waiting on the requests doesn't hold the write lock for the series
+        transactions.release()
+        season_jsons = [season_json for season_json in season_jsons if season_json]
+        cls.prefetch_images(season_jsons, pool, run)
+        seasons: list[tuple[TMDBTVSeason, TVSeason]] = [
+            cls._ingest_season(season_json, django_series, pool, run)
+            for season_json in season_jsons
+        ]
+
+        TMDBTVEpisode.fetch_all_episodes_for_seasons_concurrently(seasons, pool)
+        for this_season, _ in seasons:
+            this_season._checkpoint()
+
+
+    # Called when adding entire TV Series with bundled=True
+    @classmethod
+    def fetch_all_seasons_for_series_bundled(
+                                             cls,
+                                             series: TMDBTVSeries,
+                                             django_series: WatchableContent,
+                                             pool: ThreadPoolExecutor
+                                            ) -> None:
+        """
+        Fetches every season of series with as few requests as possible.
+
+        Seasons are requested SEASONS_PER_REQUEST at a time through
+        append_to_response, and episodes are built straight from the season
+        payloads. Only episodes missing EPISODE_FIELDS are fetched on their
+        own. Rows are written from the calling thread in season order.
+
+        Parameters
+        ----------
+        series : TMDBTVSeries
+            must have season_data from fetch_one_series_by_tmdb_id
+        django_series : WatchableContent
+            the series the new seasons belong to
+        pool : ThreadPoolExecutor
+            shared pool that caps concurrent TMDB requests
+
+        Returns
+        -------
+        None
+        """
+
+        if not hasattr(series, "season_data"):
+            print(f"\nThis series is missing season data:\n{series}\n")
+            return
+
+        season_numbers = cls._season_numbers(series)
+
+        batches = TMDBTVSeries.plan_season_requests(season_numbers)
+        # Waiting on the requests doesn't hold the write lock for the series
+        transactions.release()
+        # map yields results in submission order, all of them are in before
+        # the first write
+        bundles = list(pool.map(
+            metrics.bind(lambda batch: ContentData._fetch_json(
+                "/tv/%s" % series.tmdb_id,
+                {"append_to_response": ",".join(
+                    f"season/{number}" for number in batch
+                )}
+            )),
+            batches
+        ))
+
+        for batch, bundle in zip(batches, bundles):
+            if not bundle:
+                continue
+            season_jsons = []
+            for number in batch:
+                season_json = bundle.get(f"season/{number}")
+                if not season_json:
+                    print(f"\nSeason {number} missing from bundle for {django_series.name}\n")
+                    continue
+                season_jsons.append(season_json)
+
+            cls._ingest_seasons_with_episodes(
+                season_jsons,
+                django_series,
+                pool,
+                getattr(series, "run", None)
+            )
+
+
+    @staticmethod
+    def _season_numbers(series: TMDBTVSeries) -> list[int]:
+        # Seasons a resumed run already finished aren't fetched at all
+        run = getattr(series, "run", None)
+        season_numbers = []
+        for season in series.season_data:
+            if run and run.is_done("season", season.get("id")):
+                continue
+            try:
+                season_numbers.append(season["season_number"])
+            except KeyError:
+                print(f"\nThis season doesn't have a number:\n{season}\n")
+
+        return season_numbers
+
+
+    def _checkpoint(self) -> None:
+        # Done once every episode is, see IngestRun.complete
+        run = getattr(self, "run", None)
+        if run:
+            run.complete("season", self.tmdb_id, [
+                ("episode", episode["id"]) for episode in self.episode_data
+                if "id" in episode
+            ])
+
+
+    @classmethod
+    def _ingest_season(cls,
+                       season_data: dict,
+                       django_series: WatchableContent,
+                       pool: ThreadPoolExecutor | None = None,
+                       run: "IngestRun | None" = None
+                     ) -> tuple["TMDBTVSeason", TVSeason]:
+        [(this_season, added)] = cls._bulk_ingest_seasons(
+            [season_data],
+            django_series,
+            pool,
+            run
+        )
+
+        return (this_season, added)
+
+
+    @classmethod
+    def _bulk_ingest_seasons(cls,
+                             seasons_data: list[dict],
+                             django_series: WatchableContent,
+                             pool: ThreadPoolExecutor | None = None,
+                             run: "IngestRun | None" = None
+                           ) -> list[tuple["TMDBTVSeason", TVSeason]]:
+        """
+        Writes a batch of season payloads of django_series.
+
+        Costs a constant number of queries however many seasons are passed.
+        Each returned TMDBTVSeason has the episode_data of its payload and
+        the run its episodes are checkpointed in.
+        """
+
+        pairs = cls._bulk_write(seasons_data, pool, run=run, series=django_series)
+
+        with archives.series(django_series.name):
+            for (season, added), data in zip(pairs, seasons_data):
+                # This episodes list has all the data we need to go fetch
+                # all of the episode details for this season
+                season.episode_data = data["episodes"]
+                season.run = run
+                # (optional) Write to JSON to reduce API usage
+                archives.write(django_series.name, archives.season_member(added.name), data)
+
+        return pairs
+
+
+    @classmethod
+    def _ingest_seasons_with_episodes(cls,
+                                      seasons_data: list[dict],
+                                      django_series: WatchableContent,
+                                      pool: ThreadPoolExecutor,
+                                      run: "IngestRun | None" = None
+                                    ) -> None:
+        """
+        Writes season payloads of django_series with the episodes they carry.
+
+        Episodes missing any of EPISODE_FIELDS are fetched on their own.
+        Posters, stills and those requests are all done before the first
+        season's savepoint, so the savepoints only write.
+        """
+
+        cls.prefetch_images(seasons_data, pool, run)
+        seasons = cls._bulk_ingest_seasons(seasons_data, django_series, pool, run)
+        episodes = [
+            TMDBTVEpisode.episodes_from_season_data(season, pool)
+            for season, _ in seasons
+        ]
+        TMDBTVEpisode.prefetch_images(
+            [data for episodes_data in episodes for data in episodes_data],
+            pool,
+            run
+        )
+
+        for (this_season, added), episodes_data in zip(seasons, episodes):
+            with transactions.season(f"{added.name} of {django_series.name}", run):
+                TMDBTVEpisode._bulk_ingest_episodes(episodes_data, added, pool, run)
+                this_season._checkpoint()
+
+
+    @staticmethod
+    def _fields_from_data(season_data: dict) -> dict:
+        return {
+            "name": season_data["name"] or "missing",
+            "overview": season_data["overview"] or "missing",
+            "tmdb_id": season_data["id"],
+            "img_path": season_data["poster_path"] or "/missing.png",
+            "cast": None,
+            "crew": None,
+            "season_number": season_data["season_number"] or 999,
+            "air_date": season_data["air_date"] or "missing",
+        }
+
+
+class TMDBTVEpisode(ContentData):
+    content = models.OneToOneField(
+        TVEpisode,
+        on_delete=models.CASCADE,
+        related_name="tmdb"
+    )
+
+    CONTENT_MODEL = TVEpisode
+    IMAGE_SIZES = STILL_SIZES
+    LEGACY_IMG_DIR = "tmdb/tv/episode"
+    STEP_LEVEL = "episode"
+
+
+    def __str__(self) -> str:
+        return f'Episode #{self.content.episode_number}, titled "{self.content.name}"'
+
+
+    @classmethod
+    def add_all_episodes_from_json(cls,
+                                   season: TMDBTVSeason,
+                                   django_season: TVSeason
+                                ) -> None:
+        episodes_data = []
+        for episode in season.episode_data:
+            existing_data = cls._load_episode_json(episode, django_season)
+            if existing_data:
+                episodes_data.append(existing_data)
+
+        # Only downloads the imgs that aren't already stored
+        cls._bulk_write(episodes_data, season=django_season)
+
+
+    @staticmethod
+    def _load_episode_json(data: dict, django_season: TVSeason) -> dict | None:
+        return archives.read(
+            django_season.series.name,
+            archives.episode_member(django_season.name, data["episode_number"]),
+            payloads.Episode
+        )
+
+
+    @staticmethod
+    def fetch_episodes_for_season_data(series_id: int,
+                                       season_data: dict,
+                                       run: "IngestRun | None" = None
+                                     ) -> list[dict]:
+        # One request per episode, in episode order. Episodes a resumed run
+        # already wrote aren't fetched at all
+        episodes_data = []
+        for episode in season_data["episodes"]:
+            if run and run.is_done("episode", episode.get("id")):
+                continue
+            try:
+                url_ext = "/tv/{0}/season/{1}/episode/{2}".format(
+                    series_id,
+                    season_data["season_number"],
+                    episode["episode_number"]
+                )
+            except KeyError:
+                print(f"\nThis episode doesn't have a number:\n{episode}\n")
+                continue
+            responsejson = ContentData._fetch_json(url_ext)
+            if responsejson:
+                episodes_data.append(responsejson)
+
+        return episodes_data
+
+
+    # Called from TMDBTVSeason.fetch_all_seasons_for_series_concurrently
+    @classmethod
+    def fetch_all_episodes_for_seasons_concurrently(
+                                                    cls,
+                                                    seasons: list[tuple[TMDBTVSeason, TVSeason]],
+                                                    pool: ThreadPoolExecutor
+                                                   ) -> None:
+        """
+        Fetches every episode of every season in one fan-out on pool.
+
+        Episodes are written from the calling thread a season at a time,
+        in season/episode order. Their stills are all downloaded on pool
+        before the first one is written.
+
+        Parameters
+        ----------
+        seasons : list[tuple[TMDBTVSeason, TVSeason]]
+            each season with episode_data, paired with its TVSeason
+        pool : ThreadPoolExecutor
+            shared pool that caps concurrent TMDB requests
+
+        Returns
+        -------
+        None
+        """
+
+        episodes = []
+        for season, django_season in seasons:
+            if not hasattr(season, "episode_data"):
+                print(f"\nThis season is missing episode data:\n{season}\n")
+                continue
+            for episode in cls._pending_episodes(season):
+                try:
+                    episodes.append(
+                        (season, django_season, episode["episode_number"])
+                    )
+                except KeyError:
+                    print(f"\nThis episode doesn't have a number:\n{episode}\n")
+
+        # map yields results in submission order
+        episode_jsons = pool.map(
+            metrics.bind(lambda episode: ContentData._fetch_json(
+                cls._episode_url(episode[0], episode[2])
+            )),
+            episodes
+        )
+
+        # Waiting on the requests doesn't hold the write lock for the seasons
+        transactions.release()
+        # TVSeason pk -> (season, TVSeason, episode payloads), in season order
+        by_season: dict[int, tuple[TMDBTVSeason, TVSeason, list[dict]]] = {}
+        for (season, django_season, _), episode_json in zip(episodes, episode_jsons):
+            if not episode_json:
+                continue
+            by_season.setdefault(
+                django_season.pk,
+                (season, django_season, [])
+            )[2].append(episode_json)
+
+        # Every still is stored before the first season's savepoint
+        cls.prefetch_images(
+            [data for _, _, episodes_data in by_season.values() for data in episodes_data],
+            pool,
+            getattr(seasons[0][0], "run", None) if seasons else None
+        )
+        for season, django_season, episodes_data in by_season.values():
+            run = getattr(season, "run", None)
+            with transactions.season(
+                f"{django_season.name} of {django_season.series.name}",
+                run
+            ):
+                cls._bulk_ingest_episodes(
+                    episodes_data,
+                    django_season,
+                    pool,
+                    run
+                )
+                season._checkpoint()
+
+
+    @classmethod
+    def episodes_from_season_data(cls,
+                                  season: TMDBTVSeason,
+                                  pool: ThreadPoolExecutor
+                                ) -> list[dict]:
+        """
+        The payload of every episode in season.episode_data, without
+        refetching it.
+
+        Episodes missing any of EPISODE_FIELDS fall back to their own
+        request on pool.
+        """
+
+        pending = cls._pending_episodes(season)
+        incomplete = [
+            episode for episode in pending
+            if "episode_number" in episode
+            and not all(field in episode for field in EPISODE_FIELDS)
+        ]
+        if incomplete:
+            # The requests don't hold the write lock for the season
+            transactions.release()
+        fallbacks = dict(zip(
+            [episode["episode_number"] for episode in incomplete],
+            pool.map(
+                metrics.bind(lambda episode: ContentData._fetch_json(
+                    cls._episode_url(season, episode["episode_number"])
+                )),
+                incomplete
+            )
+        ))
+
+        episodes_data = []
+        for episode in pending:
+            if not all(field in episode for field in EPISODE_FIELDS):
+                episode = fallbacks.get(episode.get("episode_number"))
+            if episode:
+                episodes_data.append(episode)
+
+        return episodes_data
+
+
+    @staticmethod
+    def _pending_episodes(season: TMDBTVSeason) -> list[dict]:
+        # Episodes a resumed run already wrote aren't fetched at all
+        run = getattr(season, "run", None)
+        if not run:
+            return season.episode_data
+
+        return [
+            episode for episode in season.episode_data
+            if not run.is_done("episode", episode.get("id"))
+        ]
+
+
+    @staticmethod
+    def _episode_url(season: TMDBTVSeason, episode_number: int) -> str:
+        # season.content and its series are set by _bulk_write, so this
+        # is safe to call from pool threads
+        return "/tv/{0}/season/{1}/episode/{2}".format(
+            season.content.series.tmdb_id,
+            season.content.season_number,
+            episode_number
+        )
+
+
+    @classmethod
+    def _bulk_ingest_episodes(cls,
+                              episodes_data: list[dict],
+                              django_season: TVSeason,
+                              pool: ThreadPoolExecutor | None = None,
+                              run: "IngestRun | None" = None
+                            ) -> list["TMDBTVEpisode"]:
+        """
+        Writes episode payloads of django_season.
+
+        Costs a constant number of queries however many episodes are passed.
+        """
+
+        if not episodes_data:
+            return []
+
+        pairs = cls._bulk_write(episodes_data, pool, run=run, season=django_season)
+
+        with archives.series(django_season.series.name):
+            for (_, added), data in zip(pairs, episodes_data):
+                # (optional) Write to JSON to reduce API usage
+                archives.write(
+                    django_season.series.name,
+                    archives.episode_member(django_season.name, added.episode_number),
+                    data
+                )
+
+        return [episode for episode, _ in pairs]
+
+
+    @staticmethod
+    def _fields_from_data(episode_data: dict) -> dict:
+        return {
+            "name": episode_data["name"] or "missing",
+            "overview": episode_data["overview"] or "missing",
+            "tmdb_id": episode_data["id"],
+            "img_path": episode_data["still_path"] or "/missing.png",
+            "cast": {"cast": episode_data["guest_stars"]} or {"cast": None},
+            "crew": {"crew": episode_data["crew"]} or {"crew": None},
+            "episode_number": episode_data["episode_number"] or 999,
+            "air_date": episode_data["air_date"] or "missing",
+            "runtime": episode_data["runtime"] or 0,
+        }
 
-            if not response:
-                print("Invalid response object")
-                return
 
-            if response.status_code == 200:
-                path = f"src/tmdb/static/tmdb/tv/season{self.img_path}"
-                ContentData._write_image(response, path)
-                
-                return
+class ImageObject(models.Model):
+    """
+    Maps a TMDB image path to its content-addressed copy in the store.
+    """
 
-            print(f"\nFetch Image Bad Response:\n{response.status_code}\n")
+    tmdb_path = models.CharField(max_length=50, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    # Static path, see images.store_path
+    path = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
 
-        except Exception as e:
-            print(f"\nAn exception occurred:\n{e}\n")
-    
+
+    def __str__(self) -> str:
+        return f"{self.tmdb_path} -> {self.path}"
     
+
     @classmethod
-    def add_all_seasons_from_json(cls,
-                                  series: TMDBTVSeries,
-                                  django_series: WatchableContent
-                                ) -> None:
-        for season in series.season_data:
-            cls._add_season_from_json(season, series, django_series)
-            
+    def resolve(cls, tmdb_paths) -> dict[str, str]:
+        """
+        Looks up the stored static path of every TMDB path in one query.
+
+        Paths whose stored file has gone missing from the artwork storage
+        are left out, so the caller downloads them again. They are checked
+        in one batch, see storage.exists_many.
+        """
+
+        if not tmdb_paths:
+            return {}
+
+        paths = dict(cls.objects.filter(
+            tmdb_path__in=tmdb_paths
+        ).values_list("tmdb_path", "path"))
+        existing = storage.exists_many(storage.artwork(), paths.values())
+
+        return {
+            tmdb_path: path for tmdb_path, path in paths.items()
+            if path in existing
+        }
     
+
     @classmethod
-    def _add_season_from_json(cls,
-                              data: dict,
-                              series: TMDBTVSeries,
-                              django_series: WatchableContent
-                            ) -> bool:
-        path = f"src/tmdb/json/TV/{series.name}/{data['name']}.json"
-        if not os.path.isfile(path):
-            return False
-        with open(path, "r", encoding="utf-8") as file:
-            existing_data = json.load(file)
+    def record(cls, results: list[dict]) -> dict[str, str]:
+        """
+        Saves the results of ContentData._download_image in one query.
 
-            if not existing_data:
-                return False
-            
-            new_season = TMDBTVSeason._process_season(existing_data, series)
+        Returns
+        -------
+        dict[str, str]
+            tmdb_path -> static path for every result
+        """
 
-        img_path = f"src/tmdb/static/tmdb/tv/season/{new_season.img_path}"
-        if not os.path.isfile(img_path):
-            new_season._fetch_season_image()
-        
-        added: TVSeason | None = new_season._add_to_djangoflix(django_series)
+        if not results:
+            return {}
+
+        cls.objects.bulk_create(
+            [cls(**result) for result in results],
+            update_conflicts=True,
+            unique_fields=["tmdb_path"],
+            update_fields=["sha256", "size", "path"]
+        )
+
+        return {result["tmdb_path"]: result["path"] for result in results}
+
+
+class SyncWatermark(models.Model):
+    """
+    How far each TMDB change feed has been synced, see `manage.py tmdb_sync`.
+    """
+
+    KIND_CHOICES = {
+        "movie": "Movie",
+        "tv": "TV",
+    }
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, unique=True)
+    # Changes up to and including this day have been applied
+    synced_through = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+    def __str__(self) -> str:
+        return f"{self.kind} synced through {self.synced_through}"
 
-        if added:
-            TMDBTVEpisode.add_all_episodes_from_json(new_season, added)
-            return True
-        
-        return False
-        
 
-    # Called when adding entire TV Series
     @classmethod
-    def fetch_all_seasons_for_series(cls, series: TMDBTVSeries, django_series: WatchableContent):
-        if not hasattr(series, "season_data"):
-            print(f"\nThis series is missing season data:\n{series}\n")
-            return
-        
-        for season in series.season_data:
-            try:
-                cls._fetch_one_season_for_series_with_season_number(
-                    series,
-                    django_series,
-                    season['season_number']
-                )
-            except KeyError:
-                print(f"\nThis season doesn't have a number:\n{season}\n")
-    
+    def get_synced_through(cls, kind: str) -> date | None:
+        watermark = cls.objects.filter(kind=kind).first()
+
+        return watermark.synced_through if watermark else None
+
 
-    # Called when TV Season chosen from TMDB FetchForm
     @classmethod
-    def fetch_one_season_by_series_id(cls, series_id: str, season_number: str):
-        # Just get the series and call existing methods
-        series = TMDBTVSeries.get_one_series_by_tmdb_id(int(series_id))
-        if not series:
-            print("Can't fetch season with not found series")
-            return
-        django_series = WatchableContent.get_one_content_by_tmdb_id(series.tmdb_id)
-        if not django_series:
-            print("Can't fetch season with not found django series")
-            return
-        
-        cls._fetch_one_season_for_series_with_season_number(
-            series,
-            django_series,
-            int(season_number)
+    def advance(cls, kind: str, synced_through: date) -> None:
+        cls.objects.update_or_create(
+            kind=kind,
+            defaults={"synced_through": synced_through}
         )
 
-    
+
+# The IngestJob running on this thread, see IngestJob.run. IngestRun.start
+# links the run it starts or resumes to it
+_job: contextvars.ContextVar["IngestJob | None"] = contextvars.ContextVar(
+    "tmdb_ingest_job",
+    default=None
+)
+
+
+class IngestRun(models.Model):
+    """
+    A resumable fetch_one_series_by_tmdb_id, checkpointed by IngestStep.
+
+    A run that didn't finish (it crashed, was killed or left steps behind)
+    is picked up by the next fetch of the same series, which skips every
+    step it already completed. See `manage.py tmdb_resume`.
+    """
+
+    STATUS_CHOICES = {
+        "running": "Running",
+        "done": "Done",
+        "failed": "Failed",
+    }
+    KIND_CHOICES = {
+        "series": "TV Series",
+    }
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    tmdb_id = models.PositiveBigIntegerField()
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="running",
+        db_index=True
+    )
+    error = models.TextField(null=True, default=None)
+    # metrics.RunMetrics.report, summed over every attempt of the run
+    report = models.JSONField(null=True, default=None)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, default=None)
+
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [models.Index(fields=["kind", "tmdb_id"])]
+
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} {self.tmdb_id} run #{self.pk} ({self.status})"
+
+
     @classmethod
-    def _fetch_one_season_for_series_with_season_number(
-                                                          cls,
-                                                          series: TMDBTVSeries,
-                                                          django_series: WatchableContent,
-                                                          season_number: int
-                                                       ) -> None:
-        try:
-            response = ContentData._fetch_data(
-                "/tv/{}/season/{}".format(series.tmdb_id, season_number)
-            )
-            
-            if not response:
-                print("Invalid response object")
-                return
+    def start(cls, kind: str, tmdb_id: int) -> "IngestRun":
+        """
+        Resumes the newest unfinished run of tmdb_id, or starts a new one.
+        """
 
-            if not response.status_code == 200:
-                print(f"\nBad Response:\n{response.status_code}\n")
-                return
-            
-            responsejson = response.json()
-            this_season = TMDBTVSeason._process_season(responsejson, series)
-            this_season._fetch_season_image()
-            added: TVSeason | None = this_season._add_to_djangoflix(django_series)
-            # (optional) Write to JSON to reduce API usage
-            n_series_name = series.name.replace(":", " -")
-            n_season_name = this_season.name.replace(":", " -")
-            path = f"TV/{n_series_name}/{n_season_name}"
-            ContentData._write_to_json(responsejson, path)
-            # Now grab all the episode data for this season
-            if added:
-                TMDBTVEpisode.fetch_all_episodes_for_season(this_season, added)
-            
-        except json.JSONDecodeError:
-            print("JSON decode failed!")
-
-
-    @classmethod
-    def _process_season(cls, season_data: dict, series: TMDBTVSeries):
-        this_season = TMDBTVSeason.objects.filter(
-            tmdb_id = season_data["id"]
-        ).first()
-
-        if not this_season:
-            this_season = TMDBTVSeason(
-                name=season_data["name"] or "missing",
-                overview=season_data["overview"] or "missing",
-                tmdb_id=season_data["id"],
-                img_path=season_data["poster_path"] or "/missing.png",
-                cast=None,
-                crew=None,
-                season_number=season_data["season_number"] or 999,
-                air_date=season_data["air_date"] or "missing"
+        run = cls.objects.filter(
+            kind=kind,
+            tmdb_id=tmdb_id
+        ).exclude(status="done").order_by("-id").first()
+        if run is None:
+            run = cls.objects.create(kind=kind, tmdb_id=tmdb_id)
+        else:
+            run.status = "running"
+            run.error = None
+            run.finished_at = None
+            run.save(update_fields=["status", "error", "finished_at", "updated_at"])
+
+        job = _job.get()
+        if job is not None:
+            job.ingest_run = run
+            job.save(update_fields=["ingest_run"])
+
+        return run
+
+
+    @classmethod
+    def unfinished_ids(cls, kind: str) -> set[int]:
+        return set(cls.objects.filter(
+            kind=kind
+        ).exclude(status="done").values_list("tmdb_id", flat=True))
+
+
+    def finish(self, error: str | None = None, report: dict | None = None) -> None:
+        done = error is None and self.is_done(self.kind, self.tmdb_id)
+        self.status = "done" if done else "failed"
+        if not done and error is None:
+            error = "Stopped with steps left to do, fetch it again to resume"
+        self.error = error
+        if report:
+            self.report = metrics.merge_reports(self.report, report)
+        self.finished_at = timezone.now()
+        self.save(update_fields=[
+            "status",
+            "error",
+            "report",
+            "finished_at",
+            "updated_at",
+        ])
+
+
+    def _get_steps(self) -> dict[tuple[str, int], "IngestStep"]:
+        # Loaded once, every checkpoint after that also updates this copy
+        if not hasattr(self, "_steps"):
+            self._steps = {
+                (step.level, step.tmdb_id): step for step in self.steps.all()
+            }
+
+        return self._steps
+
+
+    def reset_steps(self) -> None:
+        # For checkpoints that were rolled back, reloads the steps on next use
+        if hasattr(self, "_steps"):
+            del self._steps
+
+
+    def is_done(self, level: str, tmdb_id: int | None) -> bool:
+        step = self._get_steps().get((level, tmdb_id))
+
+        return bool(step and step.done)
+
+
+    def written(self, level: str) -> set[int]:
+        """
+        Returns the tmdb_ids of level whose row and artwork are both saved.
+        """
+
+        return {
+            tmdb_id for (step_level, tmdb_id), step in self._get_steps().items()
+            if step_level == level and step.written and step.image_stored
+        }
+
+
+    def record(self, level: str, images: dict[int, bool], done: bool = False) -> None:
+        """
+        Checkpoints rows of level as written, in one query.
+
+        Parameters
+        ----------
+        level : str
+            one of IngestStep.LEVEL_CHOICES
+        images : dict[int, bool]
+            tmdb_id -> whether its artwork made it into the store
+        done : bool
+            the rows have nothing left to do, true for leaf steps
+
+        Returns
+        -------
+        None
+        """
+
+        steps = [
+            IngestStep(
+                run=self,
+                level=level,
+                tmdb_id=tmdb_id,
+                image_stored=image_stored,
+                written=True,
+                done=done
             )
-        # This episodes list has all the data we need to go fetch
-        # all of the episode details for this season
-        this_season.episode_data = season_data["episodes"]
-        this_season.save()
-        # Seasons don't have genre data, but series requires ID
-        this_season.series = series
-        this_season.save()
-       
-        return this_season
+            for tmdb_id, image_stored in images.items()
+        ]
+        IngestStep.objects.bulk_create(
+            steps,
+            update_conflicts=True,
+            unique_fields=["run", "level", "tmdb_id"],
+            update_fields=["image_stored", "written", "done", "updated_at"]
+        )
+        cached = self._get_steps()
+        for step in steps:
+            cached[(level, step.tmdb_id)] = step
 
 
-class TMDBTVEpisode(ContentData):
-    season = models.ForeignKey(
-        TMDBTVSeason,
+    def complete(self, level: str, tmdb_id: int, children: list[tuple[str, int]]) -> bool:
+        """
+        Marks a written step done once every one of its children is.
+
+        Returns
+        -------
+        bool
+            whether the step is done
+        """
+
+        if self.is_done(level, tmdb_id):
+            return True
+        step = self._get_steps().get((level, tmdb_id))
+        if not step or not all(self.is_done(*child) for child in children):
+            return False
+
+        step.done = True
+        IngestStep.objects.filter(
+            run=self,
+            level=level,
+            tmdb_id=tmdb_id
+        ).update(done=True, updated_at=timezone.now())
+
+        return True
+
+
+class IngestStep(models.Model):
+    """
+    Checkpoint of one series, season or episode of an IngestRun.
+    """
+
+    LEVEL_CHOICES = {
+        "series": "Series",
+        "season": "Season",
+        "episode": "Episode",
+    }
+    # Steps with no children are done as soon as they are written
+    LEAF_LEVEL = "episode"
+
+    run = models.ForeignKey(
+        IngestRun,
         on_delete=models.CASCADE,
-        related_name="episodes",
-        null=True
+        related_name="steps"
     )
-    episode_number = models.PositiveIntegerField()
-    air_date = models.CharField(max_length=10) # "YYYY-MM-DD"
-    runtime = models.PositiveIntegerField()
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES)
+    tmdb_id = models.PositiveBigIntegerField()
+    image_stored = models.BooleanField(default=False)
+    written = models.BooleanField(default=False)
+    # Written, and so is everything below it
+    done = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["run", "level", "tmdb_id"],
+                name="unique_ingest_step"
+            ),
+        ]
 
 
     def __str__(self) -> str:
-        if hasattr(self, "name") and hasattr(self, "episode_number"):
-            return f'Episode #{self.episode_number}, titled "{self.name}"'
-        
-        return "Invalid Episode object."
-    
+        return f"{self.get_level_display()} {self.tmdb_id} of {self.run}"
+
+
+class IngestJob(models.Model):
+    """
+    A queued TMDB fetch or upload, run by `manage.py tmdb_worker`.
+    """
+
+    STATUS_CHOICES = {
+        "queued": "Queued",
+        "running": "Running",
+        "done": "Done",
+        "failed": "Failed",
+    }
+    KIND_CHOICES = {
+        "movie": "Movie",
+        "series": "TV Series",
+        "season": "TV Season",
+        "upload": "JSON Upload",
+        "artwork": "Artwork",
+    }
+    # artwork jobs: type -> the rows whose artwork they restore
+    ARTWORK_MODELS = {
+        "movie": TMDBMovie,
+        "series": TMDBTVSeries,
+        "season": TMDBTVSeason,
+        "episode": TMDBTVEpisode,
+    }
+
+    kind = models.CharField(max_length=15, choices=KIND_CHOICES)
+    # movie/series: {"id"}, season: {"id", "season"},
+    # upload: {"type", "path"} plus {"series"} for season uploads,
+    # artwork: {"type", "ids"}, see ARTWORK_MODELS
+    params = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="queued",
+        db_index=True
+    )
+    error = models.TextField(null=True, default=None)
+    # upload: {"inserted", "updated", "unchanged", "failed"} record counts
+    result = models.JSONField(null=True, default=None)
+    # metrics.RunMetrics.report of the job
+    report = models.JSONField(null=True, default=None)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, default=None)
+    finished_at = models.DateTimeField(null=True, default=None)
+    # Renewed by the worker running the job, see JOB_LEASE
+    heartbeat_at = models.DateTimeField(null=True, default=None)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # series: the run that fetched it, its report is part of the job's
+    ingest_run = models.ForeignKey(
+        IngestRun,
+        null=True,
+        default=None,
+        on_delete=models.SET_NULL,
+        related_name="jobs"
+    )
 
-    def _to_dict(self) -> dict:
-        episode_dict = super()._to_dict()
-        episode_dict["img_path"] = "tmdb/tv/episode" + self.img_path
-        
-        del episode_dict["season"]
 
-        return episode_dict
-    
+    class Meta:
+        ordering = ["-created_at"]
+
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} job #{self.pk} ({self.status})"
     
-    def _add_to_djangoflix(self,
-                           django_season: TVSeason
-                        ) -> TVEpisode | None:
-        try:
-            new_episode = TVEpisode.objects.get(
-                tmdb_id=self.tmdb_id
-            )
-            # Update img_path for view convenience
-            new_episode.img_path = "tmdb/tv/episode" + self.img_path
-            new_episode.save()
-            return new_episode
-        
-        except TVEpisode.MultipleObjectsReturned:
-            print(f"\nMultiple objects were found for {self.name}.\n")
+
+    @property
+    def wait_time(self):
+        if not self.started_at:
             return None
         
-        except TVEpisode.DoesNotExist:
-            data = self._to_dict()
-            new_episode = TVEpisode(**data)
-            new_episode.save()
-            new_episode.add_season(django_season)
-            new_episode.save()
-
-            return new_episode
-    
-    
-    def _fetch_episode_image(self):
-        if not hasattr(self, "img_path"):
-            print(f"\n{self} is missing the img_path attr.\n")
-            return
-        
-        if self.img_path == "/missing.png":
-            print(f"\n{self} doesn't have an image, fetch cancelled.\n")
-            return
+        return self.started_at - self.created_at
+
+
+    @property
+    def run_time(self):
+        if not self.started_at or not self.finished_at:
+            return None
         
-        try:
-            response = ContentData._fetch_image(self.img_path)
+        return self.finished_at - self.started_at
 
-            if not response:
-                print("Invalid response object")
-                return
 
-            if response.status_code == 200:
-                path = f"src/tmdb/static/tmdb/tv/episode{self.img_path}"
-                ContentData._write_image(response, path)
-                
-                return
+    @classmethod
+    def enqueue(cls, kind: str, **params) -> "IngestJob":
+        return cls.objects.create(kind=kind, params=params)
 
-            print(f"\nFetch Image Bad Response:\n{response.status_code}\n")
 
-        except Exception as e:
-            print(f"\nAn exception occurred:\n{e}\n")
-    
-    
     @classmethod
-    def add_all_episodes_from_json(cls,
-                                   season: TMDBTVSeason,
-                                   django_season: TVSeason
-                                ) -> None:
-        for episode in season.episode_data:
-            cls._add_episode_from_json(episode, season, django_season)
-    
-    
+    def claim_next(cls) -> "IngestJob | None":
+        """
+        Marks the oldest queued job as running and returns it.
+
+        The conditional UPDATE means two workers can never claim the same
+        job, which works on SQLite without SELECT ... FOR UPDATE. Jobs whose
+        worker died are queued again first, see requeue_expired.
+        """
+
+        cls.requeue_expired()
+        while True:
+            job = cls.objects.filter(status="queued").order_by("id").first()
+            if not job:
+                return None
+            
+            started_at = timezone.now()
+            claimed = cls.objects.filter(pk=job.pk, status="queued").update(
+                status="running",
+                started_at=started_at,
+                heartbeat_at=started_at,
+                attempts=models.F("attempts") + 1
+            )
+            if claimed:
+                job.status = "running"
+                job.started_at = started_at
+                job.heartbeat_at = started_at
+                job.attempts += 1
+                return job
+
+
     @classmethod
-    def _add_episode_from_json(cls,
-                               data: dict,
-                               season: TMDBTVSeason,
-                               django_season: TVSeason
-                            ) -> TVEpisode | None:
-        path = "src/tmdb/json/TV/{0}/{1}-Episode{2}.json".format(
-            season.series.name,
-            season.name,
-            data["episode_number"]
+    def requeue_expired(cls) -> int:
+        """
+        Queues running jobs again whose worker stopped renewing their lease.
+
+        A job that was already started MAX_JOB_ATTEMPTS times, e.g. because
+        it keeps killing its worker, is failed instead. Each job is updated
+        on the heartbeat it was read with, so a worker that is merely slow
+        and checks in meanwhile keeps its job.
+
+        Returns
+        -------
+        int
+            how many jobs were queued again or failed
+        """
+
+        now = timezone.now()
+        expired = cls.objects.filter(status="running").filter(
+            # Jobs claimed before leases existed never had a heartbeat
+            models.Q(heartbeat_at__lt=now - JOB_LEASE)
+            | models.Q(heartbeat_at__isnull=True)
         )
-        if not os.path.isfile(path):
-            return
-        with open(path, "r", encoding="utf-8") as file:
-            existing_data = json.load(file)
 
-            if not existing_data:
-                return
-            
-            new_episode = TMDBTVEpisode._process_episode(existing_data, season)
+        reclaimed = 0
+        for job in expired:
+            current = cls.objects.filter(
+                pk=job.pk,
+                status="running",
+                heartbeat_at=job.heartbeat_at
+            )
+            if job.attempts < MAX_JOB_ATTEMPTS:
+                reclaimed += current.update(
+                    status="queued",
+                    started_at=None,
+                    heartbeat_at=None
+                )
+                continue
 
-        img_path = f"src/tmdb/static/tmdb/tv/episode/{new_episode.img_path}"
-        if not os.path.isfile(img_path):
-            new_episode._fetch_episode_image()
+            if current.update(
+                status="failed",
+                error=f"The worker stopped while running the job, {job.attempts} times",
+                finished_at=now
+            ):
+                reclaimed += 1
+                job._discard_upload()
 
-        added: TVEpisode | None = new_episode._add_to_djangoflix(django_season)
+        return reclaimed
 
-        return added
-    
+
+    def run(self) -> bool:
+        """
+        Runs the job and records how it finished.
+
+        The job's lease is renewed from another thread for as long as it
+        runs.
+
+        Returns
+        -------
+        bool
+            True if the job is done, False if it failed
+        """
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(stop,), daemon=True)
+        heartbeat.start()
+        token = _job.set(self)
+        try:
+            with metrics.collect() as job_metrics:
+                try:
+                    succeeded = self._dispatch()
+                    error = None if succeeded else "Fetch or upload returned no content"
+                except Exception:
+                    succeeded = False
+                    error = traceback.format_exc()
+        finally:
+            _job.reset(token)
+            stop.set()
+            heartbeat.join()
+
+        self.status = "done" if succeeded else "failed"
+        self.error = error
+        self.report = job_metrics.report()
+        self.finished_at = timezone.now()
+        self.save(update_fields=["status", "error", "result", "report", "finished_at"])
+
+        return succeeded
+
+
+    def _heartbeat(self, stop: threading.Event) -> None:
+        try:
+            while not stop.wait(JOB_LEASE.total_seconds() / 5):
+                try:
+                    IngestJob.objects.filter(pk=self.pk, status="running").update(
+                        heartbeat_at=timezone.now()
+                    )
+                except DatabaseError as e:
+                    # e.g. the job's own writes held the lock too long, the
+                    # lease outlasts a few missed beats
+                    print(f"\nJob heartbeat failed:\n{e}\n")
+        finally:
+            # The thread's own connection
+            connection.close()
     
-    @classmethod
-    def fetch_all_episodes_for_season(cls, season: TMDBTVSeason, django_season: TVSeason):
-        if not hasattr(season, "episode_data"):
-            print(f"\nThis season is missing episode data:\n{season}\n")
-            return
-        
-        for episode in season.episode_data:
-            try:
-                cls._fetch_one_episode_for_season_with_episode_number(
-                    season,
-                    django_season,
-                    episode["episode_number"]
+
+    def _dispatch(self) -> bool:
+        match self.kind:
+            case "movie":
+                return TMDBMovie.fetch_one_movie_by_id(self.params["id"])
+            case "series":
+                return TMDBTVSeries.fetch_one_series_by_tmdb_id(
+                    self.params["id"]
                 )
-            except KeyError:
-                print(f"\nThis episode doesn't have a number:\n{episode}\n")
-                
+            case "season":
+                return TMDBTVSeason.fetch_one_season_by_series_id(
+                    self.params["id"],
+                    self.params["season"]
+                )
+            case "upload":
+                return self._run_upload()
+            case "artwork":
+                return self._run_artwork()
+            case _:
+                raise ValueError(f"Unknown job kind {self.kind}")
+
+
+    def _run_upload(self) -> bool:
+        # uploads builds on the models above, so it can't be imported at the top
+        from .uploads import import_upload
 
-    @classmethod
-    def _fetch_one_episode_for_season_with_episode_number(
-                                                          cls,
-                                                          season: TMDBTVSeason,
-                                                          django_season: TVSeason,
-                                                          episode_number: int
-                                                         ):
         try:
-            response = ContentData._fetch_data(
-                "/tv/{0}/season/{1}/episode/{2}".format(
-                    season.series.tmdb_id,
-                    season.season_number,
-                    episode_number
-                )
+            summary = import_upload(
+                self.params["path"],
+                self.params["type"],
+                self.params.get("series")
             )
-            print(response)
-            if not response:
-                print("Invalid response object")
-                return
+        finally:
+            # Failed jobs aren't run again, their upload would only pile up
+            self._discard_upload()
+        self.result = dict(summary)
 
-            if not response.status_code == 200:
-                print(f"\nBad Response:\n{response.status_code}\n")
-                return
-            
-            responsejson = response.json()
-            this_episode = TMDBTVEpisode._process_episode(responsejson, season)
-            this_episode._fetch_episode_image()
-            this_episode._add_to_djangoflix(django_season)
-            # (optional) Write to JSON to reduce API usage
-            n_series_name = season.series.name.replace(":", " -")
-            n_season_name = season.name.replace(":", " -")
-            path = "TV/{0}/{1}-Episode{2}".format(
-                n_series_name,
-                n_season_name,
-                this_episode.episode_number
-            )
-            ContentData._write_to_json(responsejson, path)
-        
-        except json.JSONDecodeError:
-            print("JSON decode failed!")
-
-
-    @classmethod
-    def _process_episode(cls, episode_data: dict, season: TMDBTVSeason):
-        this_episode = TMDBTVEpisode.objects.filter(
-            tmdb_id=episode_data["id"]
-        ).first()
-        if not this_episode:
-            this_episode = TMDBTVEpisode(
-                name=episode_data["name"] or "missing",
-                overview=episode_data["overview"] or "missing",
-                tmdb_id=episode_data["id"],
-                img_path=episode_data["still_path"] or "/missing.png",
-                cast={"cast": episode_data["guest_stars"]} or {"cast": None},
-                crew={"crew": episode_data["crew"]} or {"crew": None},
-                episode_number=episode_data["episode_number"] or 999,
-                air_date=episode_data["air_date"] or "missing",
-                runtime=episode_data["runtime"] or 0
-            )
-        this_episode.season = season
-        this_episode.save()
+        return summary["inserted"] + summary["updated"] + summary["unchanged"] > 0
+
+
+    def _discard_upload(self) -> None:
+        path = self.params.get("path") if self.kind == "upload" else None
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
+    def _run_artwork(self) -> bool:
+        model = self.ARTWORK_MODELS[self.params["type"]]
+        rows = list(model.objects.select_related("content").filter(
+            tmdb_id__in=self.params["ids"]
+        ))
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            restored = model.restore_images(rows, pool, retries=2)
+        self.result = {**restored, "failed": len(restored["failed"])}
 
-        return this_episode
\ No newline at end of file
+        return not restored["failed"]
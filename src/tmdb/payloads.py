@@ -0,0 +1,352 @@
+import functools
+import json
+import types
+import typing
+from typing import Any, Callable, NotRequired, TypedDict
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional, the stdlib json module is used without it
+    msgspec = None
+
+
+# Typed shapes of the TMDB payloads the models read. Decoding validates a
+# payload against its shape and keeps only these keys, so the rest of a
+# (much bigger) TMDB response is never built, cached or dumped. Keys read
+# with data["key"] are required, TMDB sends null for any unknown value.
+
+class Genre(TypedDict):
+    id: int
+    name: str
+
+
+class Credit(TypedDict):
+    # A guest star or crew member of an episode
+    id: int
+    name: str | None
+    credit_id: NotRequired[str | None]
+    character: NotRequired[str | None]
+    order: NotRequired[int | None]
+    job: NotRequired[str | None]
+    department: NotRequired[str | None]
+    profile_path: NotRequired[str | None]
+
+
+class Movie(TypedDict):
+    id: int
+    title: str | None
+    overview: str | None
+    poster_path: str | None
+    release_date: str | None
+    runtime: int | None
+    genres: list[Genre]
+
+
+class SeasonSummary(TypedDict):
+    # An entry of Series.seasons
+    id: int
+    name: str
+    season_number: int
+    episode_count: NotRequired[int | None]
+    air_date: NotRequired[str | None]
+    poster_path: NotRequired[str | None]
+
+
+class Series(TypedDict):
+    id: int
+    name: str | None
+    overview: str | None
+    poster_path: str | None
+    number_of_seasons: int | None
+    number_of_episodes: int | None
+    first_air_date: str | None
+    last_air_date: str | None
+    genres: list[Genre]
+    seasons: NotRequired[list[SeasonSummary]]
+
+
+class Episode(TypedDict):
+    id: int
+    name: str | None
+    overview: str | None
+    still_path: str | None
+    episode_number: int
+    season_number: NotRequired[int]
+    show_id: NotRequired[int]
+    air_date: str | None
+    runtime: int | None
+    guest_stars: list[Credit]
+    crew: list[Credit]
+
+
+class SeasonEpisode(TypedDict, total=False):
+    # Episodes inside a season payload can come without some fields, those
+    # are fetched one by one (see models.EPISODE_FIELDS)
+    id: int
+    name: str | None
+    overview: str | None
+    still_path: str | None
+    episode_number: int
+    season_number: int
+    show_id: int
+    air_date: str | None
+    runtime: int | None
+    guest_stars: list[Credit]
+    crew: list[Credit]
+
+
+class Season(TypedDict):
+    id: int
+    name: str | None
+    overview: str | None
+    poster_path: str | None
+    season_number: int
+    air_date: str | None
+    episodes: list[SeasonEpisode]
+
+
+# cache.RESOURCE_PATTERNS resource -> its shape
+TYPES = {
+    "movie": Movie,
+    "tv": Series,
+    "season": Season,
+    "episode": Episode,
+}
+# append_to_response=season/N adds each season under this key prefix
+APPENDED_SEASON = "season/"
+
+
+class InvalidPayload(ValueError):
+    """
+    Raised for a body that isn't JSON or doesn't match its shape.
+    """
+
+
+def decode(body: bytes | str, shape: type | None = None) -> Any:
+    """
+    Decodes a JSON body, validated against shape when one is given.
+
+    Uses msgspec when it is installed, which decodes straight into the
+    shape without building the keys it drops, and the stdlib otherwise.
+    Series bundles (append_to_response=season/N) keep each appended
+    season, validated as a Season.
+
+    Parameters
+    ----------
+    body : bytes | str
+        the raw JSON
+    shape : type | None
+        one of TYPES, None decodes any JSON as is
+
+    Returns
+    -------
+    Any
+        plain dicts and lists, e.g. a Movie
+    """
+
+    # Any body that mentions it takes the slower path, which still decodes
+    # plain series right
+    marker = APPENDED_SEASON if isinstance(body, str) else APPENDED_SEASON.encode()
+    if shape is Series and marker in body:
+        return _decode_bundle(body)
+
+    if msgspec is None:
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            raise InvalidPayload(str(e)) from e
+        return data if shape is None else convert(data, shape)
+
+    try:
+        return _decoder(shape).decode(body)
+    except (msgspec.DecodeError, msgspec.ValidationError) as e:
+        raise InvalidPayload(str(e)) from e
+
+
+def convert(data: Any, shape: type) -> Any:
+    """
+    Validates already decoded data against shape, e.g. an upload record.
+
+    Returns a copy with only the keys of shape, raises InvalidPayload if
+    it doesn't match.
+    """
+
+    if msgspec is None:
+        return _convert(data, shape)
+
+    try:
+        return msgspec.convert(data, shape)
+    except msgspec.ValidationError as e:
+        raise InvalidPayload(str(e)) from e
+
+
+def encode(data: Any) -> bytes:
+    """
+    Compact UTF-8 JSON, for the response cache and the JSON dumps.
+    """
+
+    if msgspec is None:
+        return json.dumps(
+            data,
+            separators=(",", ":"),
+            ensure_ascii=False
+        ).encode("utf-8")
+
+    return msgspec.json.encode(data)
+
+
+_decoders: dict[type | None, Any] = {}
+
+
+def _decoder(shape: type | None):
+    # Decoders are cheap to use but not to build, each shape gets one
+    decoder = _decoders.get(shape)
+    if decoder is None:
+        decoder = msgspec.json.Decoder(shape) if shape else msgspec.json.Decoder()
+        _decoders[shape] = decoder
+
+    return decoder
+
+
+def _decode_bundle(body: bytes | str) -> dict:
+    data = decode(body)
+    if not isinstance(data, dict):
+        raise InvalidPayload(f"Expected `object`, got `{type(data).__name__}`")
+
+    appended = {
+        key: convert(value, Season) for key, value in data.items()
+        if key.startswith(APPENDED_SEASON)
+    }
+
+    return {**convert(data, Series), **appended}
+
+
+def _convert(value: Any, shape: type) -> Any:
+    # The stdlib stand-in for msgspec.convert
+    try:
+        return _validator(shape)(value)
+    except _Mismatch as e:
+        if not e.path:
+            raise InvalidPayload(e.message) from None
+        path = "$" + "".join(reversed(e.path))
+        raise InvalidPayload(f"{e.message} - at `{path}`") from None
+
+
+class _Mismatch(Exception):
+    # The path is collected on the way up, so it only costs on failure
+    def __init__(self, message: str):
+        self.message = message
+        self.path = []
+
+
+@functools.cache
+def _validator(shape: Any) -> Callable[[Any], Any]:
+    """
+    Builds a function that checks a decoded value against shape and
+    returns it with only the keys of shape.
+    """
+
+    if shape is Any:
+        return lambda value: value
+
+    origin = typing.get_origin(shape)
+    if origin in (types.UnionType, typing.Union):
+        nullable = type(None) in typing.get_args(shape)
+        options = [
+            _validator(option) for option in typing.get_args(shape)
+            if option is not type(None)
+        ]
+
+        def check_union(value):
+            if value is None and nullable:
+                return None
+            for option in options:
+                try:
+                    return option(value)
+                except _Mismatch:
+                    continue
+            raise _mismatch(" | ".join(map(_describe, typing.get_args(shape))), value)
+
+        return check_union
+
+    if origin is list:
+        [item_shape] = typing.get_args(shape)
+        check_item = _validator(item_shape)
+
+        def check_list(value):
+            if type(value) is not list:
+                raise _mismatch("array", value)
+            checked = []
+            for item in value:
+                try:
+                    checked.append(check_item(item))
+                except _Mismatch as e:
+                    e.path.append(f"[{len(checked)}]")
+                    raise
+            return checked
+
+        return check_list
+
+    if origin is dict:
+        def check_dict(value):
+            if type(value) is not dict:
+                raise _mismatch("object", value)
+            return value
+
+        return check_dict
+
+    if typing.is_typeddict(shape):
+        fields = [
+            (key, _validator(hint), key in shape.__required_keys__)
+            for key, hint in typing.get_type_hints(shape).items()
+        ]
+
+        def check_object(value):
+            if type(value) is not dict:
+                raise _mismatch("object", value)
+            checked = {}
+            for key, check_field, required in fields:
+                if key not in value:
+                    if required:
+                        raise _Mismatch(f"Object missing required field `{key}`")
+                    continue
+                try:
+                    checked[key] = check_field(value[key])
+                except _Mismatch as e:
+                    e.path.append(f".{key}")
+                    raise
+            return checked
+
+        return check_object
+
+    if shape is float:
+        def check_float(value):
+            if type(value) not in (int, float):
+                raise _mismatch("float", value)
+            return float(value)
+
+        return check_float
+
+    # json only ever decodes to these exact types, so a bool isn't an int
+    def check_type(value):
+        if type(value) is not shape:
+            raise _mismatch(shape.__name__, value)
+        return value
+
+    return check_type
+
+
+def _describe(shape: Any) -> str:
+    # The name msgspec gives a type in its errors
+    if shape is type(None):
+        return "null"
+    if typing.get_origin(shape) is list:
+        return "array"
+    if typing.get_origin(shape) is dict or typing.is_typeddict(shape):
+        return "object"
+
+    return shape.__name__
+
+
+def _mismatch(expected: Any, value: Any) -> _Mismatch:
+    return _Mismatch(f"Expected `{expected}`, got `{type(value).__name__}`")
@@ -0,0 +1,483 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable
+from urllib.parse import quote
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage, storages
+from django.utils.deconstruct import deconstructible
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 is optional, only S3Storage needs it
+    boto3 = None
+
+
+# STORAGES aliases (see djangosite.settings). Artwork is named by its static
+# path, e.g. tmdb/store/ab/cd/abcd...ef.jpg, dumps by title, e.g. Movies/Film.json
+# or TV/Show.zip (see tmdb.archives)
+ARTWORK = "tmdb_artwork"
+DUMPS = "tmdb_json"
+# Temp files of a local storage live here, so they can be renamed into place
+INCOMING_DIR = ".incoming"
+
+
+def artwork() -> Storage:
+    return storages[ARTWORK]
+
+
+def dumps() -> Storage:
+    return storages[DUMPS]
+
+
+def exists_many(storage: Storage, names: Iterable[str]) -> set[str]:
+    """
+    Returns which of names storage has.
+
+    Backends that can check many names in fewer round trips than one per
+    name (see S3Storage.exists_many) do.
+    """
+
+    if hasattr(storage, "exists_many"):
+        return storage.exists_many(names)
+
+    return {name for name in set(names) if storage.exists(name)}
+
+
+def same_content(storage: Storage, name: str, content: bytes) -> bool:
+    """
+    Whether name already holds exactly content, False if it doesn't exist.
+    """
+
+    if hasattr(storage, "same_content"):
+        return storage.same_content(name, content)
+
+    try:
+        if not storage.size(name) == len(content):
+            return False
+        with storage.open(name, "rb") as file:
+            return file.read() == content
+    except OSError:
+        return False
+
+
+def list_files(storage: Storage,
+               directory: str = "",
+               max_workers: int = 8
+             ) -> dict[str, tuple[int, float]]:
+    """
+    Every file under directory, recursively.
+
+    Backends that can list a whole tree at once (see S3Storage.list_files)
+    do. Otherwise directories are listed concurrently, which keeps a store
+    sharded into thousands of directories quick to walk.
+
+    Returns
+    -------
+    dict[str, tuple[int, float]]
+        name -> size in bytes and modified time as a timestamp
+    """
+
+    if hasattr(storage, "list_files"):
+        return storage.list_files(directory)
+
+    files = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_list_directory, storage, directory)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directories, found = future.result()
+                files.update(found)
+                pending.update(
+                    pool.submit(_list_directory, storage, subdirectory)
+                    for subdirectory in directories
+                )
+
+    return files
+
+
+def _list_directory(storage: Storage,
+                    directory: str
+                  ) -> tuple[list[str], dict[str, tuple[int, float]]]:
+    prefix = directory.strip("/") + "/" if directory.strip("/") else ""
+    try:
+        path = storage.path(directory)
+    except NotImplementedError:
+        try:
+            directories, files = storage.listdir(directory)
+        except FileNotFoundError:
+            return [], {}
+        return [prefix + name for name in directories], {
+            prefix + name: (
+                storage.size(prefix + name),
+                storage.get_modified_time(prefix + name).timestamp()
+            )
+            for name in files
+        }
+
+    # On local disk one scandir has the names and their stats
+    directories, files = [], {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(prefix + entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    files[prefix + entry.name] = (stat.st_size, stat.st_mtime)
+    except FileNotFoundError:
+        pass
+
+    return directories, files
+
+
+def read_ends(storage: Storage, name: str, length: int = 16) -> tuple[bytes, bytes]:
+    """
+    The first and last length bytes of name, e.g. to check an image's
+    header and trailer without reading all of it.
+    """
+
+    if hasattr(storage, "read_ends"):
+        return storage.read_ends(name, length)
+
+    with storage.open(name, "rb") as file:
+        head = file.read(length)
+        file.seek(max(0, file.size - length))
+        tail = file.read(length)
+
+    return head, tail
+
+
+def save_file(storage: Storage, name: str, path: str) -> str:
+    """
+    Saves the local file at path as name, replacing whatever is there.
+
+    A local storage renames the file into place, so name is never seen
+    half-written (write it in temp_dir). Others upload a copy. Either way
+    the file at path may be gone afterwards.
+
+    Returns
+    -------
+    str
+        the name it was saved under
+    """
+
+    with open(path, "rb") as file:
+        return storage.save(name, _LocalFile(file))
+
+
+def temp_dir(storage: Storage) -> str | None:
+    """
+    A directory for temp files that save_file can rename into storage.
+
+    None for storages that aren't on local disk, i.e. the system's temp dir.
+    """
+
+    try:
+        directory = storage.path(INCOMING_DIR)
+    except NotImplementedError:
+        return None
+    os.makedirs(directory, exist_ok=True)
+
+    return directory
+
+
+class _LocalFile(File):
+    # FileSystemStorage moves files that have a temporary_file_path
+    # instead of copying them
+    def temporary_file_path(self) -> str:
+        return self.file.name
+
+
+@deconstructible(path="tmdb.storage.S3Storage")
+class S3Storage(Storage):
+    """
+    Storage on an S3-compatible object store, e.g. AWS S3, MinIO or R2.
+
+    Needs boto3. Uploads are atomic, so nothing is ever seen half-written,
+    and saving a name that exists replaces it. Point endpoint_url at a local
+    stand-in (MinIO, moto) to try it out. Credentials come from the
+    arguments or boto3's usual environment variables and config files.
+
+    Parameters
+    ----------
+    bucket : str
+        the bucket, which must already exist
+    prefix : str
+        key prefix of every name, e.g. "artwork/"
+    endpoint_url : str | None
+        for anything but AWS itself
+    region_name : str | None
+        the bucket's region
+    access_key : str | None
+    secret_key : str | None
+    base_url : str | None
+        public URL names are served from, e.g. a CDN in front of prefix.
+        Defaults to the bucket's URL on endpoint_url
+    max_workers : int
+        concurrent requests of exists_many
+    """
+
+    def __init__(self,
+                 bucket: str,
+                 prefix: str = "",
+                 endpoint_url: str | None = None,
+                 region_name: str | None = None,
+                 access_key: str | None = None,
+                 secret_key: str | None = None,
+                 base_url: str | None = None,
+                 max_workers: int = 8
+               ):
+        if boto3 is None:
+            raise ImproperlyConfigured("S3Storage needs boto3: pip install boto3")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.endpoint_url = endpoint_url
+        self.region_name = region_name
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self._client = None
+        self._client_lock = threading.Lock()
+
+
+    @property
+    def client(self):
+        # Clients are thread-safe once built, building one isn't
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = boto3.session.Session().client(
+                        "s3",
+                        endpoint_url=self.endpoint_url,
+                        region_name=self.region_name,
+                        aws_access_key_id=self.access_key,
+                        aws_secret_access_key=self.secret_key,
+                        config=Config(max_pool_connections=max(10, self.max_workers))
+                    )
+
+        return self._client
+
+
+    def _key(self, name: str) -> str:
+        return self.prefix + name.lstrip("/")
+
+
+    def _head(self, name: str) -> dict:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(name))
+        except ClientError as e:
+            if _missing(e):
+                raise FileNotFoundError(name) from e
+            raise
+
+
+    def _open(self, name: str, mode: str = "rb") -> File:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(name))
+        except ClientError as e:
+            if _missing(e):
+                raise FileNotFoundError(name) from e
+            raise
+
+        with response["Body"] as body:
+            return ContentFile(body.read(), name=name)
+
+
+    def _save(self, name: str, content: File) -> str:
+        if hasattr(content, "seek"):
+            content.seek(0)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.client.upload_fileobj(
+            content,
+            self.bucket,
+            self._key(name),
+            ExtraArgs={"ContentType": content_type}
+        )
+
+        return name
+
+
+    def get_available_name(self, name: str, max_length: int | None = None) -> str:
+        # Names are content-addressed or per title, saving one again replaces it
+        return name
+
+
+    def delete(self, name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+
+    def exists(self, name: str) -> bool:
+        try:
+            self._head(name)
+        except FileNotFoundError:
+            return False
+
+        return True
+
+
+    def exists_many(self, names: Iterable[str]) -> set[str]:
+        """
+        Returns which of names exist, concurrently and in as few requests
+        as it can.
+
+        Names that share a directory are found with one listing of just
+        the key range they span, instead of one HEAD each. A listing that
+        would take more pages than it saves falls back to HEADs.
+        """
+
+        by_directory: dict[str, list[str]] = {}
+        for name in set(names):
+            by_directory.setdefault(posixpath.dirname(name), []).append(name)
+        if not by_directory:
+            return set()
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(by_directory))
+        ) as pool:
+            found = pool.map(self._exists_in_directory, by_directory.items())
+
+            return set().union(*found)
+
+
+    def _exists_in_directory(self, item: tuple[str, list[str]]) -> set[str]:
+        directory, names = item
+        if len(names) == 1:
+            return {name for name in names if self.exists(name)}
+
+        keys = {self._key(name): name for name in names}
+        first, last = min(keys), max(keys)
+        found = set()
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket,
+            Prefix=self._key(directory + "/" if directory else ""),
+            # Listings are sorted, start right before the first name
+            StartAfter=first[:-1],
+        )
+        for count, page in enumerate(pages, start=1):
+            listed = [entry["Key"] for entry in page.get("Contents", [])]
+            found.update(keys[key] for key in listed if key in keys)
+            if not listed or listed[-1] >= last:
+                return found
+            if count >= len(names) // 2:
+                break
+        else:
+            # Listed to the end of the directory, the rest don't exist
+            return found
+
+        # The range is too crowded to list, HEAD what's left
+        return found | {
+            name for key, name in keys.items()
+            if key > listed[-1] and self.exists(name)
+        }
+
+
+    def list_files(self, directory: str = "") -> dict[str, tuple[int, float]]:
+        # One flat listing of the whole tree, 1000 keys per request
+        prefix = self._key(directory.strip("/") + "/" if directory.strip("/") else "")
+        files = {}
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket,
+            Prefix=prefix
+        )
+        for page in pages:
+            for entry in page.get("Contents", []):
+                files[entry["Key"][len(self.prefix):]] = (
+                    entry["Size"],
+                    entry["LastModified"].timestamp()
+                )
+
+        return files
+
+
+    def read_ends(self, name: str, length: int = 16) -> tuple[bytes, bytes]:
+        # Two ranged GETs instead of a download
+        return (
+            self._read_range(name, f"bytes=0-{length - 1}"),
+            self._read_range(name, f"bytes=-{length}")
+        )
+
+
+    def _read_range(self, name: str, byte_range: str) -> bytes:
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket,
+                Key=self._key(name),
+                Range=byte_range
+            )
+        except ClientError as e:
+            if _missing(e):
+                raise FileNotFoundError(name) from e
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                # An empty object has no bytes to range over
+                return b""
+            raise
+
+        with response["Body"] as body:
+            return body.read()
+
+
+    def same_content(self, name: str, content: bytes) -> bool:
+        # Single part uploads have the MD5 of their body as ETag, so this
+        # costs a HEAD instead of a download
+        try:
+            head = self._head(name)
+        except FileNotFoundError:
+            return False
+        if not head["ContentLength"] == len(content):
+            return False
+
+        return head["ETag"].strip('"') == hashlib.md5(content).hexdigest()
+
+
+    def listdir(self, path: str) -> tuple[list[str], list[str]]:
+        prefix = self._key(path.strip("/") + "/" if path.strip("/") else "")
+        directories, files = [], []
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket,
+            Prefix=prefix,
+            Delimiter="/"
+        )
+        for page in pages:
+            directories.extend(
+                entry["Prefix"][len(prefix):].rstrip("/")
+                for entry in page.get("CommonPrefixes", [])
+            )
+            files.extend(
+                entry["Key"][len(prefix):] for entry in page.get("Contents", [])
+            )
+
+        return directories, files
+
+
+    def size(self, name: str) -> int:
+        return self._head(name)["ContentLength"]
+
+
+    def get_modified_time(self, name: str):
+        return self._head(name)["LastModified"]
+
+
+    def url(self, name: str) -> str:
+        key = quote(self._key(name))
+        if self.base_url:
+            return f"{self.base_url.rstrip('/')}/{quote(name.lstrip('/'))}"
+        if self.endpoint_url:
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket}/{key}"
+
+        return f"https://{self.bucket}.s3.amazonaws.com/{key}"
+
+
+def _missing(error: "ClientError") -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
@@ -0,0 +1,48 @@
+import time
+
+from django import template
+
+from tmdb import storage
+from tmdb.derivatives import derivative_path
+
+
+register = template.Library()
+
+# Derivatives never change once written, so each is only looked up until
+# it is found
+_found: set[str] = set()
+# derivative -> when it was last found missing. Without this a page of N
+# tiles costs N storage lookups (N HEAD requests on S3) on every render
+# until the derivatives exist, which without Pillow is never
+_missing: dict[str, float] = {}
+# Seconds a missing derivative is served as the original before it is
+# looked up again, e.g. once tmdb_derivatives made it
+MISSING_TTL = 300
+
+
+@register.filter
+def thumb(img_path: str, size: str) -> str:
+    """
+    URL of a TMDB img_path's WebP derivative when one exists, of the
+    original otherwise. Both are served by the artwork storage.
+
+    Usage: <img src="{{ content.img_path|thumb:"w145" }}">
+    """
+
+    if not img_path:
+        return img_path
+
+    artwork = storage.artwork()
+    derivative = derivative_path(img_path, size)
+    if derivative in _found:
+        return artwork.url(derivative)
+    if time.monotonic() - _missing.get(derivative, -MISSING_TTL) < MISSING_TTL:
+        return artwork.url(img_path)
+
+    if artwork.exists(derivative):
+        _found.add(derivative)
+        _missing.pop(derivative, None)
+        return artwork.url(derivative)
+
+    _missing[derivative] = time.monotonic()
+    return artwork.url(img_path)
@@ -1,3 +1,1419 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from djangoflix.models import TVEpisode, WatchableContent
+from . import archives, derivatives, exports, images, metrics, payloads, storage, transactions, uploads
+from .cache import ResponseCache
+from .client import TMDBClient, TokenBucket
+from .derivatives import derivative_path
+from .fake_server import FakeTMDB
+from .management.commands import tmdb_import as import_command
+from .management.commands.tmdb_check_images import check_image
+from .storage import S3Storage
+from .models import (
+    JOB_LEASE,
+    MAX_JOB_ATTEMPTS,
+    ContentData,
+    Genre,
+    ImageObject,
+    IngestJob,
+    IngestRun,
+    SyncWatermark,
+    TMDBMovie,
+    TMDBTVEpisode,
+    TMDBTVSeries,
+)
+from .templatetags import tmdb_images
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto is optional, the S3 tests are skipped without it
+    mock_aws = None
+
+
+def make_content(**fields) -> WatchableContent:
+    return WatchableContent.objects.create(**{
+        "name": "Show",
+        "img_path": "/missing.png",
+        "content_type": "TV",
+        "release_date": date(2000, 1, 1),
+        "duration": 1,
+        **fields,
+    })
+
+
+def make_jpeg() -> bytes:
+    image = io.BytesIO()
+    derivatives.Image.new("RGB", (30, 45), "red").save(image, "JPEG")
+    return image.getvalue()
+
+
+class TempStoragesMixin:
+    # Points the artwork and dump storages at a temp dir for each test
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(STORAGES={
+            **settings.STORAGES,
+            storage.ARTWORK: {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {
+                    "location": os.path.join(root, "static"),
+                    "base_url": "/static/",
+                    "allow_overwrite": True,
+                },
+            },
+            storage.DUMPS: {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {
+                    "location": os.path.join(root, "json"),
+                    "allow_overwrite": True,
+                },
+            },
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class FakeTMDBMixin(TempStoragesMixin):
+    # Sends every TMDB request of a test to a local FakeTMDB, through a
+    # client and response cache of its own
+    fake_options = {"seasons": 2, "episodes": 2}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = FakeTMDB(seed=1, **cls.fake_options).start()
+        cls.addClassCleanup(cls.fake.stop)
+
+
+    def setUp(self):
+        super().setUp()
+        self.fake.changes = {"movie": set(), "tv": set()}
+        self.fake.hits.clear()
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        base_url, img_base_url = self.fake.urls()
+        self.tmdb_client = TMDBClient(base_url, img_base_url, backoff=0.01, rate_limit=0)
+        self.cache = ResponseCache(cache_dir)
+        for patcher in (
+            mock.patch("tmdb.client._client", self.tmdb_client),
+            mock.patch("tmdb.cache._cache", self.cache),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class GenreRegistryTests(TransactionTestCase):
+    # Genres are only registered once their transaction commits, which
+    # TestCase never does
+
+    def setUp(self):
+        Genre.invalidate_registry()
+
+
+    def tearDown(self):
+        Genre.invalidate_registry()
+
+
+    def test_created_genres_are_registered_on_commit(self):
+        with transaction.atomic():
+            Genre.resolve_genres([{"id": 18, "name": "Drama"}])
+            self.assertIsNone(Genre._registry)
+
+        self.assertIn(18, Genre.get_registry())
+
+
+    def test_rolled_back_genres_are_not_registered(self):
+        Genre.get_registry()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Genre.resolve_genres([{"id": 18, "name": "Drama"}])
+            raise RuntimeError
+
+        self.assertNotIn(18, Genre.get_registry())
+        # Used to fail on the rolled back genre's pk
+        content = make_content()
+        Genre.link_all_genres([(content, [{"id": 18, "name": "Drama"}])])
+        self.assertEqual(list(content.genres.values_list("tmdb_id", flat=True)), [18])
+
+
+class LinkMigrationTests(TransactionTestCase):
+    # Runs 0011 against rows seeded in the schema before it
+    before = [("tmdb", "0010_tmdbmovie_content_tmdbtvepisode_content_and_more")]
+    after = [("tmdb", "0011_link_tmdb_rows_to_content")]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.addCleanup(self._migrate_to_latest)
+        self._migrate(self.before)
+
+
+    def _migrate(self, targets):
+        self.executor.loader.build_graph()
+        with redirect_stdout(io.StringIO()):
+            self.executor.migrate(targets)
+
+        return self.executor.loader.project_state(targets).apps
+
+
+    def _migrate_to_latest(self):
+        self._migrate(self.executor.loader.graph.leaf_nodes())
+
+
+    def test_unmirrored_rows_get_a_djangoflix_row(self):
+        apps = self.executor.loader.project_state(self.before).apps
+        content = apps.get_model("djangoflix", "WatchableContent")
+        drama = apps.get_model("tmdb", "Genre").objects.create(name="Drama", tmdb_id=18)
+        common = {"overview": "o", "img_path": "/p.jpg", "cast": None, "crew": None}
+        mirrored = content.objects.create(
+            name="Mirrored", tmdb_id=1, content_type="Movie",
+            release_date=date(2000, 1, 1), duration=90, img_path="tmdb/movie/m.jpg"
+        )
+        apps.get_model("tmdb", "TMDBMovie").objects.create(
+            name="Mirrored", tmdb_id=1, release_date="2000-01-01", runtime=90, **common
+        )
+        movie = apps.get_model("tmdb", "TMDBMovie").objects.create(
+            name="Unmirrored", tmdb_id=2, release_date="2001-02-03", runtime=100, **common
+        )
+        movie.genres.add(drama)
+        apps.get_model("tmdb", "TMDBMovie").objects.create(
+            name="No date", tmdb_id=3, release_date="missing", runtime=1, **common
+        )
+        series = apps.get_model("tmdb", "TMDBTVSeries").objects.create(
+            name="Series", tmdb_id=4, total_seasons=1, total_episodes=1,
+            first_air_date="2002-01-01", last_air_date="2002-02-01", **common
+        )
+        season = apps.get_model("tmdb", "TMDBTVSeason").objects.create(
+            name="Season 1", tmdb_id=5, season_number=1, air_date="2002-01-01",
+            series=series, **common
+        )
+        apps.get_model("tmdb", "TMDBTVEpisode").objects.create(
+            name="Pilot", tmdb_id=6, episode_number=1, air_date="2002-01-01",
+            runtime=30, season=season, **common
+        )
+
+        apps = self._migrate(self.after)
+
+        movies = apps.get_model("tmdb", "TMDBMovie").objects.select_related("content")
+        self.assertEqual(movies.get(tmdb_id=1).content_id, mirrored.id)
+        created = movies.get(tmdb_id=2).content
+        self.assertEqual(
+            (created.name, created.release_date, created.duration, created.img_path),
+            ("Unmirrored", date(2001, 2, 3), 100, "tmdb/movie/p.jpg")
+        )
+        self.assertEqual(list(created.genres.values_list("tmdb_id", flat=True)), [18])
+        self.assertFalse(movies.filter(tmdb_id=3).exists())
+        episode = apps.get_model("tmdb", "TMDBTVEpisode").objects.get(tmdb_id=6).content
+        self.assertEqual(episode.name, "Pilot")
+        self.assertEqual(episode.season.tmdb_id, 5)
+        self.assertEqual(episode.season.series.tmdb_id, 4)
+        self.assertEqual(episode.season.series.content_type, "TV")
+
+
+class ConcurrentIngestTests(FakeTMDBMixin, TransactionTestCase):
+    # tmdb_worker ingests on several threads at once. They share genres and
+    # the SQLite file, a deferred transaction failed the ingest as soon as
+    # another one held the write lock
+    fake_options = {"seasons": 2, "episodes": 3, "latency": 0.005}
+
+    def setUp(self):
+        super().setUp()
+        Genre.invalidate_registry()
+        self.addCleanup(Genre.invalidate_registry)
+
+
+    def test_concurrent_ingests_all_commit(self):
+        ids = [str(id) for id in range(11, 17)]
+        start = threading.Barrier(len(ids))
+        errors = []
+
+        def ingest(id):
+            try:
+                start.wait()
+                if int(id) % 2:
+                    TMDBMovie.fetch_one_movie_by_id(id)
+                else:
+                    TMDBTVSeries.fetch_one_series_by_tmdb_id(id, max_workers=2)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=ingest, args=(id,)) for id in ids]
+        with redirect_stdout(io.StringIO()):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(TMDBMovie.objects.count(), 3)
+        self.assertEqual(TMDBTVSeries.objects.count(), 3)
+        self.assertEqual(TVEpisode.objects.count(), 3 * 2 * 3)
+        self.assertEqual(
+            sorted(Genre.objects.values_list("tmdb_id", flat=True)),
+            [18, 35, 10765]
+        )
+
+
+class CommitBatchTests(FakeTMDBMixin, TransactionTestCase):
+    # Commits are the point, which TestCase never makes
+
+    def write_season(self, name: str, fail: bool = False) -> None:
+        with transactions.season(name):
+            with transactions.atomic():
+                make_content(name=name)
+            if fail:
+                raise RuntimeError(name)
+
+
+    def names(self) -> set[str]:
+        return set(WatchableContent.objects.values_list("name", flat=True))
+
+
+    def test_failed_season_is_rolled_back_alone(self):
+        with redirect_stdout(io.StringIO()), transactions.batch(size=10):
+            self.write_season("one")
+            self.write_season("two", fail=True)
+            self.write_season("three")
+
+        self.assertEqual(self.names(), {"one", "three"})
+
+
+    def test_error_rolls_back_to_the_last_commit(self):
+        with self.assertRaises(RuntimeError), transactions.batch(size=2):
+            self.write_season("one")
+            self.write_season("two")
+            self.write_season("three")
+            raise RuntimeError
+
+        self.assertEqual(self.names(), {"one", "two"})
+
+
+    def test_transaction_is_only_open_while_writing(self):
+        with transactions.batch(size=10):
+            self.assertFalse(connection.in_atomic_block)
+            self.write_season("one")
+            self.assertTrue(connection.in_atomic_block)
+
+            transactions.release()
+            self.assertFalse(connection.in_atomic_block)
+            self.assertEqual(self.names(), {"one"})
+
+            # Not inside a savepoint, its writes can't be committed alone
+            with transactions.season("two"), transactions.atomic():
+                make_content(name="two")
+                transactions.release()
+                self.assertTrue(connection.in_atomic_block)
+
+        self.assertEqual(self.names(), {"one", "two"})
+
+
+    def test_artwork_is_downloaded_outside_transactions(self):
+        # The writing thread's connection, pool threads download while it waits
+        writer = connections["default"]
+        in_transaction = []
+        fetch_image = ContentData._fetch_image
+
+        def record(img_path):
+            in_transaction.append(writer.in_atomic_block)
+            return fetch_image(img_path)
+
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as file:
+            json.dump([FakeTMDB.movie(id) for id in (40, 41)], file)
+
+        with mock.patch.object(ContentData, "_fetch_image", side_effect=record), \
+             redirect_stdout(io.StringIO()):
+            for id, max_workers, bundled in ((31, 1, False), (32, 2, False), (33, 2, True)):
+                TMDBTVSeries.fetch_one_series_by_tmdb_id(
+                    id,
+                    max_workers=max_workers,
+                    bundled=bundled
+                )
+            uploads.import_upload(path, "movie")
+
+        # A poster per series, season and movie, a still per episode
+        self.assertEqual(len(in_transaction), 3 * (1 + 2 + 4) + 2)
+        self.assertNotIn(True, in_transaction)
+        self.assertEqual(TVEpisode.objects.count(), 3 * 4)
+
+
+class ResumeTests(FakeTMDBMixin, TransactionTestCase):
+    # A run is only resumable from what it committed
+    fake_options = {"seasons": 3, "episodes": 2}
+
+    def setUp(self):
+        super().setUp()
+        # Resumed fetches would be answered by the cache instead of TMDB
+        self.cache.enabled = False
+        Genre.invalidate_registry()
+        self.addCleanup(Genre.invalidate_registry)
+
+
+    def requested_seasons(self, fetch) -> list[str]:
+        # Seasons asked for on their own or appended to the series
+        get_data = self.tmdb_client.get_data
+        requested = []
+
+        def record(url_ext, params=None, headers=None):
+            if season := re.fullmatch(r"/tv/\d+/(season/\d+)", url_ext):
+                requested.append(season[1])
+            requested.extend(re.findall(r"season/\d+", (params or {}).get("append_to_response", "")))
+            return get_data(url_ext, params, headers)
+
+        with mock.patch.object(self.tmdb_client, "get_data", side_effect=record), \
+             redirect_stdout(io.StringIO()):
+            fetch()
+
+        return sorted(requested)
+
+
+    def fetch_failing_second_season(self, error: BaseException) -> None:
+        bulk_ingest = TMDBTVEpisode._bulk_ingest_episodes
+        calls = 0
+
+        def fail_second(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                raise error
+            return bulk_ingest(*args, **kwargs)
+
+        with mock.patch.object(TMDBTVEpisode, "_bulk_ingest_episodes", side_effect=fail_second):
+            TMDBTVSeries.fetch_one_series_by_tmdb_id(
+                70,
+                max_workers=1,
+                bundled=False,
+                commit_batch=1
+            )
+
+
+    def test_interrupted_run_is_resumed_without_refetching(self):
+        with redirect_stdout(io.StringIO()), self.assertRaises(KeyboardInterrupt):
+            self.fetch_failing_second_season(KeyboardInterrupt())
+        run = IngestRun.objects.get(tmdb_id=70)
+        self.assertEqual(run.status, "failed")
+        self.assertIn("KeyboardInterrupt", run.error)
+        self.assertEqual(TVEpisode.objects.count(), 2)
+
+        requested = self.requested_seasons(
+            lambda: call_command("tmdb_resume", workers=1, stdout=io.StringIO())
+        )
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, "done")
+        self.assertEqual(IngestRun.objects.count(), 1)
+        self.assertEqual(TVEpisode.objects.count(), 3 * 2)
+        # Season 1 was done, 2 and 3 are fetched again
+        self.assertEqual(requested, ["season/2", "season/3"])
+
+
+    def test_failed_season_is_resumed_alone(self):
+        with redirect_stdout(io.StringIO()):
+            self.fetch_failing_second_season(RuntimeError("season 2"))
+        run = IngestRun.objects.get(tmdb_id=70)
+        self.assertEqual(run.status, "failed")
+        self.assertEqual(TVEpisode.objects.count(), 2 * 2)
+
+        self.fake.hits.clear()
+        requested = self.requested_seasons(
+            lambda: TMDBTVSeries.fetch_one_series_by_tmdb_id(70, max_workers=1, bundled=False)
+        )
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, "done")
+        self.assertEqual(TVEpisode.objects.count(), 3 * 2)
+        self.assertEqual(requested, ["season/2"])
+        # Its artwork was stored before the season failed
+        self.assertEqual(self.fake.hits["image"], 0)
+
+
+class IngestJobTests(TestCase):
+
+    def test_claim_next_claims_oldest_queued_job_once(self):
+        first = IngestJob.enqueue("movie", id=1)
+        second = IngestJob.enqueue("movie", id=2)
+
+        claimed = IngestJob.claim_next()
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, "running")
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(IngestJob.claim_next().pk, second.pk)
+        self.assertIsNone(IngestJob.claim_next())
+
+
+    def test_run_records_done_and_failed(self):
+        IngestJob.enqueue("movie", id=1)
+        IngestJob.enqueue("movie", id=2)
+
+        job = IngestJob.claim_next()
+        with mock.patch.object(IngestJob, "_dispatch", return_value=True):
+            self.assertTrue(job.run())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNotNone(job.report)
+
+        job = IngestJob.claim_next()
+        with mock.patch.object(IngestJob, "_dispatch", side_effect=RuntimeError("boom")):
+            self.assertFalse(job.run())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertIn("boom", job.error)
+
+
+    def test_expired_job_is_queued_again(self):
+        job = IngestJob.enqueue("movie", id=1)
+        IngestJob.claim_next()
+        IngestJob.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now() - JOB_LEASE * 2
+        )
+
+        claimed = IngestJob.claim_next()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.attempts, 2)
+
+
+    def test_live_job_is_left_running(self):
+        IngestJob.enqueue("movie", id=1)
+        IngestJob.claim_next()
+
+        self.assertEqual(IngestJob.requeue_expired(), 0)
+        self.assertIsNone(IngestJob.claim_next())
+
+
+    def test_job_out_of_attempts_fails_and_drops_its_upload(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        job = IngestJob.enqueue("upload", type="movie", path=path)
+        IngestJob.objects.filter(pk=job.pk).update(
+            status="running",
+            attempts=MAX_JOB_ATTEMPTS,
+            heartbeat_at=timezone.now() - JOB_LEASE * 2
+        )
+
+        self.assertEqual(IngestJob.requeue_expired(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertFalse(os.path.exists(path))
+
+
+    def test_failed_upload_is_removed(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as file:
+            file.write("[]")
+        IngestJob.enqueue("upload", type="nonsense", path=path)
+
+        self.assertFalse(IngestJob.claim_next().run())
+        self.assertFalse(os.path.exists(path))
+
+
+class SeriesJobTests(FakeTMDBMixin, TestCase):
+
+    def test_series_job_is_listed_once_with_its_run(self):
+        IngestJob.enqueue("series", id=21)
+        job = IngestJob.claim_next()
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(job.run())
+
+        job.refresh_from_db()
+        self.assertEqual(job.ingest_run, IngestRun.objects.get(tmdb_id=21))
+        self.assertEqual(job.ingest_run.status, "done")
+
+        response = self.client.get(reverse("tmdb:home"))
+        self.assertEqual(response.context["runs"], [job])
+        self.assertContains(response, str(job.ingest_run))
+
+
+class SeriesIngestQueryTests(FakeTMDBMixin, TestCase):
+
+    def _queries(self, id, episodes, **options):
+        with mock.patch.object(self.fake, "episodes", episodes), \
+             CaptureQueriesContext(connection) as queries, \
+             redirect_stdout(io.StringIO()):
+            TMDBTVSeries.fetch_one_series_by_tmdb_id(id, **options)
+
+        self.assertEqual(
+            TVEpisode.objects.filter(season__series__tmdb_id=id).count(),
+            2 * episodes
+        )
+        return len(queries)
+
+
+    def test_queries_dont_grow_with_episodes(self):
+        # Genres are created by the first ingest only
+        self._queries(30, 2)
+
+        for id, options in (
+            (40, {"max_workers": 1, "bundled": False}),
+            (50, {"max_workers": 2, "bundled": False}),
+            (60, {"max_workers": 2, "bundled": True}),
+        ):
+            with self.subTest(**options):
+                self.assertEqual(
+                    self._queries(id, 2, **options),
+                    self._queries(id + 1, 8, **options)
+                )
+
+
+class UnchangedWriteTests(FakeTMDBMixin, TestCase):
+    # Only the run bookkeeping may write when TMDB sends the same payloads
+
+    def setUp(self):
+        super().setUp()
+        # Every fetch should bring the fake's current payloads
+        self.cache.enabled = False
+        with redirect_stdout(io.StringIO()):
+            TMDBTVSeries.fetch_one_series_by_tmdb_id(90)
+
+
+    def writes(self) -> list[str]:
+        with CaptureQueriesContext(connection) as queries, \
+             redirect_stdout(io.StringIO()):
+            TMDBTVSeries.fetch_one_series_by_tmdb_id(90)
+
+        return [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].split(" ", 1)[0] in ("INSERT", "UPDATE", "DELETE")
+        ]
+
+
+    def tables(self, writes: list[str]) -> set[str]:
+        return {re.search(r'"(\w+)"', sql)[1] for sql in writes}
+
+
+    def test_identical_payloads_write_no_catalog_rows(self):
+        writes = self.writes()
+
+        self.assertTrue(writes)
+        self.assertEqual(self.tables(writes), {"tmdb_ingestrun", "tmdb_ingeststep"})
+
+
+    def test_one_changed_field_is_one_update(self):
+        episode = self.fake.episode
+
+        def renamed(id, number, episode_number):
+            data = episode(id, number, episode_number)
+            if (number, episode_number) == (2, 1):
+                data["name"] = "Renamed"
+            return data
+
+        with mock.patch.object(self.fake, "episode", side_effect=renamed):
+            writes = self.writes()
+
+        catalog = [
+            sql for sql in writes
+            if self.tables([sql]) - {"tmdb_ingestrun", "tmdb_ingeststep"}
+        ]
+        self.assertEqual(len(catalog), 1)
+        self.assertRegex(catalog[0], r'^UPDATE "djangoflix_tvepisode" SET "name" = ')
+        self.assertEqual(TVEpisode.objects.get(name="Renamed").episode_number, 1)
+
+
+class ThumbFilterTests(SimpleTestCase):
+
+    def setUp(self):
+        tmdb_images._found.clear()
+        tmdb_images._missing.clear()
+        self.artwork = mock.Mock()
+        self.artwork.url = lambda name: f"/static/{name}"
+        patcher = mock.patch("tmdb.storage.artwork", return_value=self.artwork)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def test_missing_derivative_is_only_looked_up_once_per_ttl(self):
+        self.artwork.exists.return_value = False
+
+        for _ in range(3):
+            self.assertEqual(
+                tmdb_images.thumb("tmdb/store/ab/cd/abcd.jpg", "w145"),
+                "/static/tmdb/store/ab/cd/abcd.jpg"
+            )
+        self.assertEqual(self.artwork.exists.call_count, 1)
+
+        self.artwork.exists.return_value = True
+        with mock.patch("time.monotonic", return_value=time.monotonic() + tmdb_images.MISSING_TTL):
+            self.assertEqual(
+                tmdb_images.thumb("tmdb/store/ab/cd/abcd.jpg", "w145"),
+                "/static/tmdb/store/ab/cd/w145/abcd.webp"
+            )
+        tmdb_images.thumb("tmdb/store/ab/cd/abcd.jpg", "w145")
+        self.assertEqual(self.artwork.exists.call_count, 2)
+
+
+@unittest.skipIf(derivatives.Image is None, "needs Pillow")
+class ImageCommandTests(TempStoragesMixin, TestCase):
+
+    def test_migrate_images_points_rows_at_the_store_before_deleting(self):
+        artwork = storage.artwork()
+        artwork.save("tmdb/movie/poster.jpg", ContentFile(make_jpeg()))
+        content = make_content(img_path="tmdb/movie/poster.jpg")
+
+        # Stopped while deleting the old files
+        with mock.patch.object(FileSystemStorage, "delete", side_effect=KeyboardInterrupt), \
+             self.assertRaises(KeyboardInterrupt):
+            call_command("tmdb_migrate_images", stdout=io.StringIO())
+        content.refresh_from_db()
+        self.assertTrue(content.img_path.startswith(images.STORE_DIR + "/"))
+        self.assertTrue(artwork.exists(content.img_path))
+        self.assertEqual(ImageObject.objects.get().path, content.img_path)
+
+        call_command("tmdb_migrate_images", stdout=io.StringIO())
+        self.assertFalse(artwork.exists("tmdb/movie/poster.jpg"))
+
+
+    def test_derivatives_are_made_for_store_originals(self):
+        artwork = storage.artwork()
+        img_path = images.store_path("ab" * 32, ".jpg")
+        artwork.save(img_path, ContentFile(make_jpeg()))
+        make_content(img_path=img_path)
+
+        out = io.StringIO()
+        call_command("tmdb_derivatives", stdout=out)
+        self.assertIn("Checking 1 images", out.getvalue())
+        self.assertTrue(artwork.exists(derivative_path(img_path, "w145")))
+
+
+    def test_check_image_catches_cut_short_files(self):
+        for ext, format in ((".jpg", "JPEG"), (".png", "PNG"), (".webp", "WEBP")):
+            image = io.BytesIO()
+            derivatives.Image.new("RGB", (30, 45), "red").save(image, format)
+            content = image.getvalue()
+            name = f"poster{ext}"
+            with self.subTest(format=format):
+                self.assertIsNone(check_image(name, content[:16], content[-16:], len(content)))
+                cut = content[:-20]
+                self.assertRegex(
+                    check_image(name, cut[:16], cut[-16:], len(cut)),
+                    "cut short"
+                )
+                self.assertEqual(check_image(name, b"", b"", 0), "empty")
+
+        self.assertEqual(check_image("poster.png", make_jpeg()[:16], b"", 10), "not a PNG")
+
+
+    def test_repair_queues_artwork_jobs(self):
+        artwork = storage.artwork()
+        broken = images.store_path("ab" * 32, ".jpg")
+        artwork.save(broken, ContentFile(make_jpeg()[:-20]))
+        missing = images.store_path("cd" * 32, ".jpg")
+        pairs = TMDBMovie.bulk_add_from_json([FakeTMDB.movie(id) for id in (1, 2, 3)], None, False)
+        for (_, content), img_path in zip(pairs, (broken, missing, missing)):
+            content.img_path = img_path
+            content.save()
+        # Movie 3 is already waiting to be fetched
+        IngestJob.enqueue("artwork", type="movie", ids=[3])
+
+        out = io.StringIO()
+        call_command("tmdb_check_images", "--repair", stdout=out, stderr=io.StringIO())
+
+        self.assertIn("Missing: 1", out.getvalue())
+        self.assertIn(f"{broken}: JPEG is cut short", out.getvalue())
+        self.assertFalse(artwork.exists(broken))
+        [job] = IngestJob.objects.exclude(params__ids=[3])
+        self.assertEqual((job.kind, job.status, job.params["type"]), ("artwork", "queued", "movie"))
+        self.assertEqual(sorted(job.params["ids"]), [1, 2])
+
+
+class PrefetchImagesTests(FakeTMDBMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache.enabled = False
+        # Ingested without artwork
+        TMDBMovie.bulk_add_from_json([FakeTMDB.movie(id) for id in (1, 2, 3)], None, False)
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), "prefetch.checkpoint")
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.checkpoint), ignore_errors=True)
+
+
+    def prefetch(self, *args) -> str:
+        out = io.StringIO()
+        with redirect_stdout(io.StringIO()):
+            call_command(
+                "tmdb_prefetch_images", "--kind=movie", "--batch-size=1",
+                f"--checkpoint={self.checkpoint}", *args,
+                stdout=out, stderr=io.StringIO()
+            )
+        return out.getvalue()
+
+
+    def stored(self) -> list[int]:
+        return sorted(
+            TMDBMovie.objects.filter(
+                content__img_path__startswith=images.STORE_DIR + "/"
+            ).values_list("tmdb_id", flat=True)
+        )
+
+
+    def test_missing_artwork_is_downloaded(self):
+        self.assertEqual(self.stored(), [])
+
+        out = self.prefetch()
+
+        self.assertIn("3 without artwork, 0 linked to stored artwork, 3 downloaded", out)
+        self.assertEqual(self.stored(), [1, 2, 3])
+        self.assertEqual(self.fake.hits["image"], 3)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        # Nothing is missing anymore
+        self.fake.hits.clear()
+        self.assertIn("0 without artwork", self.prefetch())
+        self.assertEqual(self.fake.hits["image"], 0)
+
+
+    def test_interrupted_run_resumes_after_its_last_batch(self):
+        restore = TMDBMovie.restore_images.__func__
+        calls = []
+
+        def interrupt(cls, rows, pool, retries=0):
+            calls.append([row.tmdb_id for row in rows])
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return restore(cls, rows, pool, retries)
+
+        with mock.patch.object(TMDBMovie, "restore_images", classmethod(interrupt)), \
+             self.assertRaises(KeyboardInterrupt):
+            self.prefetch()
+        first = TMDBMovie.objects.get(tmdb_id=1).pk
+        with open(self.checkpoint) as file:
+            self.assertEqual(json.load(file), {"cursors": {"movie": first}})
+
+        self.fake.hits.clear()
+        self.prefetch()
+        self.assertEqual(self.stored(), [1, 2, 3])
+        self.assertEqual(self.fake.hits["image"], 2)
+
+
+    def test_dry_run_only_counts(self):
+        out = self.prefetch("--dry-run")
+
+        self.assertIn("3 without artwork", out)
+        self.assertEqual(self.stored(), [])
+        self.assertEqual(self.fake.hits["image"], 0)
+
+
+class ExportTests(TestCase):
+    # A small daily ID export, see exports.iter_export
+    ENTRIES = [
+        {"id": 1, "original_title": "One", "popularity": 5.0, "adult": False, "video": False},
+        {"id": 2, "original_title": "Two", "popularity": 0.5, "adult": False, "video": False},
+        {"id": 3, "original_title": "Three", "popularity": 9.0, "adult": True, "video": False},
+        {"id": 4, "original_title": "Four", "popularity": 7.0, "adult": False, "video": False},
+    ]
+
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "movie_ids_05_15_2024.json.gz")
+        with gzip.open(self.path, "wt", encoding="utf-8") as file:
+            for entry in self.ENTRIES[:2]:
+                file.write(json.dumps(entry) + "\n")
+            file.write("not json\n\n")
+            for entry in self.ENTRIES[2:]:
+                file.write(json.dumps(entry) + "\n")
+
+
+    def test_iter_export_skips_bad_lines(self):
+        self.assertEqual(list(exports.iter_export(self.path)), self.ENTRIES)
+        self.assertEqual(exports.export_kind(self.path), "movie")
+
+
+    def test_filter_and_skip_existing(self):
+        entries = exports.filter_entries(exports.iter_export(self.path), min_popularity=1)
+        self.assertEqual([entry["id"] for entry in entries], [1, 4])
+
+        TMDBMovie.objects.create(tmdb_id=4, img_path="", content=make_content(tmdb_id=4))
+        entries = exports.skip_existing(self.ENTRIES, TMDBMovie, batch_size=3)
+        self.assertEqual([entry["id"] for entry in entries], [1, 2, 3])
+
+
+    def test_command_feeds_new_ids_to_the_workers(self):
+        TMDBMovie.objects.create(tmdb_id=4, img_path="", content=make_content(tmdb_id=4))
+        out = io.StringIO()
+
+        with mock.patch.object(TMDBMovie, "fetch_one_movie_by_id", return_value=True) as fetch:
+            call_command(
+                "tmdb_ingest_export",
+                self.path,
+                "--workers", "2",
+                "--queue-size", "1",
+                stdout=out
+            )
+        self.assertEqual(sorted(call.args[0] for call in fetch.call_args_list), ["1", "2"])
+        self.assertIn("4 ids read, 2 queued, 2 fetched, 0 failed", out.getvalue())
+
+        out = io.StringIO()
+        call_command("tmdb_ingest_export", self.path, "--min-popularity", "1", "--dry-run", stdout=out)
+        self.assertIn("4 ids read, 1 would be fetched", out.getvalue())
+
+
+class ImportResumeTests(TestCase):
+    # tmdb_import interrupted after its first batch, then resumed
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.batches = []
+
+
+    def run_import(self, path: str, interrupt: bool = False) -> str:
+        write = import_command.Command._write
+
+        def spy(command, kind, payloads):
+            self.batches.append([payload["id"] for payload in payloads])
+            if interrupt and len(self.batches) == 2:
+                raise KeyboardInterrupt
+            write(command, kind, payloads)
+
+        stderr = io.StringIO()
+        with mock.patch.object(import_command.Command, "_write", autospec=True, side_effect=spy):
+            try:
+                call_command(
+                    "tmdb_import", path, "--no-images", "--processes=1",
+                    "--batch-size=1", "--chunk-size=1",
+                    stdout=io.StringIO(), stderr=stderr
+                )
+            except KeyboardInterrupt:
+                pass
+
+        return stderr.getvalue()
+
+
+    def write_movie(self, name: str, id: int) -> None:
+        with open(os.path.join(self.root, "movies", name), "w") as file:
+            json.dump(FakeTMDB.movie(id), file)
+
+
+    def test_directory_resumes_after_its_last_file(self):
+        os.mkdir(os.path.join(self.root, "movies"))
+        for name, id in (("b.json", 2), ("c.json", 3)):
+            self.write_movie(name, id)
+        path = os.path.join(self.root, "movies")
+
+        self.run_import(path, interrupt=True)
+        # Sorts before the checkpoint, so it would shift a file index
+        self.write_movie("a.json", 1)
+        self.batches.clear()
+        self.run_import(path)
+
+        self.assertEqual(self.batches, [[3]])
+        self.assertEqual(
+            sorted(TMDBMovie.objects.values_list("tmdb_id", flat=True)),
+            [2, 3]
+        )
+
+
+    def test_jsonl_resumes_at_its_offset(self):
+        path = os.path.join(self.root, "movies.jsonl")
+        with open(path, "w") as file:
+            file.write(json.dumps(FakeTMDB.movie(1)) + "\n")
+            file.write(json.dumps(FakeTMDB.movie(2)) + "\n")
+            file.write("{not json\n")
+            file.write(json.dumps(FakeTMDB.movie(4)) + "\n")
+
+        self.run_import(path, interrupt=True)
+        with open(f"{path}.checkpoint") as file:
+            checkpoint = json.load(file)
+        self.assertEqual((checkpoint["file"], checkpoint["line"]), ("movies.jsonl", 1))
+        self.batches.clear()
+        stderr = self.run_import(path)
+
+        self.assertEqual(self.batches, [[2], [4]])
+        # Lines are still numbered from the start of the file
+        self.assertIn("movies.jsonl:3:", stderr)
+        self.assertEqual(
+            sorted(TMDBMovie.objects.values_list("tmdb_id", flat=True)),
+            [1, 2, 4]
+        )
+
+
+class IterRecordsTests(SimpleTestCase):
+
+    def records(self, text: str, read_size: int = 5) -> list:
+        # Small reads so records span several of them
+        return [
+            record or error
+            for record, error in uploads.iter_records(io.StringIO(text), read_size)
+        ]
+
+
+    def test_array(self):
+        text = json.dumps([{"id": 1, "name": "a, [b]"}, {"id": 2, "name": 'c"}'}], indent=2)
+
+        self.assertEqual(
+            self.records(text),
+            [{"id": 1, "name": "a, [b]"}, {"id": 2, "name": 'c"}'}]
+        )
+
+
+    def test_jsonl(self):
+        self.assertEqual(
+            self.records('{"id": 1}\n{"id": 2}\r\n\n{"id": 3}'),
+            [{"id": 1}, {"id": 2}, {"id": 3}]
+        )
+
+
+    def test_single_object(self):
+        text = json.dumps({"id": 1, "seasons": [{"id": 2}]}, indent=2)
+
+        self.assertEqual(self.records(text), [{"id": 1, "seasons": [{"id": 2}]}])
+
+
+    def test_malformed_record_in_a_minified_array(self):
+        records = self.records('[{"id": 1},{"id": 2,, "x": [3]},7,{"id": 4}]')
+
+        self.assertEqual(records[0], {"id": 1})
+        self.assertTrue(records[1].startswith("invalid JSON near character 20"))
+        self.assertEqual(records[2:], ["expected an object, got int", {"id": 4}])
+
+
+    def test_malformed_lines(self):
+        records = self.records('{"id": 1}\n{"id": 2\n{"id": 3}}\n{"id": 4}\n')
+
+        # The unclosed record ends at its line, so the next one is still read
+        self.assertEqual(records[0], {"id": 1})
+        self.assertTrue(records[1].startswith("invalid JSON near character 18"))
+        self.assertEqual(records[2], {"id": 3})
+        self.assertTrue(records[3].startswith("invalid JSON"))
+        self.assertEqual(records[4:], [{"id": 4}])
+
+
+    def test_unclosed_record_is_not_read_to_the_size_cap(self):
+        text = '{"id": 1}\n{"id": [2, {"x": 3}\n' + '{"id": 5}\n' * 1000
+
+        with mock.patch.object(uploads, "MAX_RECORD_SIZE", 100):
+            records = self.records(text)
+
+        self.assertEqual(len(records), 1002)
+        self.assertTrue(records[1].startswith("invalid JSON"))
+        self.assertEqual(records[-1], {"id": 5})
+
+
+class TMDBClientTests(SimpleTestCase):
+
+    def test_token_bucket_limits_the_rate(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+
+        started = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        # The first token is already there, the other 5 take 1/50s each
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+
+    def test_server_errors_are_retried(self):
+        fake = FakeTMDB(error_rate=0.5, seed=3).start()
+        self.addCleanup(fake.stop)
+        client = TMDBClient(*fake.urls(), backoff=0.01, max_retries=10, rate_limit=0)
+
+        for id in range(1, 11):
+            response = client.get_data(f"/movie/{id}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["id"], id)
+        self.assertGreater(fake.hits["500"], 0)
+        self.assertEqual(fake.hits["movie"], 10)
+
+
+    def test_throttled_request_waits_for_retry_after(self):
+        fake = FakeTMDB(throttle_rate=1.0).start()
+        self.addCleanup(fake.stop)
+        client = TMDBClient(*fake.urls(), backoff=0.01, max_retries=1, rate_limit=0)
+
+        started = time.monotonic()
+        response = client.get_data("/movie/1")
+        # Retries exhausted, the last response is returned as is
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(fake.hits["429"], 2)
+        self.assertGreaterEqual(time.monotonic() - started, 1)
+
+
+    def test_unreachable_server_gives_none(self):
+        fake = FakeTMDB().start()
+        base_url, img_base_url = fake.urls()
+        fake.stop()
+        client = TMDBClient(base_url, img_base_url, backoff=0.01, max_retries=2, rate_limit=0)
+
+        with redirect_stdout(io.StringIO()):
+            self.assertIsNone(client.get_data("/movie/1"))
+
+
+class ResponseCacheTests(FakeTMDBMixin, SimpleTestCase):
+
+    def fetch(self, refresh=False):
+        return self.cache.fetch_json(
+            "/movie/7",
+            None,
+            self.tmdb_client.get_data,
+            refresh
+        )
+
+
+    def test_fresh_entry_is_served_without_a_request(self):
+        data = self.fetch()
+        self.assertEqual(data["id"], 7)
+        self.assertEqual(self.fetch(), data)
+        self.assertEqual(self.fake.hits["movie"], 1)
+        self.assertEqual(self.cache.counts["hits"], 1)
+
+
+    def test_stale_entry_is_revalidated_with_its_etag(self):
+        data = self.fetch()
+
+        with mock.patch("time.time", return_value=time.time() + self.cache.ttl_for("/movie/7") + 1):
+            self.assertEqual(self.fetch(), data)
+        self.assertEqual(self.fetch(refresh=True), data)
+
+        self.assertEqual(self.cache.counts["revalidated"], 2)
+        self.assertEqual(self.cache.counts["misses"], 1)
+        self.assertEqual(self.cache.stats()["hit_rate"], 2 / 3)
+
+
+    def test_stale_entry_is_served_when_tmdb_is_down(self):
+        data = self.fetch()
+
+        with mock.patch.object(self.tmdb_client, "get_data", return_value=None), \
+             redirect_stdout(io.StringIO()):
+            self.assertEqual(self.fetch(refresh=True), data)
+        self.assertEqual(self.cache.counts["stale"], 1)
+
+
+    def test_counts_are_reported_and_saved(self):
+        with metrics.collect() as run_metrics:
+            self.fetch()
+            self.fetch()
+        self.assertEqual(run_metrics.report()["counters"]["cache_hits"], 1)
+        self.assertEqual(run_metrics.report()["counters"]["cache_misses"], 1)
+
+        # Another process sharing the cache
+        other = ResponseCache(self.cache.directory)
+        other.counts.update(hits=2)
+        for cache in (self.cache, other):
+            cache.save_stats()
+
+        self.assertEqual(self.cache.saved_stats()["hit_rate"], 3 / 4)
+        output = io.StringIO()
+        call_command("tmdb_cache", stdout=output)
+        self.assertIn("1 responses", output.getvalue())
+        self.assertIn("3 hits, 0 revalidated, 1 misses, 0 stale, 0 errors (75% hit rate)", output.getvalue())
+
+
+class SyncTests(FakeTMDBMixin, TestCase):
+
+    def test_sync_updates_changed_titles_and_the_watermark(self):
+        with redirect_stdout(io.StringIO()):
+            TMDBMovie.fetch_one_movie_by_id("5")
+            TMDBTVSeries.fetch_one_series_by_tmdb_id("9")
+        movie = TMDBMovie.objects.get(tmdb_id=5).content
+        series = TMDBTVSeries.objects.get(tmdb_id=9).content
+        WatchableContent.objects.filter(pk__in=[movie.pk, series.pk]).update(name="Renamed")
+        episodes = TVEpisode.objects.filter(season__series=series)
+        self.assertEqual(episodes.count(), 4)
+        episodes.update(name="Renamed")
+        self.fake.changes = {"movie": {5, 6}, "tv": {9}}
+
+        out = io.StringIO()
+        with redirect_stdout(io.StringIO()):
+            call_command("tmdb_sync", stdout=out)
+
+        movie.refresh_from_db()
+        series.refresh_from_db()
+        self.assertEqual(movie.name, "Movie 5")
+        self.assertEqual(series.name, "Series 9")
+        self.assertFalse(episodes.filter(name="Renamed").exists())
+        self.assertIn("movie", out.getvalue())
+        today = timezone.now().date()
+        self.assertEqual(SyncWatermark.get_synced_through("movie"), today)
+        self.assertEqual(SyncWatermark.get_synced_through("tv"), today)
+
+
+class PayloadTests(SimpleTestCase):
+    # Every payload is decoded by msgspec and by the stdlib fallback, which
+    # must agree on the result and the error
+    SERIES = FakeTMDB(seasons=2, episodes=2).series(3)
+    SEASON = FakeTMDB(seasons=2, episodes=2).season(3, 1)
+
+
+    def decoders(self):
+        if payloads.msgspec is not None:
+            yield "msgspec"
+        with mock.patch.object(payloads, "msgspec", None):
+            yield "stdlib"
+
+
+    def decode_all(self, data, shape) -> list:
+        body = json.dumps(data).encode()
+        results = []
+        for name in self.decoders():
+            with self.subTest(decoder=name):
+                try:
+                    results.append(payloads.decode(body, shape))
+                except payloads.InvalidPayload as e:
+                    results.append(str(e))
+        return results
+
+
+    def test_unknown_keys_are_dropped(self):
+        for data in self.decode_all(FakeTMDB.movie(5), payloads.Movie):
+            self.assertEqual(set(data), set(payloads.Movie.__annotations__))
+            self.assertEqual(data["genres"][0], {"id": 18, "name": "Drama"})
+
+
+    def test_bundled_seasons_are_kept(self):
+        bundle = {**self.SERIES, "season/1": self.SEASON}
+
+        for data in self.decode_all(bundle, payloads.Series):
+            self.assertNotIn("tagline", data)
+            self.assertEqual(data["season/1"]["episodes"][0]["still_path"], "/still3_1_1.jpg")
+            self.assertNotIn("guest_stars", data["season/1"]["episodes"][0]["crew"][0])
+
+
+    def test_invalid_payloads_are_rejected_the_same_way(self):
+        invalid = [
+            ({**FakeTMDB.movie(5), "genres": [{"id": "18", "name": "Drama"}]},
+             "Expected `int`, got `str` - at `$.genres[0].id`"),
+            ({**FakeTMDB.movie(5), "runtime": True},
+             "Expected `int | null`, got `bool` - at `$.runtime`"),
+            ({key: value for key, value in FakeTMDB.movie(5).items() if key != "title"},
+             "Object missing required field `title`"),
+        ]
+
+        for data, message in invalid:
+            for error in self.decode_all(data, payloads.Movie):
+                self.assertEqual(error, message)
+
+
+    def test_body_that_is_not_json(self):
+        for name in self.decoders():
+            with self.subTest(decoder=name), self.assertRaises(payloads.InvalidPayload):
+                payloads.decode(b"{not json", payloads.Movie)
+
+
+class SeriesArchiveTests(TempStoragesMixin, SimpleTestCase):
+    fake = FakeTMDB(seasons=1, episodes=2)
+    SERIES = fake.series(3)
+    SEASON = fake.season(3, 1)
+    EPISODE = fake.episode(3, 1, 2)
+
+
+    def write_dumps(self) -> None:
+        with archives.series("Show: 3") as archive:
+            archive.write(archives.series_member("Show: 3"), self.SERIES)
+            archive.write(archives.episode_member("Season 1", 2), self.EPISODE)
+            archive.write(archives.season_member("Season 1"), self.SEASON)
+
+
+    def test_written_dumps_are_read_back(self):
+        self.write_dumps()
+
+        archive = archives.SeriesArchive("Show: 3")
+        self.assertEqual(
+            archive.read("Season 1.json", payloads.Season),
+            payloads.decode(json.dumps(self.SEASON), payloads.Season)
+        )
+        self.assertEqual(archive.read("Season 1-Episode2.json", payloads.Episode)["id"], 3001002)
+        self.assertIsNone(archive.read("Season 2.json", payloads.Season))
+        # The series, then each season followed by its episodes
+        with storage.dumps().open("TV/Show - 3.zip", "rb") as file:
+            names = zipfile.ZipFile(file).namelist()
+        self.assertEqual(
+            names,
+            [archives.MANIFEST, "Show - 3.json", "Season 1.json", "Season 1-Episode2.json"]
+        )
+        self.assertEqual(
+            archives.manifest("Show: 3")["Season 1-Episode2.json"]["kind"],
+            "episode"
+        )
+
+
+    def test_unchanged_dumps_are_not_saved_again(self):
+        self.write_dumps()
+        modified = storage.dumps().get_modified_time("TV/Show - 3.zip")
+
+        archive = archives.SeriesArchive("Show: 3")
+        archive.write("Season 1.json", self.SEASON)
+        archive.write("Show - 3.json", self.SERIES)
+
+        self.assertFalse(archive.flush())
+        self.assertEqual(storage.dumps().get_modified_time("TV/Show - 3.zip"), modified)
+
+
+    def test_invalid_dump_keeps_the_archived_one(self):
+        self.write_dumps()
+
+        archive = archives.SeriesArchive("Show: 3")
+        archive.load()
+        archive._pending["Season 1.json"] = b"{not json"
+        archive.write("Season 1-Episode2.json", {**self.EPISODE, "name": "Renamed"})
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(archive.flush())
+
+        archive = archives.SeriesArchive("Show: 3")
+        self.assertEqual(archive.read("Season 1.json", payloads.Season)["id"], 3001)
+        self.assertEqual(
+            archive.read("Season 1-Episode2.json", payloads.Episode)["name"],
+            "Renamed"
+        )
+
+
+    def test_loose_dumps_are_adopted_by_tmdb_migrate_json(self):
+        dumps = storage.dumps()
+        for name, data in (
+            ("Show - 3.json", payloads.encode(self.SERIES)),
+            ("Season 1.json", payloads.encode(self.SEASON)),
+            ("Season 1-Episode2.json", b"{not json"),
+        ):
+            dumps.save(f"TV/Show - 3/{name}", ContentFile(data))
+
+        stderr = io.StringIO()
+        with redirect_stdout(io.StringIO()):
+            call_command("tmdb_migrate_json", stdout=io.StringIO(), stderr=stderr)
+
+        self.assertEqual(set(archives.manifest("Show: 3")), {"Show - 3.json", "Season 1.json"})
+        self.assertIn("1 invalid dumps left in place", stderr.getvalue())
+        self.assertEqual(dumps.listdir("TV/Show - 3"), ([], ["Season 1-Episode2.json"]))
+        self.assertEqual(
+            archives.read("Show: 3", "Season 1.json", payloads.Season)["name"],
+            "Season 1"
+        )
+
+
+class StorageChecks:
+    # Run against each artwork backend, self.artwork is set up by setUp
+
+    def test_save_file_replaces_the_name(self):
+        directory = storage.temp_dir(self.artwork) or tempfile.gettempdir()
+        for content in (b"old", b"new"):
+            fd, path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, "wb") as file:
+                file.write(content)
+            self.assertEqual(storage.save_file(self.artwork, "tmdb/a.jpg", path), "tmdb/a.jpg")
+            if os.path.exists(path):
+                os.remove(path)
+
+        with self.artwork.open("tmdb/a.jpg", "rb") as file:
+            self.assertEqual(file.read(), b"new")
+
+
+    def test_exists_many(self):
+        names = [f"tmdb/store/ab/{name}.jpg" for name in "aceg"]
+        for name in names[:3]:
+            self.artwork.save(name, ContentFile(b"x"))
+        self.artwork.save("tmdb/store/ab/b.jpg", ContentFile(b"x"))
+
+        self.assertEqual(
+            storage.exists_many(self.artwork, names + ["tmdb/other.jpg"]),
+            set(names[:3])
+        )
+        self.assertEqual(storage.exists_many(self.artwork, []), set())
+
+
+    def test_same_content(self):
+        self.artwork.save("tmdb/a.json", ContentFile(b"[1]"))
+
+        self.assertTrue(storage.same_content(self.artwork, "tmdb/a.json", b"[1]"))
+        self.assertFalse(storage.same_content(self.artwork, "tmdb/a.json", b"[2]"))
+        self.assertFalse(storage.same_content(self.artwork, "tmdb/b.json", b"[1]"))
+
+
+    def test_list_files_is_recursive(self):
+        for name in ("tmdb/a.jpg", "tmdb/store/ab/cd/b.jpg", "other/c.jpg"):
+            self.artwork.save(name, ContentFile(b"12345"))
+
+        files = storage.list_files(self.artwork, "tmdb")
+        self.assertEqual(set(files), {"tmdb/a.jpg", "tmdb/store/ab/cd/b.jpg"})
+        self.assertEqual(files["tmdb/a.jpg"][0], 5)
+
+
+    def test_read_ends(self):
+        self.artwork.save("tmdb/a.jpg", ContentFile(b"HEAD" + b"-" * 100 + b"TAIL"))
+
+        self.assertEqual(storage.read_ends(self.artwork, "tmdb/a.jpg", 4), (b"HEAD", b"TAIL"))
+
+
+class FileSystemStorageTests(StorageChecks, TempStoragesMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.artwork = storage.artwork()
+
+
+    def test_aliases_follow_the_settings(self):
+        self.assertIsInstance(self.artwork, FileSystemStorage)
+        self.assertTrue(storage.dumps().location.endswith("json"))
+        self.assertEqual(self.artwork.url("tmdb/a.jpg"), "/static/tmdb/a.jpg")
+
+
+@unittest.skipIf(mock_aws is None or storage.boto3 is None, "needs boto3 and moto")
+class S3StorageTests(StorageChecks, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(os.environ, {
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+            "AWS_DEFAULT_REGION": "us-east-1",
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+
+        storage.boto3.client("s3").create_bucket(Bucket="artwork")
+        override = override_settings(STORAGES={
+            **settings.STORAGES,
+            storage.ARTWORK: {
+                "BACKEND": "tmdb.storage.S3Storage",
+                "OPTIONS": {"bucket": "artwork", "prefix": "media/", "max_workers": 2},
+            },
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        self.artwork = storage.artwork()
+
+
+    def test_aliases_follow_the_settings(self):
+        self.assertIsInstance(self.artwork, S3Storage)
+        self.assertEqual(
+            self.artwork.url("tmdb/a b.jpg"),
+            "https://artwork.s3.amazonaws.com/media/tmdb/a%20b.jpg"
+        )
+
+
+    def test_names_are_kept_under_the_prefix(self):
+        self.artwork.save("tmdb/a.jpg", ContentFile(b"x"))
+
+        self.assertEqual(self.artwork.listdir("tmdb"), ([], ["a.jpg"]))
+        self.assertEqual(
+            [entry["Key"] for entry in self.artwork.client.list_objects_v2(Bucket="artwork")["Contents"]],
+            ["media/tmdb/a.jpg"]
+        )
+        self.artwork.delete("tmdb/a.jpg")
+        self.assertFalse(self.artwork.exists("tmdb/a.jpg"))
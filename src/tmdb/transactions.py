@@ -0,0 +1,164 @@
+import contextvars
+import os
+import traceback
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.db import connection, transaction
+
+
+# Seasons a series ingest writes per commit at most, it also commits before
+# waiting on TMDB (see release). 0 turns batching off, so every bulk write
+# commits on its own.
+COMMIT_BATCH_SIZE = int(os.getenv("TMDB_COMMIT_BATCH_SIZE", 10))
+
+# The batch the current thread writes in, see batch. Pool threads never
+# write, so they don't need it.
+_batch: contextvars.ContextVar["CommitBatch | None"] = contextvars.ContextVar(
+    "tmdb_commit_batch",
+    default=None
+)
+
+
+class CommitBatch:
+    """
+    A transaction that is committed every size seasons.
+
+    On SQLite every commit is an fsync, so a series written in autocommit
+    pays for several per episode. A batch pays for one per size seasons,
+    while still bounding how long the write lock is held and how much a
+    crash throws away (an IngestRun resumes from the last commit).
+
+    The transaction is only opened by the first write after a commit (see
+    atomic and season), so work done before it, e.g. downloading artwork,
+    never holds the write lock.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.seasons = 0
+        self._atomic = None
+        # Atomic blocks open around the batch, its transaction is only ever
+        # opened right inside them
+        self._depth = len(connection.atomic_blocks)
+
+
+    def begin(self) -> None:
+        # Blocks opened inside the batch already joined a transaction of
+        # their own, the batch's can't be nested in them
+        if self._atomic is None and len(connection.atomic_blocks) == self._depth:
+            self._atomic = transaction.atomic()
+            self._atomic.__enter__()
+
+
+    def end(self, error: BaseException | None = None) -> None:
+        # Commits, or rolls back everything since the last commit on error
+        atomic, self._atomic = self._atomic, None
+        if atomic is None:
+            return
+        if error is None:
+            atomic.__exit__(None, None, None)
+        else:
+            atomic.__exit__(type(error), error, error.__traceback__)
+
+
+    def release(self) -> None:
+        # Commits what was written so far, never inside somebody's atomic block
+        if self._atomic is not None and connection.atomic_blocks[-1] is self._atomic:
+            self.end()
+
+
+    def season_written(self) -> None:
+        self.seasons += 1
+        if self.seasons % self.size == 0:
+            self.release()
+
+
+@contextmanager
+def batch(size: int = COMMIT_BATCH_SIZE) -> Iterator[CommitBatch | None]:
+    """
+    Runs the block in transactions of at most size seasons each, see season.
+
+    A batch opened inside another one joins it. If the block raises, the
+    seasons written since the last commit are rolled back with it.
+
+    Usage:
+        with transactions.batch():
+            for season in seasons:
+                with transactions.season(f"season {number}", run):
+                    ...
+    """
+
+    outer = _batch.get()
+    if outer is not None or size <= 0:
+        yield outer
+        return
+
+    commit_batch = CommitBatch(size)
+    token = _batch.set(commit_batch)
+    try:
+        yield commit_batch
+    except BaseException as e:
+        commit_batch.end(e)
+        raise
+    else:
+        commit_batch.end()
+    finally:
+        _batch.reset(token)
+
+
+@contextmanager
+def season(name: str, run=None) -> Iterator[None]:
+    """
+    Writes one season of the open batch in a savepoint.
+
+    If the block raises, only the season is rolled back: the error is
+    printed and the ingest moves on, leaving the season unfinished in run
+    so it is resumed. Without a batch the block runs as is.
+    """
+
+    commit_batch = _batch.get()
+    if commit_batch is None:
+        yield
+        return
+
+    commit_batch.begin()
+    try:
+        with transaction.atomic():
+            yield
+    except Exception:
+        print(f"\nRolled back {name}:\n{traceback.format_exc()}\n")
+        if run:
+            # Its steps were checkpointed in the rolled back savepoint
+            run.reset_steps()
+    commit_batch.season_written()
+
+
+@contextmanager
+def atomic() -> Iterator[None]:
+    """
+    transaction.atomic for the writes of an ingest.
+
+    Inside a batch it opens the batch's transaction if the last commit
+    closed it, so the block joins it instead of committing on its own.
+    """
+
+    commit_batch = _batch.get()
+    if commit_batch is not None:
+        commit_batch.begin()
+
+    with transaction.atomic():
+        yield
+
+
+def release() -> None:
+    """
+    Commits the current batch's writes so far, e.g. before a slow download.
+
+    Does nothing outside a batch, or inside a season or any other atomic
+    block, whose writes can't be committed on their own.
+    """
+
+    commit_batch = _batch.get()
+    if commit_batch is not None:
+        commit_batch.release()
@@ -0,0 +1,416 @@
+import json
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, TextIO
+
+from django.db import transaction
+
+from djangoflix.models import TVSeason, WatchableContent
+from . import archives
+from .models import (
+    EPISODE_FIELDS,
+    MAX_WORKERS,
+    TMDBMovie,
+    TMDBTVEpisode,
+    TMDBTVSeason,
+    TMDBTVSeries,
+)
+from .payloads import InvalidPayload, Movie, Season, Series, convert
+
+
+# Text read from the upload at a time
+READ_SIZE = 64 * 1024
+# A single record bigger than this is treated as malformed, which caps how
+# much of an upload is ever held in memory
+MAX_RECORD_SIZE = 16 * 1024 * 1024
+# Records written per transaction
+BATCH_SIZE = 200
+SEPARATORS = " \t\r\n,"
+# What _value_end stops at, in and out of strings, and what ends a bare value
+_STRING_STOPS = re.compile(r'["\\\n]')
+_STOPS = re.compile(r'["{}\[\]\n]')
+_BARE_END = re.compile(r'[\s,\]}]')
+
+
+def iter_records(file: TextIO,
+                 read_size: int = READ_SIZE
+               ) -> Iterator[tuple[dict | None, str | None]]:
+    """
+    Incrementally decodes a JSON array, JSONL or a single JSON object.
+
+    Only the record being decoded (plus one read) is held in memory, so
+    uploads of any size are fine. Yields (record, None) for each object,
+    or (None, reason) for anything that isn't one. A record that isn't
+    all read yet is scanned for its end once, however many reads it
+    spans, and only decoded then. A malformed record is skipped by
+    resuming where its brackets close, or at the end of its line in JSONL.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    # Characters dropped from the front of buffer so far
+    offset = 0
+    eof = False
+    array = None
+    # JSONL has a record per line, a single object can span many. None
+    # until the first record says which
+    lines = None
+    # How far the record at position has been scanned, see _value_end
+    scan = {}
+
+    while True:
+        while position < len(buffer) and buffer[position] in SEPARATORS:
+            position += 1
+
+        if position == len(buffer):
+            if eof:
+                return
+            offset += position
+            buffer, position, eof = _read_more(file, buffer, position, read_size)
+            continue
+
+        if array is None:
+            # The first value decides whether this is one big array
+            array = buffer[position] == "["
+            if array:
+                position += 1
+                continue
+
+        if array and buffer[position] == "]":
+            return
+
+        if not scan:
+            # Most records are valid and all read, the C decoder finds
+            # those fastest. Only an object is surely all read
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                record = None
+            if isinstance(record, dict):
+                if lines is None and not array:
+                    lines = "\n" not in buffer[position:end]
+                position = end
+                yield (record, None)
+                continue
+
+        end = _value_end(buffer, position, scan, bool(lines))
+        if end is None and not eof and len(buffer) - position < MAX_RECORD_SIZE:
+            # Reads grow with the record, so it isn't copied once per read
+            offset += position
+            buffer, position, eof = _read_more(
+                file,
+                buffer,
+                position,
+                min(max(read_size, len(buffer) - position), MAX_RECORD_SIZE)
+            )
+            continue
+
+        scan = {}
+        # A value that never ends (e.g. a missing bracket) takes the rest
+        # of what was read
+        unended = end is None
+        end = len(buffer) if unended else end
+        try:
+            record, _ = decoder.raw_decode(buffer[position:end])
+        except json.JSONDecodeError as e:
+            yield (None, f"invalid JSON near character {offset + position + e.pos}: {e.msg}")
+            if unended and not array:
+                # Resync on the next line, which makes this JSONL
+                lines = True
+                newline = buffer.find("\n", position + 1)
+                end = len(buffer) if newline == -1 else newline
+            position = end
+            continue
+
+        if lines is None and not array:
+            lines = "\n" not in buffer[position:end]
+        position = end
+        if isinstance(record, dict):
+            yield (record, None)
+        else:
+            yield (None, f"expected an object, got {type(record).__name__}")
+
+
+def _value_end(buffer: str, start: int, state: dict, lines: bool) -> int | None:
+    # Where the JSON value at buffer[start] ends, without decoding it: when
+    # its brackets close, or for a bare value (a number, a stray bracket)
+    # at the next separator. With lines a newline ends any value. state
+    # carries the scan across reads (buffer is only trimmed up to start),
+    # so every character is scanned once. None if it isn't all read yet
+    index = start + state.get("scanned", 0)
+    if index == start:
+        state["bare"] = buffer[start] not in '{["'
+        if state["bare"]:
+            index += 1
+
+    end = None
+    if state["bare"]:
+        match = _BARE_END.search(buffer, index)
+        if match:
+            end = match.start()
+        state["scanned"] = len(buffer) - start
+        return end
+
+    depth = state.get("depth", 0)
+    in_string = state.get("in_string", False)
+    escaped = state.get("escaped", False)
+    while True:
+        if escaped:
+            # The character after a backslash
+            if index == len(buffer):
+                break
+            index += 1
+            escaped = False
+        match = (_STRING_STOPS if in_string else _STOPS).search(buffer, index)
+        if match is None:
+            index = len(buffer)
+            break
+        index = match.end()
+        char = match.group()
+        if char == "\n":
+            if lines:
+                end = index - 1
+                break
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            in_string = not in_string
+            if not in_string and not depth:
+                end = index
+                break
+        elif char in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth <= 0:
+                end = index
+                break
+
+    state.update(scanned=index - start, depth=depth, in_string=in_string, escaped=escaped)
+
+    return end
+
+
+def _read_more(file: TextIO,
+               buffer: str,
+               position: int,
+               read_size: int
+             ) -> tuple[str, int, bool]:
+    chunk = file.read(read_size)
+    # Drop everything already decoded before growing the buffer
+    return (buffer[position:] + chunk, 0, not chunk)
+
+
+def import_upload(path: str,
+                  type: str,
+                  series_id: int | None = None,
+                  batch_size: int = BATCH_SIZE
+                ) -> Counter:
+    """
+    Adds every record of an uploaded file, batch_size per transaction.
+
+    Parameters
+    ----------
+    path : str
+        the saved upload, see tmdb.views.process_upload
+    type : str
+        "movie", "series" or "season"
+    series_id : int | None
+        TMDB id of the series season uploads belong to, defaults to the
+        show_id of the season's episodes
+    batch_size : int
+        records per transaction
+
+    Returns
+    -------
+    Counter
+        inserted, updated, unchanged and failed record counts
+    """
+
+    handlers = {
+        "movie": _add_titles,
+        "series": _add_titles,
+        "season": _add_seasons,
+    }
+    if type not in handlers:
+        raise ValueError(f"Unsupported upload type {type}")
+
+    summary = Counter(inserted=0, updated=0, unchanged=0, failed=0)
+    batch = []
+
+    with open(path, "r", encoding="utf-8") as file, \
+         ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for record, error in iter_records(file):
+            if error:
+                print(f"\nSkipping upload record:\n{error}\n")
+                summary["failed"] += 1
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                summary.update(handlers[type](type, batch, series_id, pool))
+                batch = []
+        summary.update(handlers[type](type, batch, series_id, pool))
+
+    return summary
+
+
+def _add_titles(type: str,
+                records: list[dict],
+                series_id: int | None,
+                pool: ThreadPoolExecutor
+              ) -> Counter:
+    model = TMDBMovie if type == "movie" else TMDBTVSeries
+    shape = Movie if type == "movie" else Series
+    counts = Counter()
+    payloads = {}
+    for record in records:
+        try:
+            record = convert(record, shape)
+            payloads[record["id"]] = record
+        except InvalidPayload as e:
+            print(f"\nInvalid upload record:\n{e}\n")
+            counts["failed"] += 1
+
+    return counts + _write_batch(
+        list(payloads.values()),
+        lambda batch: _write_titles(model, batch, pool),
+        lambda batch: model.prefetch_images(batch, pool)
+    )
+
+
+def _write_titles(model: type[TMDBMovie] | type[TMDBTVSeries],
+                  payloads: list[dict],
+                  pool: ThreadPoolExecutor
+                ) -> list[tuple[TMDBMovie | TMDBTVSeries, WatchableContent]]:
+    pairs = model.bulk_add_from_json(payloads, pool)
+    if not model == TMDBTVSeries:
+        return pairs
+
+    # Like add_series_from_json, pick up any season dumps already archived
+    for (series, django_series), data in zip(pairs, payloads):
+        series.season_data = data.get("seasons", [])
+        TMDBTVSeason.add_all_seasons_from_json(series, django_series)
+
+    return pairs
+
+
+def _add_seasons(type: str,
+                 records: list[dict],
+                 series_id: int | None,
+                 pool: ThreadPoolExecutor
+               ) -> Counter:
+    counts = Counter()
+    by_series: dict[int, list[dict]] = {}
+    for record in records:
+        try:
+            record = convert(record, Season)
+            id = series_id or record["episodes"][0]["show_id"]
+        except InvalidPayload as e:
+            print(f"\nInvalid upload season:\n{e}\n")
+            counts["failed"] += 1
+            continue
+        except (KeyError, IndexError) as e:
+            print(f"\nUpload season is missing {e}\n")
+            counts["failed"] += 1
+            continue
+        by_series.setdefault(int(id), []).append(record)
+
+    for id, seasons_data in by_series.items():
+        series = TMDBTVSeries.objects.select_related(
+            "content"
+        ).filter(tmdb_id=id).first()
+        if not series:
+            print(f"\nSeries {id} must be added before its seasons\n")
+            counts["failed"] += len(seasons_data)
+            continue
+
+        counts += _write_batch(
+            list({data["id"]: data for data in seasons_data}.values()),
+            lambda batch: _write_seasons(batch, series.content, pool),
+            lambda batch: _prefetch_seasons(batch, pool)
+        )
+
+    return counts
+
+
+def _write_seasons(seasons_data: list[dict],
+                   django_series: WatchableContent,
+                   pool: ThreadPoolExecutor
+                 ) -> list[tuple[TMDBTVSeason, TVSeason]]:
+    # The batch's dumps are saved to the series' archive at once
+    with archives.series(django_series.name):
+        pairs = TMDBTVSeason._bulk_ingest_seasons(
+            seasons_data,
+            django_series,
+            pool
+        )
+        for season, django_season in pairs:
+            episodes = TMDBTVEpisode._bulk_ingest_episodes(
+                _complete_episodes(season.episode_data),
+                django_season,
+                pool
+            )
+            # A season whose episodes changed was updated too
+            if season.change == "unchanged" \
+            and any(not episode.change == "unchanged" for episode in episodes):
+                season.change = "updated"
+
+    return pairs
+
+
+def _prefetch_seasons(seasons_data: list[dict], pool: ThreadPoolExecutor) -> None:
+    TMDBTVSeason.prefetch_images(seasons_data, pool)
+    TMDBTVEpisode.prefetch_images(
+        [
+            episode for data in seasons_data
+            for episode in _complete_episodes(data["episodes"])
+        ],
+        pool
+    )
+
+
+def _complete_episodes(episodes: list[dict]) -> list[dict]:
+    # Uploads are offline, incomplete episodes aren't fetched
+    return [
+        episode for episode in episodes
+        if all(field in episode for field in EPISODE_FIELDS)
+    ]
+
+
+def _write_batch(payloads: list[dict], write, prefetch=None) -> Counter:
+    """
+    Runs write(payloads) in one transaction and counts what it did.
+
+    write returns the saved (TMDB row, canonical row) pairs, whose
+    `change` says if the record was inserted, updated or unchanged. If
+    the batch fails, each payload is retried in its own transaction so
+    one bad record doesn't cost the rest. prefetch(payloads) stores their
+    artwork first, so the transaction isn't held open for the downloads.
+    """
+
+    if not payloads:
+        return Counter()
+
+    if prefetch:
+        prefetch(payloads)
+
+    try:
+        with transaction.atomic():
+            pairs = write(payloads)
+        return Counter(row.change for row, _ in pairs)
+    except Exception as e:
+        print(f"\nUpload batch failed, retrying one by one:\n{e}\n")
+
+    counts = Counter()
+    for payload in payloads:
+        try:
+            with transaction.atomic():
+                [(row, _)] = write([payload])
+            counts[row.change] += 1
+        except Exception as e:
+            print(f"\nUpload record {payload['id']} failed:\n{e}\n")
+            counts["failed"] += 1
+
+    return counts
@@ -8,4 +8,5 @@ urlpatterns = [
     path("", views.home, name="home"),
     path("tmdb/process/", views.process_form, name="process"),
     path("tmdb/upload/", views.process_upload, name="upload"),
+    path("tmdb/jobs/", views.jobs, name="jobs"),
 ]
\ No newline at end of file
@@ -1,10 +1,14 @@
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.http import HttpResponseNotAllowed
-import json
+import os
+import uuid
 
 from .forms import FetchForm, UploadForm
-from .models import TMDBMovie, TMDBTVSeries, TMDBTVSeason
+from .models import IngestJob, IngestRun
+
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
 
 
 ### The TMDB FetchForm view
@@ -13,50 +17,96 @@ def home(request):
         fetch_form = FetchForm()
         file_form = UploadForm()
 
-        context={"fetch_form": fetch_form, "file_form": file_form}
+        # Newest finished jobs and series runs, with their metrics. A run
+        # started by a job is shown as part of that job
+        runs = sorted(
+            [
+                *IngestJob.objects.filter(
+                    report__isnull=False,
+                    finished_at__isnull=False
+                ).select_related("ingest_run").order_by("-finished_at")[:10],
+                *IngestRun.objects.filter(
+                    report__isnull=False,
+                    finished_at__isnull=False,
+                    jobs__isnull=True
+                ).order_by("-finished_at")[:10],
+            ],
+            key=lambda run: run.finished_at,
+            reverse=True
+        )[:10]
+
+        context={
+            "fetch_form": fetch_form,
+            "file_form": file_form,
+            "runs": runs,
+        }
 
         return render(request, "tmdb/home.html", context)
         
 
 ### Process FetchForm
+### Fetching runs in `manage.py tmdb_worker`, this only queues the job
 def process_form(request):
     if not request.method == "POST":
         return HttpResponseNotAllowed(["POST"])
     
     match request.POST["type"]:
         case "movie":
-            TMDBMovie.fetch_one_movie_by_id(request.POST["id"])
+            IngestJob.enqueue("movie", id=request.POST["id"])
         case "series":
-            TMDBTVSeries.fetch_one_series_by_tmdb_id(request.POST["id"])
+            IngestJob.enqueue("series", id=request.POST["id"])
         case "season":
-            TMDBTVSeason.fetch_one_season_by_series_id(
-                request.POST["id"],
-                request.POST["season"]
+            IngestJob.enqueue(
+                "season",
+                id=request.POST["id"],
+                season=request.POST["season"]
             )
         case _:
             print(f"\nInvalid type {request.POST["type"]}\n")
             return redirect(reverse_lazy("tmdb:home"))
 
-    return redirect(reverse_lazy("tmdb:home"))
+    return redirect(reverse_lazy("tmdb:jobs"))
 
 
 ### Process JSON upload
+### The upload is saved to disk and processed by `manage.py tmdb_worker`
 def process_upload(request):
     if not request.method == "POST":
         return HttpResponseNotAllowed(["POST"])
     
     file = request.FILES["file"]
-    file_data = json.load(file)
 
     match request.POST["type"]:
-        case "movie":
-            TMDBMovie.add_movie_from_json(file_data)
-        case "series":
-            TMDBTVSeries.add_series_from_json(file_data)
-        case "season":
-            pass
+        case "movie" | "series" | "season":
+            # Streamed to disk, the worker parses it record by record too
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}.json")
+            with open(path, "wb") as destination:
+                for chunk in file.chunks():
+                    destination.write(chunk)
+            params = {"type": request.POST["type"], "path": path}
+            if request.POST["type"] == "season" \
+            and request.POST.get("series", "").isdigit():
+                params["series"] = int(request.POST["series"])
+            IngestJob.enqueue("upload", **params)
         case _:
             print(f"\nInvalid type {request.POST["type"]}\n")
             return redirect(reverse_lazy("tmdb:home"))
 
-    return redirect(reverse_lazy("tmdb:home"))
\ No newline at end of file
+    return redirect(reverse_lazy("tmdb:jobs"))
+
+
+### Job status page
+def jobs(request):
+    if not request.method == "GET":
+        return HttpResponseNotAllowed(["GET"])
+    
+    context = {
+        "jobs": IngestJob.objects.all()[:100],
+        "counts": {
+            status: IngestJob.objects.filter(status=status).count()
+            for status in IngestJob.STATUS_CHOICES
+        },
+    }
+
+    return render(request, "tmdb/jobs.html", context)